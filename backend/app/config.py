@@ -49,6 +49,11 @@ class Settings(BaseSettings):
         alias="DOCUMENTAI_ENDPOINT",
         description="Document AI prediction endpoint URL (optional, will be constructed if not provided)"
     )
+    documentai_max_concurrency: int = Field(
+        default=8,
+        alias="DOCUMENTAI_MAX_CONCURRENCY",
+        description="Max in-flight Document AI process_document calls per worker (async client)"
+    )
     
     # Supabase settings
     supabase_url: str = Field(
@@ -127,6 +132,11 @@ class Settings(BaseSettings):
         alias="OPENAI_ESCALATION_MODEL",
         description="[DEPRECATED] OpenAI escalation model — no longer used"
     )
+    openai_max_concurrency: int = Field(
+        default=8,
+        alias="OPENAI_MAX_CONCURRENCY",
+        description="Max in-flight OpenAI requests per worker and event loop (AsyncOpenAI semaphore)"
+    )
     
     # AWS settings
     aws_region: str = Field(
@@ -151,6 +161,27 @@ class Settings(BaseSettings):
         alias="GEMINI_ESCALATION_MODEL",
         description="When set (e.g. gemini-3.1-pro), cascade failures escalate to this model with image input for consensus with OpenAI escalation"
     )
+    gemini_batch_enabled: bool = Field(
+        default=False,
+        alias="GEMINI_BATCH_ENABLED",
+        description=(
+            "Fold concurrent Gemini text calls that share a system prompt into one request "
+            "returning a JSON array (client-side micro-batching, up to 8 receipts / 50ms window)."
+        )
+    )
+    llm_batch_concurrency: int = Field(
+        default=8,
+        alias="LLM_BATCH_CONCURRENCY",
+        description="Max receipts in flight in process_receipts_with_llm_from_ocr_concurrently (bulk OCR -> LLM)."
+    )
+    trusted_hints_fast_path_enabled: bool = Field(
+        default=False,
+        alias="TRUSTED_HINTS_FAST_PATH_ENABLED",
+        description=(
+            "Skip the first-pass LLM call when OCR entities (confidence >= 0.95) give merchant, "
+            "date and total and the OCR line items already sum to that total."
+        )
+    )
     confidence_threshold: float = Field(
         default=0.80,
         alias="CONFIDENCE_THRESHOLD",
@@ -188,7 +219,8 @@ class Settings(BaseSettings):
         )
     )
     
-    @field_validator('allow_duplicate_for_debug', 'enable_debug_logs', 'vision_pipeline_enabled', mode='before')
+    @field_validator('allow_duplicate_for_debug', 'enable_debug_logs', 'vision_pipeline_enabled', 'gemini_batch_enabled',
+                     'trusted_hints_fast_path_enabled', mode='before')
     @classmethod
     def parse_bool_from_string(cls, v: Any) -> bool:
         """Parse boolean from string environment variable."""
@@ -7,11 +7,10 @@ Uses a smart queue system that waits for the next minute when rate limit is reac
 import asyncio
 import logging
 from typing import List, Dict, Any
-from datetime import datetime, timezone
 from fastapi import UploadFile
 
 from .workflow_processor_vision import process_receipt_workflow_vision
-from ..services.llm.gemini_rate_limiter import check_gemini_available
+from ..services.llm.gemini_rate_limiter import acquire_gemini_slot
 
 logger = logging.getLogger(__name__)
 
@@ -83,15 +82,6 @@ async def _process_single_receipt(
         }
 
 
-async def _wait_for_next_minute() -> None:
-    """Wait until the next minute starts."""
-    now = datetime.now(timezone.utc)
-    seconds_until_next_minute = 60 - now.second
-    if seconds_until_next_minute > 0:
-        logger.info(f"Waiting {seconds_until_next_minute} seconds until next minute for Gemini rate limit reset")
-        await asyncio.sleep(seconds_until_next_minute + 1)  # Add 1 second buffer
-
-
 async def process_bulk_receipts(
     files: List[UploadFile],
     user_id: str,
@@ -139,51 +129,16 @@ async def process_bulk_receipts(
     # Use semaphore to limit concurrent processing
     semaphore = asyncio.Semaphore(max_concurrent)
     
-    # Shared lock for Gemini rate limit checking
-    gemini_lock = asyncio.Lock()
-    gemini_count_this_minute = 0
-    current_minute = None
-    
     async def process_with_rate_limiting(file: UploadFile, index: int):
         """Process a file with rate limiting control."""
-        nonlocal gemini_count_this_minute, current_minute
-        
         async with semaphore:
-            # Check Gemini availability with lock to ensure thread safety
-            async with gemini_lock:
-                # Check current minute
-                now = datetime.now(timezone.utc)
-                minute_str = now.strftime("%Y-%m-%d %H:%M")
-                
-                # If minute changed, reset counter
-                if current_minute != minute_str:
-                    current_minute = minute_str
-                    gemini_count_this_minute = 0
-                    logger.debug(f"New minute: {minute_str}, reset Gemini counter")
-                
-                # Check Gemini availability before processing
-                gemini_available, gemini_reason = await check_gemini_available()
-                
-                if not gemini_available:
-                    # Rate limit reached, wait for next minute
-                    logger.info(f"Gemini rate limit reached, waiting for next minute")
-                    await _wait_for_next_minute()
-                    # Reset counter after waiting
-                    current_minute = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
-                    gemini_count_this_minute = 0
-                    # Re-check availability after waiting
-                    gemini_available, _ = await check_gemini_available()
-                    if not gemini_available:
-                        logger.warning(f"Gemini still unavailable after waiting, will use GPT-4o-mini")
+            # Take a Gemini slot before processing (waits for the next minute if this one is full)
+            try:
+                await acquire_gemini_slot()
+            except (RuntimeError, TimeoutError) as e:
+                logger.warning("Gemini still unavailable after waiting: %s", e)
             
-            # Process the file (outside lock to avoid blocking)
             await _process_single_receipt(file, results, index)
-            
-            # Track if Gemini was used (check result)
-            async with gemini_lock:
-                if results[index] and results[index].get("llm_provider") == "gemini":
-                    gemini_count_this_minute += 1
-                    logger.debug(f"Gemini used for {file.filename}, count this minute: {gemini_count_this_minute}/15")
     
     # Create tasks for all files
     tasks = [
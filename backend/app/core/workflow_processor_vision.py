@@ -41,6 +41,8 @@ from ..services.database.supabase_client import (
     check_duplicate_by_hash,
     check_user_locked,
     create_receipt,
+    enqueue_processing_run,
+    fire_and_forget,
     get_store_chain,
     get_test_user_id,
     get_user_class,
@@ -433,7 +435,7 @@ async def _run_vision_escalation_gemini_only(
         return result
     except Exception as exc:
         logger.error(f"[escalation] Gemini failed: {exc}")
-        save_processing_run(
+        enqueue_processing_run(
             receipt_id=db_receipt_id,
             stage="vision_escalation",
             model_provider="gemini",
@@ -713,7 +715,8 @@ async def process_receipt_workflow_vision(
         logger.error(f"[vision] Primary call failed for {receipt_id}: {exc}")
 
         if db_receipt_id:
-            save_processing_run(
+            # Failed-run telemetry is never read back in this request: batch it
+            enqueue_processing_run(
                 receipt_id=db_receipt_id,
                 stage="vision_primary",
                 model_provider="gemini",
@@ -738,7 +741,9 @@ async def process_receipt_workflow_vision(
         if not like_receipt:
             if db_receipt_id:
                 try:
-                    update_receipt_status(
+                    # Terminal status: nothing reads it before we return, so don't wait on the round-trip
+                    fire_and_forget(
+                        update_receipt_status,
                         db_receipt_id,
                         current_status="failed",
                         current_stage="vision_primary",
@@ -746,7 +751,7 @@ async def process_receipt_workflow_vision(
                     )
                     image_path = _save_image_for_manual_review(receipt_id, image_bytes, filename)
                     if image_path:
-                        update_receipt_file_url(db_receipt_id, image_path)
+                        fire_and_forget(update_receipt_file_url, db_receipt_id, image_path)
                 except Exception as e:
                     logger.error(
                         f"Failed to update status or save image for failed receipt {db_receipt_id}: {e}",
@@ -765,7 +770,8 @@ async def process_receipt_workflow_vision(
         # Vision model failed on what might be a valid receipt → return error
         if db_receipt_id:
             try:
-                update_receipt_status(
+                fire_and_forget(
+                    update_receipt_status,
                     db_receipt_id,
                     current_status="failed",
                     current_stage="vision_primary",
@@ -773,7 +779,7 @@ async def process_receipt_workflow_vision(
                 )
                 image_path = _save_image_for_manual_review(receipt_id, image_bytes, filename)
                 if image_path:
-                    update_receipt_file_url(db_receipt_id, image_path)
+                    fire_and_forget(update_receipt_file_url, db_receipt_id, image_path)
             except Exception as e:
                 logger.error(
                     f"Failed to update status or save image for failed receipt {db_receipt_id}: {e}",
@@ -868,7 +874,7 @@ async def process_receipt_workflow_vision(
                     try:
                         image_path = _save_image_for_manual_review(receipt_id, image_bytes, filename)
                         if image_path:
-                            update_receipt_file_url(db_receipt_id, image_path)
+                            fire_and_forget(update_receipt_file_url, db_receipt_id, image_path)
                     except Exception:
                         pass
                 update_receipt_status(
@@ -929,7 +935,7 @@ async def process_receipt_workflow_vision(
         try:
             image_path = _save_image_for_manual_review(receipt_id, image_bytes, filename)
             if image_path:
-                update_receipt_file_url(db_receipt_id, image_path)
+                fire_and_forget(update_receipt_file_url, db_receipt_id, image_path)
         except Exception:
             pass
         # 先写入 primary 结果到 record_summaries/record_items，避免前端在 escalation 期间显示 Unknown store / No items
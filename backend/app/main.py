@@ -21,7 +21,7 @@ curl -X POST "http://127.0.0.1:8000/api/receipts/ocr" \
   -F "file=@/path/to/receipt.jpg"
 """
 from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Security, Body
-from fastapi.responses import FileResponse, HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -50,7 +50,7 @@ from .services.categorization.receipt_categorizer import (
     smart_categorize_receipt_items,
 )
 from .models import ReceiptOCRResponse
-from .services.ocr.documentai_client import parse_receipt_documentai
+from .services.ocr.documentai_client import parse_receipt_documentai_async
 from .services.ocr.textract_client import parse_receipt_textract
 from .services.llm.receipt_llm_processor import process_receipt_with_llm_from_ocr
 from .core.workflow_processor_vision import process_receipt_workflow_vision
@@ -73,21 +73,18 @@ def _run_vision_workflow_in_thread(
     """
     Run vision receipt workflow in a dedicated event loop inside a thread.
     Avoids blocking the main FastAPI event loop during processing.
-    """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(
-            process_receipt_workflow_vision(
-                image_bytes=image_bytes,
-                filename=filename,
-                mime_type=mime_type,
-                user_id=user_id,
-                existing_receipt_id=existing_receipt_id,
-            )
+    asyncio.run cancels and awaits leftover tasks (e.g. an idle Gemini batcher) before
+    closing the loop, so none are destroyed while still pending.
+    """
+    return asyncio.run(
+        process_receipt_workflow_vision(
+            image_bytes=image_bytes,
+            filename=filename,
+            mime_type=mime_type,
+            user_id=user_id,
+            existing_receipt_id=existing_receipt_id,
         )
-    finally:
-        loop.close()
+    )
 
 
 def _run_vision_pre_check_sync(
@@ -110,6 +107,7 @@ def _run_vision_pre_check_sync(
         check_duplicate_by_hash,
         check_user_locked,
         create_receipt,
+        fire_and_forget,
         get_user_class,
         update_receipt_file_url,
     )
@@ -177,10 +175,7 @@ def _run_vision_pre_check_sync(
     # Save image immediately so it persists even if background task fails
     image_path = _save_image_for_manual_review(receipt_id, image_bytes, filename)
     if image_path:
-        try:
-            update_receipt_file_url(db_receipt_id, image_path)
-        except Exception as exc:
-            logger.error(f"[vision-async] Failed to update receipt file URL for {db_receipt_id}: {exc}", exc_info=True)
+        fire_and_forget(update_receipt_file_url, db_receipt_id, image_path)
 
     return {
         "early_return": False,
@@ -231,6 +226,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,  # 使用下方自定义 /docs，以支持 ngrok 下用 ngrok-skip-browser-warning 拉取 openapi.json
     redoc_url=None,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure Swagger UI to show Authorize button
@@ -979,7 +975,7 @@ async def parse_receipt_with_documentai(file: UploadFile = File(...)):
         mime_type = "image/jpeg" if file.content_type in ("image/jpeg", "image/jpg") else "image/png"
         
         # Parse using Document AI
-        parsed_data = parse_receipt_documentai(contents, mime_type=mime_type)
+        parsed_data = await parse_receipt_documentai_async(contents, mime_type=mime_type)
         logger.info(f"Document AI parsing completed for file: {file.filename}")
         
         return {
@@ -1571,7 +1567,7 @@ async def coordinate_sum_check_endpoint(
         
         # Call Document AI
         logger.info(f"Processing receipt for coordinate sum check: {file.filename}")
-        docai_result = parse_receipt_documentai(contents, mime_type=mime_type)
+        docai_result = await parse_receipt_documentai_async(contents, mime_type=mime_type)
         
         # Extract coordinate data
         coordinate_data = docai_result.get("coordinate_data", {})
@@ -1702,7 +1698,7 @@ async def receipt_body_detector_endpoint(file: UploadFile = File(..., descriptio
         raise HTTPException(status_code=400, detail="Empty file.")
     mime_type = file.content_type or "image/jpeg"
     try:
-        docai_result = parse_receipt_documentai(contents, mime_type=mime_type)
+        docai_result = await parse_receipt_documentai_async(contents, mime_type=mime_type)
         coordinate_data = docai_result.get("coordinate_data", {})
         if not coordinate_data:
             raise HTTPException(
@@ -2382,8 +2378,7 @@ async def initial_parse(file: UploadFile = File(...)):
         mime_type = file.content_type or "image/jpeg"
         
         # Call Document AI to get coordinate data
-        from .services.ocr.documentai_client import parse_receipt_documentai
-        docai_result = parse_receipt_documentai(contents, mime_type)
+        docai_result = await parse_receipt_documentai_async(contents, mime_type)
         
         # Extract coordinate_data (same as old endpoint: text_blocks live under coordinate_data)
         coordinate_data = docai_result.get("coordinate_data", {})
@@ -14,6 +14,7 @@ from google.genai import types
 
 from ...config import settings
 from ...services.llm.gemini_client import _get_client as _get_gemini_client
+from ...services.llm.llm_common import extract_json
 
 logger = logging.getLogger(__name__)
 
@@ -107,13 +108,13 @@ async def ground_address_with_search(
     )
 
     try:
-        client = await _get_gemini_client()
+        client = _get_gemini_client()
         config = types.GenerateContentConfig(
             temperature=0,
             tools=[types.Tool(google_search=types.GoogleSearch())],
         )
 
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model=settings.gemini_model,
             contents=prompt,
             config=config,
@@ -123,12 +124,8 @@ async def ground_address_with_search(
             logger.warning("[grounding] Empty response from Gemini grounding")
             return llm_result
 
-        raw_text = response.text.strip()
         # Strip markdown code fences if present
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("\n", 1)[1] if "\n" in raw_text else raw_text[3:]
-            if raw_text.endswith("```"):
-                raw_text = raw_text[:-3].strip()
+        raw_text = extract_json(response.text)
         result = json.loads(raw_text)
         confidence = result.get("confidence", "low")
         verified = result.get("verified", False)
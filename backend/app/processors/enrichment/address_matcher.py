@@ -11,7 +11,6 @@ import logging
 import re
 from typing import Dict, Any, Optional, Tuple, List
 from rapidfuzz import fuzz, process
-from ...services.database.supabase_client import _get_client
 from ...config import settings
 
 logger = logging.getLogger(__name__)
@@ -88,6 +87,8 @@ def _populate_store_cache():
 
     if _cache_populated:
         return
+    # Local import: supabase_client imports this module at top level (runs once, result is cached)
+    from ...services.database.supabase_client import _get_client
     try:
         supabase = _get_client()
         locations_response = supabase.table("store_locations").select("*").eq("is_active", True).execute()
@@ -596,6 +597,63 @@ def parse_full_address_to_components(full_address: Optional[str]) -> Dict[str, s
     return out
 
 
+# store_candidates.metadata packing: (key in parse_full_address_to_components output, receipt/metadata aliases)
+_ADDRESS_KEY_GROUPS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("address1", ("address_line1", "address1")),
+    ("address2", ("address_line2", "address2")),
+    ("city", ("city",)),
+    ("state", ("state",)),
+    ("country", ("country",)),
+    ("zipcode", ("zip_code", "zipcode")),
+)
+# (receipt key, metadata key)
+_METADATA_SCALAR_KEYS: Tuple[Tuple[str, str], ...] = (
+    ("merchant_phone", "phone"),
+    ("currency", "currency"),
+    ("purchase_date", "purchase_date"),
+    ("purchase_time", "purchase_time"),
+)
+
+
+def build_store_candidate_metadata(receipt: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build store_candidates.metadata from an LLM receipt dict (address, phone, currency, date/time).
+    Computed once in the LLM stage and persisted to output_payload["_metadata"], so
+    create_store_candidate only writes the pre-built dict and does no address parsing.
+    Address always carries address1, address2, city, state, zip when derivable (for frontend store-review form).
+    """
+    metadata: Dict[str, Any] = {}
+    if not receipt:
+        return metadata
+
+    full_addr = receipt.get("merchant_address") or ""
+    address_info: Dict[str, Any] = {"full_address": full_addr} if full_addr else {}
+
+    # Prefer structured fields from receipt (prompt output); first non-empty alias wins, all aliases are written
+    for _parsed_key, aliases in _ADDRESS_KEY_GROUPS:
+        value = next((receipt[k] for k in aliases if receipt.get(k)), None)
+        if value:
+            address_info.update(dict.fromkeys(aliases, value))
+
+    # When structured fields are missing, parse full_address into address1, address2, city, state, zip
+    if full_addr and (not address_info.get("address1") or not address_info.get("city")):
+        try:
+            parsed = parse_full_address_to_components(full_addr)
+            for parsed_key, aliases in _ADDRESS_KEY_GROUPS:
+                if parsed.get(parsed_key):
+                    for k in aliases:
+                        address_info.setdefault(k, parsed[parsed_key])
+        except Exception as e:
+            logger.warning("Parse full_address for store_candidate metadata: %s", e)
+
+    if address_info:
+        metadata["address"] = address_info
+
+    # Contact, currency, purchase date/time (for reference)
+    metadata.update({target: receipt[src] for src, target in _METADATA_SCALAR_KEYS if receipt.get(src)})
+    return metadata
+
+
 def extract_address_components_from_string(address_str: Optional[str]) -> Dict[str, str]:
     """
     Parse address string into components (fallback when no canonical match).
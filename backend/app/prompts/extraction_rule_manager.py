@@ -3,6 +3,7 @@ Extraction Rule Manager: Manage merchant-specific price extraction rules.
 
 Uses default rules. Future: can load extraction rules from prompt_library (content_role='extraction_rule').
 """
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 import logging
 import re
@@ -10,6 +11,14 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# Every price pattern captures a number, so a line without a digit can't yield a price
+_HAS_DIGIT_RE = re.compile(r'\d')
+# Non-empty lines of raw_text, found without materializing split('\n')
+_LINE_RE = re.compile(r'[^\n]+')
+_HAS_LETTER_RE = re.compile(r'[A-Za-z]')
+# A skip pattern that is just ^ + literal text (escaped punctuation allowed), e.g. ^TOTAL, ^www\.
+_LITERAL_PREFIX_RE = re.compile(r'\^((?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+)')
+
 
 def get_merchant_extraction_rules(
     merchant_name: Optional[str] = None,
@@ -38,9 +47,12 @@ def get_merchant_extraction_rules(
     return get_default_extraction_rules()
 
 
+@lru_cache(maxsize=1)
 def get_default_extraction_rules() -> Dict[str, Any]:
     """
     Return default extraction rules (generic rules).
+
+    Built once and shared between calls; treat the result as read-only.
     """
     return {
         "price_patterns": [
@@ -101,6 +113,71 @@ def get_default_extraction_rules() -> Dict[str, Any]:
     }
 
 
+class _CompiledRules:
+    """An extraction-rules dict with its regexes compiled and price patterns pre-sorted."""
+
+    __slots__ = ("rules", "fp_re", "min_fp_count", "skip_re", "skip_prefixes", "skip_rest_re", "price_res")
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.rules = rules
+        special_rules = rules.get("special_rules", {})
+        price_patterns = rules.get("price_patterns", [])
+        skip_patterns = rules.get("skip_patterns", [])
+
+        # Special rule: global FP matching (T&T, etc.); FP price pattern is usually the first one
+        self.fp_re: Optional[re.Pattern] = None
+        self.min_fp_count = special_rules.get("min_fp_count", 3)
+        if special_rules.get("use_global_fp_match", False):
+            for pattern_config in price_patterns:
+                if "FP" in pattern_config.get("pattern", ""):
+                    self.fp_re = re.compile(pattern_config["pattern"], _regex_flags(pattern_config))
+                    break
+
+        # All skip patterns in one alternation: one match attempt per line instead of one per pattern
+        self.skip_re: Optional[re.Pattern] = (
+            re.compile("|".join(f"(?:{p})" for p in skip_patterns), re.IGNORECASE)
+            if skip_patterns else None
+        )
+        # Fast path for ASCII lines: plain ^literal patterns become a lower-cased startswith()
+        # tuple, only the real regexes (dates, ***, ...) stay in skip_rest_re
+        prefixes = []
+        rest = []
+        for p in skip_patterns:
+            m = _LITERAL_PREFIX_RE.fullmatch(p)
+            if m:
+                prefixes.append(re.sub(r'\\(.)', r'\1', m.group(1)).lower())
+            else:
+                rest.append(p)
+        self.skip_prefixes = tuple(dict.fromkeys(prefixes))
+        self.skip_rest_re: Optional[re.Pattern] = (
+            re.compile("|".join(f"(?:{p})" for p in rest), re.IGNORECASE) if rest else None
+        )
+        self.price_res = [
+            (re.compile(pattern_config["pattern"], _regex_flags(pattern_config)),
+             pattern_config.get("requires_context", False))
+            for pattern_config in sorted(price_patterns, key=lambda x: x.get("priority", 999))
+        ]
+
+
+def _regex_flags(pattern_config: Dict[str, Any]) -> int:
+    return re.IGNORECASE if "IGNORECASE" in pattern_config.get("flags", "") else 0
+
+
+# id(rules) -> compiled form; rules dicts are long-lived (get_default_extraction_rules is cached)
+_compiled_rules_cache: Dict[int, _CompiledRules] = {}
+
+
+def _compile_rules(rules: Dict[str, Any]) -> _CompiledRules:
+    compiled = _compiled_rules_cache.get(id(rules))
+    if compiled is not None and compiled.rules is rules:
+        return compiled
+    compiled = _CompiledRules(rules)
+    if len(_compiled_rules_cache) >= 32:
+        _compiled_rules_cache.clear()
+    _compiled_rules_cache[id(rules)] = compiled
+    return compiled
+
+
 def apply_extraction_rules(
     raw_text: str,
     rules: Dict[str, Any]
@@ -110,70 +187,54 @@ def apply_extraction_rules(
     
     Args:
         raw_text: Original receipt text
-        rules: Extraction rules dictionary
+        rules: Extraction rules dictionary (treated as read-only; its compiled form is cached)
         
     Returns:
         List of extracted prices
     """
-    special_rules = rules.get("special_rules", {})
-    price_patterns = rules.get("price_patterns", [])
-    skip_patterns = rules.get("skip_patterns", [])
+    compiled = _compile_rules(rules)
     
     # Special rule: global FP matching (T&T, etc.)
-    if special_rules.get("use_global_fp_match", False):
-        min_fp_count = special_rules.get("min_fp_count", 3)
-        
-        # Find FP price pattern (usually the first pattern)
-        fp_pattern = None
-        for pattern_config in price_patterns:
-            if "FP" in pattern_config.get("pattern", ""):
-                fp_pattern = pattern_config["pattern"]
-                flags = pattern_config.get("flags", "")
-                break
-        
-        if fp_pattern:
-            regex_flags = re.IGNORECASE if "IGNORECASE" in flags else 0
-            fp_matches = list(re.finditer(fp_pattern, raw_text, regex_flags))
-            fp_prices = [float(m.group(1)) for m in fp_matches]
-            
-            if len(fp_prices) >= min_fp_count:
-                logger.info(f"Using global FP match: found {len(fp_prices)} prices")
-                return fp_prices
+    if compiled.fp_re is not None:
+        if compiled.fp_re.groups == 1:
+            # findall returns the captured strings directly, no Match objects
+            fp_prices = [float(price) for price in compiled.fp_re.findall(raw_text)]
+        else:
+            fp_prices = [float(m.group(1)) for m in compiled.fp_re.finditer(raw_text)]
+        if len(fp_prices) >= compiled.min_fp_count:
+            logger.info(f"Using global FP match: found {len(fp_prices)} prices")
+            return fp_prices
     
     # Otherwise, analyze line by line
-    lines = raw_text.split('\n')
     prices = []
+    skip_re = compiled.skip_re
+    skip_prefixes = compiled.skip_prefixes
+    skip_rest_re = compiled.skip_rest_re
     
-    for line in lines:
-        line = line.strip()
-        if not line:
+    for line_match in _LINE_RE.finditer(raw_text):
+        line = line_match.group(0).strip()
+        if not line or not _HAS_DIGIT_RE.search(line):
             continue
         
-        # Check if should skip
-        should_skip = False
-        for skip_pattern in skip_patterns:
-            if re.match(skip_pattern, line, re.IGNORECASE):
-                should_skip = True
-                break
-        
-        if should_skip:
-            continue
+        # Check if should skip (lower() agrees with IGNORECASE only on ASCII text)
+        if skip_re is not None:
+            if line.isascii():
+                if line.lower().startswith(skip_prefixes) or (
+                    skip_rest_re is not None and skip_rest_re.match(line)
+                ):
+                    continue
+            elif skip_re.match(line):
+                continue
         
         # Try to match price patterns by priority
         line_price = None
-        for pattern_config in sorted(price_patterns, key=lambda x: x.get("priority", 999)):
-            pattern = pattern_config["pattern"]
-            flags = pattern_config.get("flags", "")
-            requires_context = pattern_config.get("requires_context", False)
-            
-            regex_flags = re.IGNORECASE if "IGNORECASE" in flags else 0
-            
+        for price_re, requires_context in compiled.price_res:
             if requires_context:
                 # Requires context judgment (e.g., contains letters)
-                if not re.search(r'[A-Za-z]', line):
+                if not _HAS_LETTER_RE.search(line):
                     continue
             
-            matches = list(re.finditer(pattern, line, regex_flags))
+            matches = list(price_re.finditer(line))
             if matches:
                 # If multiple matches, take the last one (usually line total)
                 line_price = float(matches[-1].group(1))
@@ -9,10 +9,12 @@ from datetime import datetime, timezone
 from pathlib import Path
 from supabase import create_client, Client
 from ..config import settings
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
 import logging
 import json
 from .prompt_loader import load_prompts_for_receipt_parse
+from ..services.llm.llm_common import dumps_pretty
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +24,20 @@ logger = logging.getLogger(__name__)
 _TEMPLATES_DIR = Path(__file__).parent / "templates"
 
 
+# filename -> stripped content; template files only change on deploy (or clear_cache())
+_template_cache: Dict[str, str] = {}
+
+
 def _load_template(filename: str) -> Optional[str]:
-    """Load a prompt template file. Returns None if file missing."""
+    """Load a prompt template file (cached after the first read). Returns None if file missing."""
+    content = _template_cache.get(filename)
+    if content is not None:
+        return content
     path = _TEMPLATES_DIR / filename
     if path.exists():
-        return path.read_text(encoding="utf-8").strip()
+        content = path.read_text(encoding="utf-8").strip()
+        _template_cache[filename] = content
+        return content
     logger.warning("[PromptManager] Template file not found: %s", path)
     return None
 
@@ -83,15 +94,20 @@ def get_default_prompt() -> Dict[str, Any]:
     """
     Return default prompt template.
     
-    Used when no merchant-specific prompt is found.
+    Used when no merchant-specific prompt is found. Built once per process (until
+    clear_cache()); callers get a shallow copy and must not mutate output_schema.
     """
-    return {
-        "prompt_template": _get_default_prompt_template(),
-        "system_message": _get_default_system_message(),
-        "model_name": settings.gemini_model,
-        "temperature": 0.0,
-        "output_schema": _get_default_output_schema(),
-    }
+    cached = _prompt_cache.get("default")
+    if cached is None:
+        cached = {
+            "prompt_template": _get_default_prompt_template(),
+            "system_message": _get_default_system_message(),
+            "model_name": settings.gemini_model,
+            "temperature": 0.0,
+            "output_schema": _get_default_output_schema(),
+        }
+        _prompt_cache["default"] = cached
+    return dict(cached)
 
 
 def _get_default_system_message() -> str:
@@ -124,6 +140,46 @@ def _get_default_output_schema() -> Dict[str, Any]:
     )
 
 
+@lru_cache(maxsize=128)
+def _join_system_parts(parts: Tuple[str, ...]) -> str:
+    """System message from library parts, with the (currently unused) rule placeholders blanked."""
+    filled_parts = []
+    for part in parts:
+        filled = part.replace("{store_specific_region_rules}", "").replace(
+            "{location_specific_rules}", ""
+        ).replace("{additional_rules}", "")
+        filled_parts.append(filled)
+    return "\n\n".join(filled_parts)
+
+
+@lru_cache(maxsize=32)
+def _library_schema_text(schema_str: str) -> Optional[str]:
+    """Re-indented schema text for a prompt_library schema entry; None if it isn't valid JSON."""
+    try:
+        schema = json.loads(schema_str)
+    except Exception:
+        return None
+    return schema if isinstance(schema, str) else dumps_pretty(schema)
+
+
+# id(schema) -> (schema, rendered text); only the cached default config's schema lands here
+_schema_text_cache: Dict[int, Tuple[Any, str]] = {}
+
+
+def _schema_text(output_schema: Any) -> str:
+    """Rendered output schema for the user message, reused while the same schema object is passed."""
+    if isinstance(output_schema, str):
+        return output_schema
+    hit = _schema_text_cache.get(id(output_schema))
+    if hit is not None and hit[0] is output_schema:
+        return hit[1]
+    text = dumps_pretty(output_schema)
+    if len(_schema_text_cache) >= 32:
+        _schema_text_cache.clear()
+    _schema_text_cache[id(output_schema)] = (output_schema, text)
+    return text
+
+
 def format_prompt(
     raw_text: str,
     trusted_hints: Dict[str, Any],
@@ -174,14 +230,7 @@ def format_prompt(
     
     # Build system message from loaded parts (or fallback to default)
     if loaded["system_parts"]:
-        # Fill placeholders in system parts: store_specific_region_rules, location_specific_rules, additional_rules
-        filled_parts = []
-        for part in loaded["system_parts"]:
-            filled = part.replace("{store_specific_region_rules}", "").replace(
-                "{location_specific_rules}", ""
-            ).replace("{additional_rules}", "")
-            filled_parts.append(filled)
-        system_message = "\n\n".join(filled_parts)
+        system_message = _join_system_parts(tuple(loaded["system_parts"]))
         rag_metadata["library_parts_loaded"] = len(loaded["system_parts"])
     else:
         system_message = prompt_config.get("system_message") or _get_default_system_message()
@@ -190,26 +239,17 @@ def format_prompt(
     prompt_template = loaded.get("user_template") or prompt_config.get("prompt_template") or _get_default_prompt_template()
     rag_metadata["user_template_from_library"] = loaded.get("user_template") is not None
     
-    # Schema: use library or fallback
-    output_schema = prompt_config.get("output_schema")
+    # Schema: use library or fallback (rendered text is cached, see _library_schema_text / _schema_text)
+    output_schema_str = None
     schema_str = loaded.get("schema")
     if schema_str:
-        try:
-            output_schema = json.loads(schema_str)
-        except Exception:
-            output_schema = output_schema or _get_default_output_schema()
+        output_schema_str = _library_schema_text(schema_str)
         rag_metadata["schema_from_library"] = True
-    else:
-        output_schema = output_schema or _get_default_output_schema()
+    if output_schema_str is None:
+        output_schema_str = _schema_text(prompt_config.get("output_schema") or _get_default_output_schema())
     
     # Format trusted_hints
-    trusted_hints_str = json.dumps(trusted_hints, indent=2, ensure_ascii=False)
-    
-    # Format output_schema for user message
-    if isinstance(output_schema, str):
-        output_schema_str = output_schema
-    else:
-        output_schema_str = json.dumps(output_schema, indent=2, ensure_ascii=False)
+    trusted_hints_str = dumps_pretty(trusted_hints)
 
     # Costco USA only: first subtotal/total and CC Rewards instructions (do not apply to other chains)
     costco_usa_totals_instructions = ""
@@ -240,7 +280,7 @@ def format_prompt(
 We have already run a rule-based parser on the OCR data. Please use this as a reference along with the raw OCR text to generate the final structured JSON. This initial parse helps reduce hallucination.
 
 ```json
-{json.dumps(initial_parse_summary, indent=2, ensure_ascii=False)}
+{dumps_pretty(initial_parse_summary)}
 ```
 
 **IMPORTANT**: The initial parse result above is from our rule-based system. It may not be 100% accurate due to OCR errors, but it provides a good starting point. Please:
@@ -274,6 +314,10 @@ def clear_cache():
     """Clear prompt cache (for testing or after updating prompts)."""
     global _prompt_cache
     _prompt_cache.clear()
+    _template_cache.clear()
+    _schema_text_cache.clear()
+    _join_system_parts.cache_clear()
+    _library_schema_text.cache_clear()
     from .prompt_loader import clear_cache as clear_loader_cache
     clear_loader_cache()
     logger.info("Prompt cache cleared")
@@ -23,6 +23,7 @@ from app.services.database.supabase_client import (
     update_receipt_status,
     enqueue_unmatched_items_to_classification_review,
 )
+from app.processors.enrichment.address_matcher import build_store_candidate_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -496,7 +497,7 @@ def submit_manual_correction(
                     chain_name=store_name,
                     receipt_id=receipt_id,
                     source="llm",
-                    llm_result={"receipt": receipt_data},
+                    metadata=build_store_candidate_metadata(receipt_data),
                     suggested_chain_id=match_result.get("suggested_chain_id") or chain_id,
                     suggested_location_id=match_result.get("suggested_location_id") or location_id,
                     confidence_score=match_result.get("confidence_score"),
@@ -11,6 +11,7 @@ from app.services.database.supabase_client import (
     _get_client,
     backfill_record_summaries_for_store_chain,
     backfill_record_summaries_for_store_location,
+    clear_store_chain_cache,
 )
 
 logger = logging.getLogger(__name__)
@@ -258,6 +259,8 @@ def approve_store_candidate(
     if not approved_by:
         update_payload.pop("reviewed_by", None)
     supabase.table("store_candidates").update(update_payload).eq("id", candidate_id).execute()
+    # New chain/location must be visible to get_store_chain for the next receipts
+    clear_store_chain_cache()
 
     # Backfill record_summaries: (1) set store_chain_id where store_name matches and chain_id was null
     try:
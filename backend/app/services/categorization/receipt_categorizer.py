@@ -32,6 +32,7 @@ from ..database.supabase_client import (
     create_store_candidate,
 )
 from ..standardization.product_normalizer import normalize_name_for_storage
+from ...processors.enrichment.address_matcher import build_store_candidate_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -1307,7 +1308,8 @@ def categorize_receipt(receipt_id: str, force: bool = False) -> Dict[str, Any]:
                     chain_name=merchant_name,
                     receipt_id=receipt_id,
                     source="llm",
-                    llm_result={"receipt": receipt_data},
+                    metadata=(output_payload.get("_metadata") or {}).get("store_candidate_metadata")
+                    or build_store_candidate_metadata(receipt_data),
                     suggested_chain_id=match_result.get("suggested_chain_id") or effective_chain_id,
                     suggested_location_id=match_result.get("suggested_location_id"),
                     confidence_score=match_result.get("confidence_score"),
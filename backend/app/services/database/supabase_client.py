@@ -4,20 +4,29 @@ Supabase client for storing receipt OCR data and parsed receipts.
 Note: The database schema is defined in database/001_schema_v2.sql
 """
 from supabase import create_client, Client
+from postgrest.types import ReturnMethod
 from ...config import settings
 from typing import Any, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from decimal import Decimal
-from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import date, datetime
+from functools import lru_cache
+import atexit
 import logging
 import json
+import math
+import queue
 import re
+import threading
+import time
+import uuid
 
 from rapidfuzz import fuzz
 
 from ...utils.llm_metadata import llm_metadata_reasoning_text, llm_result_metadata
 from ..standardization.product_normalizer import normalize_name_for_storage
 from ...processors.enrichment.payment_types import normalize_payment_type
+from ...processors.enrichment.address_matcher import match_store, clear_cache as clear_address_matcher_cache
 
 logger = logging.getLogger(__name__)
 
@@ -191,7 +200,7 @@ def get_store_chains_with_receipt_counts(active_only: bool = True) -> List[Dict[
             if name:
                 unlinked_by_name[name] = unlinked_by_name.get(name, 0) + 1
     except Exception as e:
-        logger.warning(f"Failed to count unlinked receipts by store_name: {e}")
+        logger.warning("Failed to count unlinked receipts by store_name: %s", e)
 
     def _store_name_matches_chain(store_name_lower: str, norm: str, name_lower: str) -> bool:
         if not store_name_lower:
@@ -240,7 +249,7 @@ def get_store_chains_with_receipt_counts(active_only: bool = True) -> List[Dict[
             else:
                 linked = int(linked) if linked is not None else 0
         except Exception as e:
-            logger.warning(f"Failed to count receipts for store_chain {cid}: {e}")
+            logger.warning("Failed to count receipts for store_chain %s: %s", cid, e)
             linked = 0
         unlinked = chain_unlinked.get(str(cid), 0)
         total = linked + unlinked
@@ -399,7 +408,7 @@ def get_location_stats() -> List[Dict[str, Any]]:
             key = (country, code)
             receipt_agg[key] = receipt_agg.get(key, 0) + 1
     except Exception as e:
-        logger.warning(f"Failed to get receipt location stats: {e}", exc_info=True)
+        logger.warning("Failed to get receipt location stats: %s", e, exc_info=True)
 
     # 2. Store counts — all confirmed store_locations directly, regardless of receipt linkage
     try:
@@ -424,7 +433,7 @@ def get_location_stats() -> List[Dict[str, Any]]:
                     store_agg[key] = set()
                 store_agg[key].add(str(loc_id))
     except Exception as e:
-        logger.warning(f"Failed to get store location stats: {e}", exc_info=True)
+        logger.warning("Failed to get store location stats: %s", e, exc_info=True)
 
     out = []
     for (c, s) in sorted(set(receipt_agg.keys()) | set(store_agg.keys())):
@@ -518,16 +527,18 @@ def check_duplicate_by_hash(
         if res.data and len(res.data) > 0:
             existing_receipt = res.data[0]
             logger.info(
-                f"Duplicate receipt found: file_hash={file_hash[:16]}..., "
-                f"existing_receipt_id={existing_receipt['id']}, "
-                f"uploaded_at={existing_receipt.get('uploaded_at')}, "
-                f"status={existing_receipt.get('current_status')}"
+                "Duplicate receipt found: file_hash=%s..., existing_receipt_id=%s, uploaded_at=%s, "
+                "status=%s",
+                file_hash[:16],
+                existing_receipt['id'],
+                existing_receipt.get('uploaded_at'),
+                existing_receipt.get('current_status'),
             )
             return existing_receipt["id"]
         
         return None
     except Exception as e:
-        logger.warning(f"Failed to check duplicate by hash: {e}")
+        logger.warning("Failed to check duplicate by hash: %s", e)
         # Don't raise - allow processing to continue if check fails
         return None
 
@@ -564,25 +575,27 @@ def create_receipt(
         "pipeline_version": pipeline_version,
     }
     
-    logger.info(f"[DEBUG] Attempting to insert receipt with payload: {payload}")
+    logger.debug("Attempting to insert receipt with payload: %s", payload)
     
     try:
         res = supabase.table("receipt_status").insert(payload).execute()
         if not res.data:
             raise ValueError("Failed to create receipt, no data returned")
         receipt_id = res.data[0]["id"]
-        logger.info(f"Created receipt record: {receipt_id}")
+        logger.info("Created receipt record: %s", receipt_id)
         return receipt_id
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"[DEBUG] Insert failed with error: {type(e).__name__}")
-        logger.error(f"[DEBUG] Error message: {error_msg}")
-        logger.error(f"[DEBUG] Payload was: {payload}")
+        logger.error("Insert into receipt_status failed: %s: %s", type(e).__name__, error_msg)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("receipt_status payload=%s", payload)
         # Check if it's a unique constraint violation (duplicate file_hash)
         if "unique" in error_msg.lower() or "duplicate" in error_msg.lower():
             logger.warning(
-                f"Duplicate receipt detected (unique constraint): file_hash={file_hash[:16] if file_hash else 'None'}..., "
-                f"user_id={user_id}. This receipt has already been uploaded."
+                "Duplicate receipt detected (unique constraint): file_hash=%s..., user_id=%s. This receipt "
+                "has already been uploaded.",
+                file_hash[:16] if file_hash else 'None',
+                user_id,
             )
             # Try to find the existing receipt
             if file_hash:
@@ -591,18 +604,61 @@ def create_receipt(
                     raise ValueError(f"Duplicate receipt: This file has already been uploaded (receipt_id={existing_id})")
         
         logger.error(
-            f"Failed to create receipt: {type(e).__name__}: {error_msg}. "
-            f"user_id={user_id}. "
-            "Common causes: "
-            "1. user_id does not exist in users table (foreign key constraint violation), "
-            "2. user_id is not a valid UUID format, "
-            "3. Duplicate file_hash (same file uploaded twice), "
-            "4. Database connection or permission issue."
+            "Failed to create receipt: %s: %s. user_id=%s. Common causes: 1. user_id does not exist in "
+            "users table (foreign key constraint violation), 2. user_id is not a valid UUID format, 3. "
+            "Duplicate file_hash (same file uploaded twice), 4. Database connection or permission "
+            "issue.",
+            type(e).__name__,
+            error_msg,
+            user_id,
         )
         raise
 
 
-def save_processing_run(
+def _to_jsonb(value: Any) -> Any:
+    """
+    Make a JSONB payload (OCR/LLM output) safe for postgrest's stdlib json encoder: Decimal,
+    numpy, datetime/UUID, set/tuple values are converted and NaN/Infinity (rejected by Postgres)
+    become null. Containers are only copied along the path to a value that needed converting;
+    an already-clean payload is returned as is, so it is serialized once, by postgrest.
+    """
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        out = None
+        for k, v in value.items():
+            converted = _to_jsonb(v)
+            if converted is not v:
+                if out is None:
+                    out = dict(value)
+                out[k] = converted
+        return value if out is None else out
+    if isinstance(value, list):
+        out = None
+        for i, v in enumerate(value):
+            converted = _to_jsonb(v)
+            if converted is not v:
+                if out is None:
+                    out = list(value)
+                out[i] = converted
+        return value if out is None else out
+    if isinstance(value, (tuple, set, frozenset)):
+        return [_to_jsonb(v) for v in value]
+    if isinstance(value, Decimal):
+        return _to_jsonb(float(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    # numpy scalars (.item()) and arrays (.tolist())
+    if hasattr(value, "tolist"):
+        return _to_jsonb(value.tolist())
+    return value
+
+
+def _build_processing_run_payload(
     receipt_id: str,
     stage: str,
     model_provider: Optional[str],
@@ -612,26 +668,9 @@ def save_processing_run(
     output_payload: Dict[str, Any],
     output_schema_version: Optional[str],
     status: str,
-    error_message: Optional[str] = None
-) -> str:
-    """
-    Save a processing run to receipt_processing_runs table.
-    
-    Args:
-        receipt_id: Receipt ID (UUID string)
-        stage: Processing stage ('ocr', 'llm', 'manual')
-        model_provider: Model provider (e.g., 'google_documentai', 'gemini', 'openai')
-        model_name: Model name (e.g., 'gpt-4o-mini', 'gemini-1.5-flash')
-        model_version: Model version (e.g., '2024-01-01')
-        input_payload: Input data (JSONB)
-        output_payload: Output data (JSONB)
-        output_schema_version: Output schema version
-        status: Processing status ('pass' or 'fail')
-        error_message: Optional error message if status is 'fail'
-        
-    Returns:
-        run_id (UUID string)
-    """
+    error_message: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Validate stage/status and build the receipt_processing_runs row (shared by save/enqueue)."""
     if stage not in (
         'ocr', 'llm', 'manual', 'rule_based_cleaning',
         'vision_primary', 'vision_store_specific', 'vision_escalation', 'shadow_legacy',
@@ -640,8 +679,6 @@ def save_processing_run(
     if status not in ('pass', 'fail'):
         raise ValueError(f"Invalid status: {status}")
     
-    supabase = _get_client()
-    
     # Extract validation_status from output_payload for LLM stage records
     validation_status = None
     if stage == "llm" and output_payload:
@@ -649,35 +686,228 @@ def save_processing_run(
         validation_status = metadata.get("validation_status")
         # Ensure validation_status is one of the valid values
         if validation_status and validation_status not in ("pass", "needs_review", "unknown"):
-            logger.warning(f"Invalid validation_status '{validation_status}', setting to 'unknown'")
+            logger.warning("Invalid validation_status '%s', setting to 'unknown'", validation_status)
             validation_status = "unknown"
     
-    payload = {
+    return {
         "receipt_id": receipt_id,
         "stage": stage,
         "model_provider": model_provider,
         "model_name": model_name,
         "model_version": model_version,
-        "input_payload": input_payload,
-        "output_payload": output_payload,
+        "input_payload": _to_jsonb(input_payload),
+        "output_payload": _to_jsonb(output_payload),
         "output_schema_version": output_schema_version,
         "status": status,
         "error_message": error_message,
         "validation_status": validation_status,  # Add validation_status field
     }
+
+
+# Set once PostgREST reports the 076_hot_insert_rpcs.sql functions missing (PGRST202);
+# inserts then go through the table API until the migration is applied and the process restarts.
+_hot_insert_rpcs_missing = False
+
+
+def _insert_returning_ids(
+    supabase: Client,
+    rpc_name: str,
+    rpc_params: Dict[str, Any],
+    table: str,
+    rows: Any,
+) -> List[Any]:
+    """
+    Insert through a 076_hot_insert_rpcs.sql function and return the new ids in row order.
+    Falls back to a plain table insert when the migration has not been applied yet.
+    """
+    global _hot_insert_rpcs_missing
+    if not _hot_insert_rpcs_missing:
+        try:
+            data = supabase.rpc(rpc_name, rpc_params).execute().data
+            if data is None:
+                return []
+            return data if isinstance(data, list) else [data]
+        except Exception as e:
+            if getattr(e, "code", None) != "PGRST202":
+                raise
+            _hot_insert_rpcs_missing = True
+            logger.warning(
+                "%s not found (apply database/076_hot_insert_rpcs.sql); falling back to table inserts",
+                rpc_name,
+            )
+    res = supabase.table(table).insert(rows).execute()
+    return [row["id"] for row in res.data or []]
+
+
+def save_processing_run(
+    receipt_id: str,
+    stage: str,
+    model_provider: Optional[str],
+    model_name: Optional[str],
+    model_version: Optional[str],
+    input_payload: Dict[str, Any],
+    output_payload: Dict[str, Any],
+    output_schema_version: Optional[str],
+    status: str,
+    error_message: Optional[str] = None
+) -> str:
+    """
+    Save a processing run to receipt_processing_runs table.
     
+    Args:
+        receipt_id: Receipt ID (UUID string)
+        stage: Processing stage ('ocr', 'llm', 'manual')
+        model_provider: Model provider (e.g., 'google_documentai', 'gemini', 'openai')
+        model_name: Model name (e.g., 'gpt-4o-mini', 'gemini-1.5-flash')
+        model_version: Model version (e.g., '2024-01-01')
+        input_payload: Input data (JSONB)
+        output_payload: Output data (JSONB)
+        output_schema_version: Output schema version
+        status: Processing status ('pass' or 'fail')
+        error_message: Optional error message if status is 'fail'
+        
+    Returns:
+        run_id (UUID string)
+    """
+    payload = _build_processing_run_payload(
+        receipt_id, stage, model_provider, model_name, model_version,
+        input_payload, output_payload, output_schema_version, status, error_message,
+    )
+    supabase = _get_client()
+
     try:
-        res = supabase.table("receipt_processing_runs").insert(payload).execute()
-        if not res.data:
+        # PL/pgSQL RPC (076_hot_insert_rpcs.sql): plan cached per connection, returns only the id
+        run_ids = _insert_returning_ids(
+            supabase, "fn_save_processing_run", {"p_run": payload}, "receipt_processing_runs", payload
+        )
+        if not run_ids:
             raise ValueError("Failed to save processing run, no data returned")
-        run_id = res.data[0]["id"]
-        logger.info(f"Saved processing run: {run_id} (stage={stage}, status={status})")
+        run_id = run_ids[0]
+        logger.info("Saved processing run: %s (stage=%s, status=%s)", run_id, stage, status)
         return run_id
     except Exception as e:
-        logger.error(f"Failed to save processing run: {e}")
+        logger.error("Failed to save processing run: %s", e)
         raise
 
 
+# Batched processing-run telemetry: enqueue_processing_run buffers rows and a daemon thread inserts them
+# in one multi-row INSERT every _RUN_FLUSH_INTERVAL_S or _RUN_FLUSH_MAX rows, whichever comes first.
+_RUN_FLUSH_INTERVAL_S = 0.5
+_RUN_FLUSH_MAX = 100
+_run_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+_run_flusher: Optional[threading.Thread] = None
+_run_flusher_lock = threading.Lock()
+
+
+def _insert_processing_runs(batch: List[Dict[str, Any]]) -> None:
+    """Insert a batch; if the INSERT fails, retry it in halves so a bad row loses only itself."""
+    if not batch:
+        return
+    try:
+        _get_client().table("receipt_processing_runs").insert(batch, returning=ReturnMethod.minimal).execute()
+        logger.debug("Flushed %s processing runs", len(batch))
+    except Exception:
+        if len(batch) > 1:
+            logger.warning("Failed to flush %s processing runs, retrying in halves", len(batch))
+            mid = len(batch) // 2
+            _insert_processing_runs(batch[:mid])
+            _insert_processing_runs(batch[mid:])
+            return
+        run = batch[0]
+        logger.error(
+            "Failed to save processing run: receipt_id=%s, stage=%s",
+            run.get("receipt_id"), run.get("stage"), exc_info=True,
+        )
+
+
+def _drain_run_queue(first: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    batch = [first] if first is not None else []
+    deadline = time.monotonic() + _RUN_FLUSH_INTERVAL_S
+    while len(batch) < _RUN_FLUSH_MAX:
+        remaining = deadline - time.monotonic()
+        if first is None or remaining <= 0:
+            # Non-blocking drain (atexit) or window elapsed: take only what is already queued
+            try:
+                batch.append(_run_queue.get_nowait())
+            except queue.Empty:
+                break
+            continue
+        try:
+            batch.append(_run_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run_flusher_loop() -> None:
+    while True:
+        first = _run_queue.get()
+        _insert_processing_runs(_drain_run_queue(first))
+
+
+def flush_processing_runs() -> None:
+    """Insert everything still queued by enqueue_processing_run (registered with atexit)."""
+    while True:
+        batch = _drain_run_queue()
+        if not batch:
+            return
+        _insert_processing_runs(batch)
+
+
+def enqueue_processing_run(
+    receipt_id: str,
+    stage: str,
+    model_provider: Optional[str],
+    model_name: Optional[str],
+    model_version: Optional[str],
+    input_payload: Dict[str, Any],
+    output_payload: Dict[str, Any],
+    output_schema_version: Optional[str],
+    status: str,
+    error_message: Optional[str] = None
+) -> str:
+    """
+    Batched variant of save_processing_run for telemetry nobody reads back immediately (e.g. failed runs).
+    run_id is a client-side UUID4, returned before the row is written. Use save_processing_run when a later
+    step reads the run (categorize_receipt reads the latest pass runs).
+    """
+    global _run_flusher
+    payload = _build_processing_run_payload(
+        receipt_id, stage, model_provider, model_name, model_version,
+        input_payload, output_payload, output_schema_version, status, error_message,
+    )
+    run_id = str(uuid.uuid4())
+    payload["id"] = run_id
+    if _run_flusher is None:
+        with _run_flusher_lock:
+            if _run_flusher is None:
+                _run_flusher = threading.Thread(target=_run_flusher_loop, name="processing-run-flusher", daemon=True)
+                _run_flusher.start()
+                atexit.register(flush_processing_runs)
+    _run_queue.put(payload)
+    return run_id
+
+
+# Background writes whose result nobody reads (file URL, terminal status). One worker keeps them in
+# submission order so status transitions for a receipt cannot be reordered.
+_bg_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="supabase-bg")
+
+
+def fire_and_forget(fn, *args, **kwargs) -> None:
+    """
+    Run a DB write (e.g. update_receipt_status, update_receipt_file_url) off the request path.
+    Failures are logged, never raised. Do not use when a later step reads the written row
+    (e.g. categorize_receipt checks receipt_status.current_status).
+    """
+    def _run() -> None:
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            logger.warning("Background %s failed", getattr(fn, "__name__", fn), exc_info=True)
+
+    _bg_executor.submit(_run)
+
+
 def update_receipt_status(
     receipt_id: str,
     current_status: str,
@@ -709,10 +939,13 @@ def update_receipt_status(
         payload["admin_failure_kind"] = None  # clear when resolved
 
     try:
-        supabase.table("receipt_status").update(payload).eq("id", receipt_id).execute()
-        logger.info(f"Updated receipt {receipt_id}: status={current_status}, stage={current_stage}" + (f", admin_failure_kind={admin_failure_kind}" if admin_failure_kind else ""))
+        supabase.table("receipt_status").update(payload, returning=ReturnMethod.minimal).eq("id", receipt_id).execute()
+        logger.info(
+            "Updated receipt %s: status=%s, stage=%s, admin_failure_kind=%s",
+            receipt_id, current_status, current_stage, admin_failure_kind,
+        )
     except Exception as e:
-        logger.error(f"Failed to update receipt status: {e}")
+        logger.error("Failed to update receipt status: %s", e)
         raise
 
 
@@ -724,7 +957,7 @@ def create_receipt_escalation(receipt_id: str, user_id: str, notes: str = "") ->
         "user_id": user_id,
         "notes": (notes or "").strip() or "",
     }).execute()
-    logger.info(f"Created receipt_escalation for receipt {receipt_id}, user {user_id}")
+    logger.info("Created receipt_escalation for receipt %s, user %s", receipt_id, user_id)
 
 
 def update_receipt_file_url(
@@ -743,10 +976,10 @@ def update_receipt_file_url(
     try:
         supabase.table("receipt_status").update({
             "raw_file_url": raw_file_url,
-        }).eq("id", receipt_id).execute()
-        logger.info(f"Updated receipt {receipt_id}: raw_file_url={raw_file_url}")
+        }, returning=ReturnMethod.minimal).eq("id", receipt_id).execute()
+        logger.info("Updated receipt %s: raw_file_url=%s", receipt_id, raw_file_url)
     except Exception as e:
-        logger.error(f"Failed to update receipt file URL: {e}")
+        logger.error("Failed to update receipt file URL: %s", e)
         raise
 
 
@@ -770,9 +1003,9 @@ def save_non_receipt_reject(
             "reason": reason,
             "ocr_text_snippet": (ocr_text_snippet[:5000] if ocr_text_snippet else None),
         }).execute()
-        logger.info(f"Saved non_receipt_reject: user_id={user_id}, reason={reason[:80]}...")
+        logger.info("Saved non_receipt_reject: user_id=%s, reason=%s...", user_id, reason[:80])
     except Exception as e:
-        logger.warning(f"Failed to save non_receipt_reject: {e}")
+        logger.warning("Failed to save non_receipt_reject: %s", e)
 
 
 def append_workflow_step(
@@ -799,7 +1032,7 @@ def append_workflow_step(
             "details": details,
         }).execute()
     except Exception as e:
-        logger.warning(f"Failed to append workflow step: {e}")
+        logger.warning("Failed to append workflow step: %s", e)
 
 
 def get_receipt_workflow_steps(receipt_id: str) -> List[Dict[str, Any]]:
@@ -809,7 +1042,7 @@ def get_receipt_workflow_steps(receipt_id: str) -> List[Dict[str, Any]]:
         r = supabase.table("receipt_workflow_steps").select("*").eq("receipt_id", receipt_id).order("sequence", desc=False).execute()
         return list(r.data or [])
     except Exception as e:
-        logger.warning(f"Failed to get workflow steps: {e}")
+        logger.warning("Failed to get workflow steps: %s", e)
         return []
 
 
@@ -833,7 +1066,7 @@ def check_user_locked(user_id: str) -> tuple:
                 return True, until
         return False, None
     except Exception as e:
-        logger.warning(f"Failed to check user lock: {e}")
+        logger.warning("Failed to check user lock: %s", e)
         return False, None
 
 
@@ -846,7 +1079,7 @@ def record_strike(user_id: str, receipt_id: Optional[str] = None) -> None:
             "receipt_id": receipt_id,
         }).execute()
     except Exception as e:
-        logger.warning(f"Failed to record strike: {e}")
+        logger.warning("Failed to record strike: %s", e)
 
 
 def count_strikes_in_last_hour(user_id: str) -> int:
@@ -858,7 +1091,7 @@ def count_strikes_in_last_hour(user_id: str) -> int:
         r = supabase.table("user_strikes").select("id").eq("user_id", user_id).gte("created_at", since).execute()
         return len(r.data or [])
     except Exception as e:
-        logger.warning(f"Failed to count strikes: {e}")
+        logger.warning("Failed to count strikes: %s", e)
         return 0
 
 
@@ -874,7 +1107,7 @@ def apply_user_lock(user_id: str, hours: float = 12.0) -> None:
         else:
             supabase.table("user_lock").insert({"user_id": user_id, "locked_until": locked_until}).execute()
     except Exception as e:
-        logger.warning(f"Failed to apply user lock: {e}")
+        logger.warning("Failed to apply user lock: %s", e)
 
 
 # DEPRECATED: save_parsed_receipt is no longer used
@@ -891,7 +1124,7 @@ def get_test_user_id() -> Optional[str]:
     """
     # First, try to get from environment variable
     if settings.test_user_id:
-        logger.info(f"Using TEST_USER_ID from environment: {settings.test_user_id}")
+        logger.info("Using TEST_USER_ID from environment: %s", settings.test_user_id)
         return settings.test_user_id
     
     logger.info("TEST_USER_ID not set in environment, attempting to get first user from database...")
@@ -902,21 +1135,30 @@ def get_test_user_id() -> Optional[str]:
         if res.data and len(res.data) > 0:
             user_id = res.data[0]["id"]
             user_name = res.data[0].get("user_name", "N/A")
-            logger.info(f"✓ Auto-detected user_id from database: {user_id} (name: {user_name})")
+            logger.info("✓ Auto-detected user_id from database: %s (name: %s)", user_id, user_name)
             return user_id
         else:
             logger.warning("No users found in users table")
     except Exception as e:
-        logger.error(f"✗ Failed to get user from database: {type(e).__name__}: {e}")
+        logger.error("✗ Failed to get user from database: %s: %s", type(e).__name__, e)
     
     # Return None if nothing found
     logger.warning("get_test_user_id() returning None - no user_id available")
     return None
 
 
+# Positive verify_user_exists results: user_id -> monotonic expiry. Users are never deleted mid-session,
+# so only "exists" is cached; misses are re-checked every call.
+_USER_EXISTS_TTL_S = 300.0
+_USER_EXISTS_MAX = 1024
+_user_exists_until: Dict[str, float] = {}
+
+
 def verify_user_exists(user_id: str) -> bool:
     """
-    Verify if user exists in auth.users table.
+    Verify if user exists in public.users (populated from auth.users on signup, see 013_auto_create_user_on_signup.sql).
+    
+    Uses a HEAD count query (no row body) and caches positive results for _USER_EXISTS_TTL_S.
     
     Args:
         user_id: User ID (UUID string)
@@ -924,18 +1166,23 @@ def verify_user_exists(user_id: str) -> bool:
     Returns:
         True if user exists, False otherwise
     """
+    if not user_id:
+        return False
+    now = time.monotonic()
+    if _user_exists_until.get(user_id, 0.0) > now:
+        return True
     supabase = _get_client()
     try:
-        # Note: Need service role key to query auth.users
-        # If using anon key, may need to verify via Supabase Auth API or other methods
-        # Here try to indirectly verify via receipt_status table query (if user has receipt records)
-        res = supabase.table("receipt_status").select("user_id").eq("user_id", user_id).limit(1).execute()
-        # If can query (or query doesn't error), user might exist
-        return True
+        res = supabase.table("users").select("id", count="exact", head=True).eq("id", user_id).execute()
+        exists = bool(res.count)
     except Exception as e:
-        logger.warning(f"Could not verify user existence: {e}")
-        # For development environment, assume user exists (let database throw specific error)
+        logger.warning("Could not verify user existence: %s", e)
         return False
+    if exists:
+        if len(_user_exists_until) >= _USER_EXISTS_MAX:
+            _user_exists_until.clear()
+        _user_exists_until[user_id] = now + _USER_EXISTS_TTL_S
+    return exists
 
 
 def _receipt_address_disagrees_with_canonical(merchant_address: Optional[str], location_row: Dict[str, Any]) -> bool:
@@ -1025,22 +1272,22 @@ def build_merchant_address_from_structured(receipt: Dict[str, Any]) -> Optional[
     return result or None
 
 
-def _to_cents(val: Any) -> Optional[int]:
+def _to_x100(val: Any) -> Optional[int]:
+    """Dollars/quantity -> integer x100 via Decimal(str(val)): no binary-float error (e.g. 1.005 -> 101, not 100)."""
     if val is None:
         return None
     try:
-        return int(round(float(val) * 100))
-    except (TypeError, ValueError):
+        return int((Decimal(str(val)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (TypeError, ValueError, ArithmeticError):
         return None
 
 
+def _to_cents(val: Any) -> Optional[int]:
+    return _to_x100(val)
+
+
 def _to_quantity_x100(val: Any) -> Optional[int]:
-    if val is None:
-        return None
-    try:
-        return int(round(float(val) * 100))
-    except (TypeError, ValueError):
-        return None
+    return _to_x100(val)
 
 
 def _title_case(s: Optional[str]) -> str:
@@ -1082,7 +1329,7 @@ def _lookup_product_display_and_unit(
                 unit = row.get("package_type") or row.get("size_unit")
                 return display, unit
     except Exception as e:
-        logger.debug(f"Product lookup for '{raw_product_name[:40]}': {e}")
+        logger.debug("Product lookup for '%s': %s", raw_product_name[:40], e)
     return None, None
 
 
@@ -1214,7 +1461,8 @@ def save_receipt_summary(
     payment_method = normalize_payment_type(receipt_data.get("payment_method") or "")
     card_last4 = _normalize_card_last4(receipt_data.get("card_last4"))
     
-    if not total:
+    # $0.00 is a valid total (e.g. fully discounted); only missing/blank is an error
+    if total is None or (isinstance(total, str) and not total.strip()):
         raise ValueError("total is required in receipt_data")
     
     store_chain_id = chain_id
@@ -1255,7 +1503,7 @@ def save_receipt_summary(
                 receipt_country = (loc_row.get("country_code") or "").strip().upper() or None
                 receipt_state = (loc_row.get("state") or "").strip() or None
         except Exception as e:
-            logger.warning(f"Failed to get store_location for address: {e}")
+            logger.warning("Failed to get store_location for address: %s", e)
     if store_address is None:
         store_address = merchant_address
     if not receipt_country and receipt_data.get("country"):
@@ -1281,7 +1529,7 @@ def save_receipt_summary(
                 # 链名称可能存成全大写，持久化时统一为首字母大写
                 store_name_for_summary = _store_name_to_title_case(sc.data[0]["name"]) or sc.data[0]["name"]
         except Exception as e:
-            logger.warning(f"Failed to get store_chain name for store_name: {e}")
+            logger.warning("Failed to get store_chain name for store_name: %s", e)
     
     # Prefer store_locations.phone for other_info.merchant_phone when set (reduces OCR error)
     receipt_for_info = dict(receipt_data)
@@ -1347,10 +1595,10 @@ def save_receipt_summary(
         if not res.data:
             raise ValueError("Failed to create receipt summary, no data returned")
         summary_id = res.data[0]["id"]
-        logger.info(f"Created receipt_summary: {summary_id} for receipt {receipt_id}")
+        logger.info("Created receipt_summary: %s for receipt %s", summary_id, receipt_id)
         return summary_id
     except Exception as e:
-        logger.error(f"Failed to create receipt summary: {e}")
+        logger.error("Failed to create receipt summary: %s", e)
         raise
 
 
@@ -1397,7 +1645,7 @@ def update_receipt_summary(
                 store_address = _store_address_from_location_row(loc.data[0])
                 location_phone = (loc.data[0].get("phone") or "").strip() or None
         except Exception as e:
-            logger.warning(f"Failed to get store_location: {e}")
+            logger.warning("Failed to get store_location: %s", e)
     if store_address is None:
         store_address = merchant_address
 
@@ -1469,10 +1717,10 @@ def update_receipt_summary(
             if sc.data and sc.data[0].get("name"):
                 update_payload["store_name"] = _store_name_to_title_case(sc.data[0]["name"]) or sc.data[0]["name"]
         except Exception as e:
-            logger.warning(f"Failed to get store_chain name for store_name: {e}")
+            logger.warning("Failed to get store_chain name for store_name: %s", e)
 
     supabase.table("record_summaries").update(update_payload).eq("receipt_id", receipt_id).execute()
-    logger.info(f"Updated record_summary for receipt {receipt_id}")
+    logger.info("Updated record_summary for receipt %s", receipt_id)
     return summary_id
 
 
@@ -1483,10 +1731,9 @@ def _resolve_category_id(supabase: Client, category_str: Optional[str]) -> Optio
     """
     if not category_str or not category_str.strip():
         return None
-    parts = [p.strip() for p in category_str.split(">")]
-    if len(parts) < 3:
+    l1, l2, l3 = ([p.strip() for p in category_str.split(">")] + [None, None, None])[:3]
+    if l3 is None:
         return None
-    l1, l2, l3 = parts[0], parts[1], parts[2]
     try:
         # Try category_migration_mapping first
         res = (
@@ -1506,7 +1753,7 @@ def _resolve_category_id(supabase: Client, category_str: Optional[str]) -> Optio
         if cat.data and cat.data[0].get("id"):
             return str(cat.data[0]["id"])
     except Exception as e:
-        logger.debug(f"Category resolution failed for '{category_str}': {e}")
+        logger.debug("Category resolution failed for '%s': %s", category_str, e)
     return None
 
 
@@ -1580,29 +1827,15 @@ def save_receipt_items(
         [{"product_name": (it.get("product_name") or "")[:40], "line_total": it.get("line_total")} for it in items_data[:2]],
     )
     supabase = _get_client()
-
-    def _to_cents(val) -> Optional[int]:
-        if val is None:
-            return None
-        try:
-            return int(round(float(val) * 100))
-        except (TypeError, ValueError):
-            return None
-
-    def _to_quantity(val) -> Optional[int]:
-        if val is None:
-            return None
-        try:
-            return int(round(float(val) * 100))
-        except (TypeError, ValueError):
-            return None
+    # Items on one receipt share few categories; resolve each "L1 > L2 > L3" string once (1-2 queries each)
+    category_ids_by_str: Dict[str, Optional[str]] = {}
 
     # Prepare batch insert
     items_payload = []
     for idx, item in enumerate(items_data):
         product_name = item.get("product_name")
         if not product_name:
-            logger.warning(f"Skipping item without product_name at index {idx}")
+            logger.warning("Skipping item without product_name at index %s", idx)
             continue
         
         quantity = item.get("quantity")
@@ -1620,12 +1853,12 @@ def save_receipt_items(
             except (TypeError, ValueError):
                 pass
         if line_total is None:
-            logger.warning(f"Skipping item '{product_name}' without line_total")
+            logger.warning("Skipping item '%s' without line_total", product_name)
             continue
         
         line_total_cents = _to_cents(line_total)
         if line_total_cents is None or line_total_cents < 0:
-            logger.warning(f"Skipping item '{product_name}' with invalid line_total")
+            logger.warning("Skipping item '%s' with invalid line_total", product_name)
             continue
 
         # Prefer explicit category_id (e.g. from product_categorization_rules); else resolve category string from payload
@@ -1636,7 +1869,10 @@ def save_receipt_items(
             except (TypeError, ValueError):
                 pass
         if not category_id:
-            category_id = _resolve_category_id(supabase, item.get("category"))
+            category_str = (item.get("category") or "").strip()
+            if category_str not in category_ids_by_str:
+                category_ids_by_str[category_str] = _resolve_category_id(supabase, category_str)
+            category_id = category_ids_by_str[category_str]
         
         is_on_sale = item.get("is_on_sale", False)
         original_price = _to_cents(item.get("original_price"))
@@ -1650,7 +1886,7 @@ def save_receipt_items(
             "user_id": user_id,
             "product_name": product_name,
             "product_name_clean": product_name_clean_val,
-            "quantity": _to_quantity(quantity),
+            "quantity": _to_quantity_x100(quantity),
             "unit": unit,
             "unit_price": _to_cents(unit_price),
             "line_total": line_total_cents,
@@ -1664,15 +1900,18 @@ def save_receipt_items(
         items_payload.append(item_payload)
     
     if not items_payload:
-        logger.warning(f"No valid items to insert for receipt {receipt_id}")
+        logger.warning("No valid items to insert for receipt %s", receipt_id)
         return []
     
     try:
         logger.info("[SAVE_ITEMS_DEBUG] inserting payload count=%s receipt_id=%s", len(items_payload), receipt_id)
-        res = supabase.table("record_items").insert(items_payload).execute()
-        if not res.data:
+        # PL/pgSQL RPC (076_hot_insert_rpcs.sql): one round-trip, returns only ids in item_index order
+        item_ids = _insert_returning_ids(
+            supabase, "fn_save_receipt_items", {"p_items": items_payload}, "record_items", items_payload
+        )
+        if not item_ids:
             raise ValueError("Failed to create receipt items, no data returned")
-        item_ids = [item["id"] for item in res.data]
+        item_ids = [str(item_id) for item_id in item_ids]
         logger.info("[SAVE_ITEMS_DEBUG] receipt_id=%s inserted=%s", receipt_id, len(item_ids))
         return item_ids
     except Exception as e:
@@ -1695,22 +1934,6 @@ def sync_receipt_items(
 
     supabase = _get_client()
 
-    def _to_cents(val) -> Optional[int]:
-        if val is None:
-            return None
-        try:
-            return int(round(float(val) * 100))
-        except (TypeError, ValueError):
-            return None
-
-    def _to_qty(val) -> Optional[int]:
-        if val is None:
-            return None
-        try:
-            return int(round(float(val) * 100))
-        except (TypeError, ValueError):
-            return None
-
     current = (
         supabase.table("record_items")
         .select("id, category_id")
@@ -1778,7 +2001,7 @@ def sync_receipt_items(
         payload = {
             "product_name": product_name_str,
             "product_name_clean": normalize_name_for_storage(product_name_str) or None,
-            "quantity": _to_qty(it.get("quantity")),
+            "quantity": _to_quantity_x100(it.get("quantity")),
             "unit": it.get("unit"),
             "unit_price": _to_cents(it.get("unit_price")),
             "line_total": _to_cents(it.get("line_total")),
@@ -1874,10 +2097,10 @@ def sync_classification_review_raw_product_name(record_item_id: str, raw_product
         )
         count = len(res.data) if res.data else 0
         if count:
-            logger.debug(f"Synced raw_product_name to classification_review for record_item {record_item_id}: {count} row(s)")
+            logger.debug("Synced raw_product_name to classification_review for record_item %s: %s row(s)", record_item_id, count)
         return count
     except Exception as e:
-        logger.warning(f"Failed to sync classification_review raw_product_name for record_item {record_item_id}: {e}")
+        logger.warning("Failed to sync classification_review raw_product_name for record_item %s: %s", record_item_id, e)
         return 0
 
 
@@ -1995,7 +2218,7 @@ def enqueue_unmatched_items_to_classification_review(
                     )
                     suggestions = _f.result()
         except Exception as e:
-            logger.warning(f"Classification LLM pre-fill failed: {e}")
+            logger.warning("Classification LLM pre-fill failed: %s", e)
 
         suggestion_map = {s["raw_product_name"]: s for s in suggestions}
 
@@ -2040,14 +2263,55 @@ def enqueue_unmatched_items_to_classification_review(
 
         if inserted:
             logger.info(
-                f"Enqueued {inserted} unmatched items to classification_review for receipt {receipt_id}"
+                "Enqueued %s unmatched items to classification_review for receipt %s", inserted, receipt_id
             )
     except Exception as e:
-        logger.warning(f"Failed to enqueue unmatched items to classification_review: {e}")
+        logger.warning("Failed to enqueue unmatched items to classification_review: %s", e)
 
     return inserted
 
 
+@lru_cache(maxsize=4096)
+def _get_store_chain_cached(
+    norm_name: str,
+    norm_addr: str,
+) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str], Optional[float]]:
+    """
+    Run match_store once per (normalized name, normalized address); the same store recurs across a user's receipts.
+    Returns (matched, chain_id, location_id, suggested_chain_id, suggested_location_id, confidence_score).
+    Cleared by clear_store_chain_cache() when store_chains / store_locations change.
+    """
+    match_result = match_store(norm_name, norm_addr or None)
+    return (
+        bool(match_result.get("matched")),
+        match_result.get("chain_id"),
+        match_result.get("location_id"),
+        match_result.get("suggested_chain_id"),
+        match_result.get("suggested_location_id"),
+        match_result.get("confidence_score"),
+    )
+
+
+@lru_cache(maxsize=4096)
+def get_store_location_region(location_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (state, country_code) of a store_locations row, memoized per location_id: the LLM stage
+    asks for it on every receipt of a matched store. Errors propagate and are not cached.
+    """
+    supabase = _get_client()
+    res = supabase.table("store_locations").select("state, country_code").eq("id", location_id).limit(1).execute()
+    if not res.data:
+        return None, None
+    return res.data[0].get("state"), res.data[0].get("country_code")
+
+
+def clear_store_chain_cache() -> None:
+    """Drop memoized get_store_chain / get_store_location_region results and the address_matcher locations cache (after store_chains/store_locations writes)."""
+    _get_store_chain_cached.cache_clear()
+    get_store_location_region.cache_clear()
+    clear_address_matcher_cache()
+
+
 def get_store_chain(
     chain_name: str,
     store_address: Optional[str] = None
@@ -2082,29 +2346,30 @@ def get_store_chain(
     _addr_preview = (store_address[:100] + "...") if store_address and len(store_address) > 100 else store_address
     logger.info("[STORE_DEBUG] get_store_chain IN: chain_name=%r, store_address=%r", chain_name, _addr_preview)
     
-    # Import here to avoid circular dependency
-    from ...processors.enrichment.address_matcher import match_store
-    
-    # Try to match using address_matcher
-    match_result = match_store(chain_name, store_address)
+    # match_store only looks at lower/strip name and whitespace-collapsed address, so this key is lossless
+    norm_name = chain_name.lower().strip()
+    norm_addr = re.sub(r"\s+", " ", store_address.lower().strip()) if store_address else ""
+    matched, chain_id, location_id, suggested_chain_id, suggested_location_id, confidence_score = (
+        _get_store_chain_cached(norm_name, norm_addr)
+    )
     logger.info(
         "[STORE_DEBUG] get_store_chain OUT: matched=%s, chain_id=%s, location_id=%s",
-        match_result.get("matched"),
-        match_result.get("chain_id"),
-        match_result.get("location_id"),
+        matched,
+        chain_id,
+        location_id,
     )
     
-    if match_result.get("matched"):
+    if matched:
         # High confidence match - return directly
         result = {
             "matched": True,
-            "chain_id": match_result.get("chain_id"),
-            "location_id": match_result.get("location_id"),
+            "chain_id": chain_id,
+            "location_id": location_id,
             "suggested_chain_id": None,
             "suggested_location_id": None,
-            "confidence_score": match_result.get("confidence_score")
+            "confidence_score": confidence_score
         }
-        logger.info(f"Matched store chain: {chain_name} -> chain_id={result['chain_id']}, location_id={result.get('location_id')}")
+        logger.info("Matched store chain: %s -> chain_id=%s, location_id=%s", chain_name, result['chain_id'], result.get('location_id'))
         return result
     
     # Not matched - return suggestion info if available
@@ -2112,15 +2377,15 @@ def get_store_chain(
         "matched": False,
         "chain_id": None,
         "location_id": None,
-        "suggested_chain_id": match_result.get("suggested_chain_id"),
-        "suggested_location_id": match_result.get("suggested_location_id"),
-        "confidence_score": match_result.get("confidence_score")
+        "suggested_chain_id": suggested_chain_id,
+        "suggested_location_id": suggested_location_id,
+        "confidence_score": confidence_score
     }
     
     if result.get("suggested_chain_id"):
-        logger.info(f"Low confidence match for store chain: {chain_name} -> suggested_chain_id={result['suggested_chain_id']}, confidence={result.get('confidence_score', 0):.2f}")
+        logger.info("Low confidence match for store chain: %s -> suggested_chain_id=%s, confidence=%.2f", chain_name, result['suggested_chain_id'], result.get('confidence_score', 0))
     else:
-        logger.info(f"Store chain not found: {chain_name}, will create candidate after LLM processing")
+        logger.info("Store chain not found: %s, will create candidate after LLM processing", chain_name)
     
     return result
 
@@ -2170,10 +2435,10 @@ def backfill_record_summaries_for_store_chain(chain_id: str, chain_name: str, no
             "store_chain_id": chain_id,
             "store_name": chain_name.strip(),
         }).in_("id", ids_to_update).execute()
-        logger.info(f"Backfilled store_chain_id={chain_id} and store_name={chain_name!r} for {len(ids_to_update)} record_summaries")
+        logger.info("Backfilled store_chain_id=%s and store_name=%r for %s record_summaries", chain_id, chain_name, len(ids_to_update))
         return len(ids_to_update)
     except Exception as e:
-        logger.warning(f"backfill_record_summaries_for_store_chain failed: {e}")
+        logger.warning("backfill_record_summaries_for_store_chain failed: %s", e)
         return 0
 
 
@@ -2227,11 +2492,11 @@ def backfill_record_summaries_for_store_location(
             update_payload["store_name"] = chain_name.strip()
         supabase.table("record_summaries").update(update_payload).in_("id", ids_to_update).execute()
         logger.info(
-            f"Backfilled store_location_id={location_id} for {len(ids_to_update)} record_summaries (address match to new location)"
+            "Backfilled store_location_id=%s for %s record_summaries (address match to new location)", location_id, len(ids_to_update)
         )
         return len(ids_to_update)
     except Exception as e:
-        logger.warning(f"backfill_record_summaries_for_store_location failed: {e}")
+        logger.warning("backfill_record_summaries_for_store_location failed: %s", e)
         return 0
 
 
@@ -2289,11 +2554,11 @@ def _backfill_unlinked_record_summaries_for_location(
         }
         supabase.table("record_summaries").update(update_payload).in_("id", ids_to_update).execute()
         logger.info(
-            f"Backfilled unlinked record_summaries: set chain_id={chain_id[:8]}..., location_id={location_id[:8]}... for {len(ids_to_update)} rows"
+            "Backfilled unlinked record_summaries: set chain_id=%s..., location_id=%s... for %s rows", chain_id[:8], location_id[:8], len(ids_to_update)
         )
         return len(ids_to_update)
     except Exception as e:
-        logger.warning(f"_backfill_unlinked_record_summaries_for_location failed: {e}")
+        logger.warning("_backfill_unlinked_record_summaries_for_location failed: %s", e)
         return 0
 
 
@@ -2314,12 +2579,15 @@ def run_backfill_store_locations(location_id: Optional[str] = None) -> Dict[str,
     locations = list(loc_res.data or [])
     if not locations:
         return {"total_updated": 0, "per_location": []}
+    # One in_() query resolves name + normalized_name for every chain (no per-location store_chains lookup)
     chain_ids = {loc["chain_id"] for loc in locations if loc.get("chain_id")}
-    chains = {}
+    chains: Dict[str, str] = {}
+    chain_norm_names: Dict[str, str] = {}
     if chain_ids:
-        ch_res = supabase.table("store_chains").select("id, name").in_("id", list(chain_ids)).execute()
+        ch_res = supabase.table("store_chains").select("id, name, normalized_name").in_("id", list(chain_ids)).execute()
         for c in ch_res.data or []:
             chains[c["id"]] = (c.get("name") or "").strip()
+            chain_norm_names[c["id"]] = (c.get("normalized_name") or "").strip()
     total_updated = 0
     per_location: List[Dict[str, Any]] = []
     for loc in locations:
@@ -2336,11 +2604,7 @@ def run_backfill_store_locations(location_id: Optional[str] = None) -> Dict[str,
             chain_name=chain_name or None,
         )
         # Also link record_summaries that have store_chain_id NULL but address+name match (e.g. Walmart Supercentre)
-        norm_name = None
-        if chain_name:
-            ch_res = supabase.table("store_chains").select("normalized_name").eq("id", cid).limit(1).execute()
-            if ch_res.data:
-                norm_name = (ch_res.data[0].get("normalized_name") or "").strip()
+        norm_name = chain_norm_names.get(cid) if chain_name else None
         n2 = _backfill_unlinked_record_summaries_for_location(
             chain_id=cid,
             location_id=lid,
@@ -2358,7 +2622,7 @@ def create_store_candidate(
     chain_name: str,
     receipt_id: Optional[str] = None,
     source: str = "llm",
-    llm_result: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
     suggested_chain_id: Optional[str] = None,
     suggested_location_id: Optional[str] = None,
     confidence_score: Optional[float] = None
@@ -2370,7 +2634,8 @@ def create_store_candidate(
         chain_name: Store chain name
         receipt_id: Receipt ID that triggered this candidate
         source: Source of the candidate ('ocr', 'llm', 'user')
-        llm_result: Optional LLM result to extract structured data (address, phone, currency, etc.)
+        metadata: Optional pre-built metadata (address, phone, currency, etc.); see
+            address_matcher.build_store_candidate_metadata. Stored as-is, no parsing here.
         suggested_chain_id: Optional suggested chain_id from fuzzy matching
         suggested_location_id: Optional suggested location_id from fuzzy matching
         confidence_score: Optional confidence score (0.00 - 1.00)
@@ -2388,77 +2653,6 @@ def create_store_candidate(
     
     normalized_name = chain_name.lower().strip()
     
-    # Extract structured data from LLM result
-    metadata = {}
-    if llm_result:
-        receipt = llm_result.get("receipt", {})
-        
-        # Extract address information: always have address1, address2, city, state, zip (for frontend store-review form)
-        address_info = {}
-        full_addr = receipt.get("merchant_address") or ""
-        if full_addr:
-            address_info["full_address"] = full_addr
-
-        # Prefer structured fields from receipt (prompt output)
-        addr1 = receipt.get("address_line1") or receipt.get("address1")
-        addr2 = receipt.get("address_line2") or receipt.get("address2")
-        if addr1:
-            address_info["address_line1"] = addr1
-            address_info["address1"] = addr1
-        if addr2:
-            address_info["address_line2"] = addr2
-            address_info["address2"] = addr2
-        if receipt.get("city"):
-            address_info["city"] = receipt.get("city")
-        if receipt.get("state"):
-            address_info["state"] = receipt.get("state")
-        if receipt.get("country"):
-            address_info["country"] = receipt.get("country")
-        if receipt.get("zip_code") or receipt.get("zipcode"):
-            z = receipt.get("zip_code") or receipt.get("zipcode")
-            address_info["zip_code"] = z
-            address_info["zipcode"] = z
-
-        # When structured fields are missing, parse full_address into address1, address2, city, state, zip
-        if full_addr and (not address_info.get("address1") or not address_info.get("city")):
-            try:
-                from ...processors.enrichment.address_matcher import parse_full_address_to_components
-                parsed = parse_full_address_to_components(full_addr)
-                if parsed.get("address1"):
-                    address_info.setdefault("address1", parsed["address1"])
-                    address_info.setdefault("address_line1", parsed["address1"])
-                if parsed.get("address2"):
-                    address_info.setdefault("address2", parsed["address2"])
-                    address_info.setdefault("address_line2", parsed["address2"])
-                if parsed.get("city"):
-                    address_info.setdefault("city", parsed["city"])
-                if parsed.get("state"):
-                    address_info.setdefault("state", parsed["state"])
-                if parsed.get("country"):
-                    address_info.setdefault("country", parsed["country"])
-                if parsed.get("zipcode"):
-                    address_info.setdefault("zipcode", parsed["zipcode"])
-                    address_info.setdefault("zip_code", parsed["zipcode"])
-            except Exception as e:
-                logger.warning("Parse full_address for store_candidate metadata: %s", e)
-
-        if address_info:
-            metadata["address"] = address_info
-        
-        # Extract contact information
-        if receipt.get("merchant_phone"):
-            metadata["phone"] = receipt.get("merchant_phone")
-        
-        # Extract currency
-        if receipt.get("currency"):
-            metadata["currency"] = receipt.get("currency")
-        
-        # Extract purchase date/time (for reference)
-        if receipt.get("purchase_date"):
-            metadata["purchase_date"] = receipt.get("purchase_date")
-        if receipt.get("purchase_time"):
-            metadata["purchase_time"] = receipt.get("purchase_time")
-    
     payload = {
         "raw_name": chain_name,
         "normalized_name": normalized_name,
@@ -2476,10 +2670,10 @@ def create_store_candidate(
         if not res.data:
             raise ValueError("Failed to create store candidate, no data returned")
         candidate_id = res.data[0]["id"]
-        logger.info(f"Created store candidate: {candidate_id} for '{chain_name}' (receipt_id={receipt_id})")
+        logger.info("Created store candidate: %s for '%s' (receipt_id=%s)", candidate_id, chain_name, receipt_id)
         return candidate_id
     except Exception as e:
-        logger.error(f"Failed to create store candidate: {e}")
+        logger.error("Failed to create store candidate: %s", e)
         return None
 
 
@@ -2,14 +2,19 @@
 Google Gemini LLM Client: Call Google Gemini API for receipt parsing.
 Supports text-only and vision (image + text) modes.
 """
-import google.genai as genai
-from google.genai import types
 from ...config import settings
-from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+import io
 import logging
-import json
+import orjson
 
-from .gemini_rate_limiter import set_gemini_key_invalid
+from .gemini_rate_limiter import mark_gemini_rate_limited, set_gemini_key_invalid
+from .llm_common import RETRYABLE_STATUS, ResponseCache, call_with_retry, extract_json, loads_llm_json
+
+if TYPE_CHECKING:
+    import google.genai as genai
+    from google.genai import types
 
 logger = logging.getLogger(__name__)
 
@@ -108,11 +113,12 @@ _GEMINI_KEY_INVALID_HINT = (
     "'Generative Language API' in your project. Then restart the backend."
 )
 
-# Thread-safe state management
 import asyncio
+import threading
 import time
-_lock = asyncio.Lock()
-_client = None
+
+# Parsed parse_receipt_with_gemini results (temperature 0 only)
+_response_cache = ResponseCache(maxsize=1024)
 
 # ---------------------------------------------------------------------------
 # Context caching for vision prompts
@@ -151,8 +157,8 @@ async def _get_or_create_vision_cache(
             return _cached_content_name
 
         try:
-            client = await _get_client()
-            cached = client.caches.create(
+            client = _get_client()
+            cached = await client.aio.caches.create(
                 model=model,
                 config={
                     "display_name": "ledgerlens-vision-prompt",
@@ -172,6 +178,36 @@ async def _get_or_create_vision_cache(
             return None
 
 
+def _is_retryable_gemini_error(error: Exception) -> bool:
+    """429 / 5xx from google.genai (errors.APIError.code). A 429 also fills the local rate limiter."""
+    code = getattr(error, "code", None)
+    if code == 429:
+        mark_gemini_rate_limited()
+    return code in RETRYABLE_STATUS
+
+
+async def _generate_content(client: "genai.Client", context: str, **kwargs: Any) -> Any:
+    """client.aio.models.generate_content, retried up to 3 times on 429/5xx with backoff + jitter."""
+    return await call_with_retry(
+        lambda: client.aio.models.generate_content(**kwargs),
+        _is_retryable_gemini_error,
+        context,
+    )
+
+
+def _response_text(response: Any, context: str) -> str:
+    """
+    Stripped response.text. Empty text means the candidate was blocked / cut off;
+    finish_reason is only looked up in that error case.
+    """
+    content = (response.text or "").strip()
+    if not content:
+        candidates = response.candidates or []
+        finish_reason = candidates[0].finish_reason if candidates else None
+        raise ValueError(f"Empty {context} response (finish_reason={finish_reason})")
+    return content
+
+
 def _handle_gemini_api_error(api_error: Exception, context: str) -> None:
     """If error is 400 API key invalid, mark key invalid and log actionable message."""
     err_str = str(api_error).lower()
@@ -192,25 +228,75 @@ def _handle_gemini_api_error(api_error: Exception, context: str) -> None:
         logger.error("%s API call failed: %s", context, api_error)
 
 
-async def _get_client():
+@lru_cache(maxsize=32)
+def _structured_config(
+    temperature: float,
+    cached_content: Optional[str] = None,
+    system_instruction: Optional[str] = None,
+) -> "types.GenerateContentConfig":
+    """Structured-output (RECEIPT_OUTPUT_SCHEMA) config, built once per (temperature, cache, system prompt)."""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        response_mime_type="application/json",
+        response_schema=RECEIPT_OUTPUT_SCHEMA,
+        cached_content=cached_content,
+        system_instruction=system_instruction,
+    )
+
+
+@lru_cache(maxsize=64)
+def _canonical_system(system_message: str) -> str:
     """
-    Get or create Gemini client (only needs to be called once).
-    
-    Note: This function is async and uses a lock to ensure thread safety.
+    Byte-stable system prompt. Stray leading/trailing whitespace would change the
+    prompt prefix and defeat Gemini's implicit prefix cache.
     """
-    global _client
-    
-    async with _lock:
-        if _client is None:
+    return system_message.strip()
+
+
+@lru_cache(maxsize=4)
+def _plain_config(temperature: float) -> "types.GenerateContentConfig":
+    """Free-text config, built once per temperature."""
+    from google.genai import types
+
+    return types.GenerateContentConfig(temperature=temperature)
+
+
+# One client per event loop: client.aio's HTTP session binds to the loop that first uses it,
+# and the vision workflow runs each upload on its own short-lived loop in a worker thread
+_clients: Dict[asyncio.AbstractEventLoop, "genai.Client"] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client() -> "genai.Client":
+    """
+    Get or create the Gemini client for the running event loop.
+
+    Calls go through client.aio so the HTTP round-trip does not block the event loop.
+    Clients of loops that have since been closed are dropped when a new one is created.
+    google.genai is imported here, not at module load, so workers that never call
+    Gemini don't pay for importing the SDK.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None:
+            import google.genai as genai
+
             if not settings.gemini_api_key:
                 raise ValueError(
                     "GEMINI_API_KEY environment variable must be set"
                 )
-            
-            _client = genai.Client(api_key=settings.gemini_api_key)
+            for closed in [l for l in _clients if l.is_closed()]:
+                del _clients[closed]
+            client = genai.Client(api_key=settings.gemini_api_key)
+            _clients[loop] = client
             logger.info("Google Gemini client configured")
-        
-        return _client
+    return client
 
 
 async def parse_receipt_with_gemini(
@@ -221,8 +307,10 @@ async def parse_receipt_with_gemini(
 ) -> Dict[str, Any]:
     """
     Parse receipt using Google Gemini LLM.
-    
-    Note: This function is async and uses a lock to ensure thread safety of client configuration.
+
+    When GEMINI_BATCH_ENABLED is set, concurrent calls sharing the same system
+    message are folded into one request by the micro-batcher.
+    Deterministic (temperature 0) results are cached by prompt + model.
     
     Args:
         system_message: System message
@@ -233,68 +321,357 @@ async def parse_receipt_with_gemini(
     Returns:
         Parsed JSON data
     """
-    client = await _get_client()
     model = model or settings.gemini_model
-    
+    cache_key = None
+    if temperature == 0:
+        cache_key = ResponseCache.key(model, temperature, system_message, user_message)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Gemini API call: model=%s (cache hit)", model)
+            return cached
+
+    if settings.gemini_batch_enabled:
+        result = await _get_batcher().submit(system_message, user_message, model, temperature)
+    else:
+        result = await _generate_receipt_json(system_message, user_message, model, temperature)
+    if cache_key is not None:
+        _response_cache.put(cache_key, result)
+    return result
+
+
+async def _generate_receipt_json(
+    system_message: str,
+    user_message: str,
+    model: str,
+    temperature: float,
+) -> Dict[str, Any]:
+    """Single structured-output generate_content call for one receipt."""
+    client = _get_client()
+
     try:
-        # Merge system_message and user_message
-        # In the new API, we can use system_instruction parameter
-        combined_message = f"{system_message}\n\n{user_message}"
-        
-        # Configure generation settings with Structured Output
-        config = genai.types.GenerateContentConfig(
-            temperature=temperature,
-            response_mime_type="application/json",
-            response_schema=RECEIPT_OUTPUT_SCHEMA,
-        )
+        # System prompt goes in system_instruction (stable prefix, cacheable server-side);
+        # only the per-receipt user_message is sent as contents
+        config = _structured_config(temperature, system_instruction=_canonical_system(system_message))
 
-        logger.info(f"Gemini API call: model={model} (structured output)")
+        logger.info("Gemini API call: model=%s (structured output)", model)
 
         # Call API using google-genai SDK (config param, not generation_config)
         try:
-            response = client.models.generate_content(
+            response = await _generate_content(
+                client,
+                "Gemini text",
                 model=model,
-                contents=combined_message,
+                contents=user_message,
                 config=config,
             )
         except Exception as api_error:
             _handle_gemini_api_error(api_error, "Gemini text")
             raise
         
-        # Extract text from response
-        # The new API structure may be different
-        if hasattr(response, 'text'):
-            content = response.text.strip()
-        elif hasattr(response, 'candidates') and response.candidates:
-            # Fallback: try to get text from candidates
-            if hasattr(response.candidates[0], 'content'):
-                if hasattr(response.candidates[0].content, 'parts'):
-                    content = response.candidates[0].content.parts[0].text.strip()
-                elif hasattr(response.candidates[0].content, 'text'):
-                    content = response.candidates[0].content.text.strip()
-                else:
-                    raise ValueError("Unexpected response format from Gemini API")
-            else:
-                raise ValueError("Unexpected response format from Gemini API")
-        else:
-            raise ValueError("Unexpected response format from Gemini API")
+        content = _response_text(response, "Gemini")
         
         # Parse JSON (Gemini sometimes wraps it with ```json)
-        content = _extract_json_from_response(content)
+        content = extract_json(content)
         
         try:
-            parsed_data = json.loads(content)
+            parsed_data = loads_llm_json(content)
             return parsed_data
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from Gemini response: {e}")
-            logger.error(f"Response content: {content[:500]}")  # Log first 500 characters
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON from Gemini response: %s", e)
+            logger.error("Response content: %s", content[:500])  # Log first 500 characters
             raise ValueError(f"Invalid JSON response from Gemini: {e}")
         
     except Exception as e:
-        logger.error(f"Google Gemini API call failed: {e}")
+        logger.error("Google Gemini API call failed: %s", e)
         raise
 
 
+# ---------------------------------------------------------------------------
+# Client-side micro-batching (GEMINI_BATCH_ENABLED)
+# ---------------------------------------------------------------------------
+# Concurrent receipts (e.g. bulk upload) that share a system prompt are sent as
+# one prompt returning a JSON array, so the prompt prefill and the HTTP
+# round-trip are paid once per batch instead of once per receipt.
+_MICRO_BATCH_MAX = 8
+_MICRO_BATCH_WINDOW_S = 0.05
+_MICRO_BATCH_INSTRUCTION = (
+    "The input below is a JSON array of receipts. Process each one independently "
+    "using the system instructions and output a JSON array with exactly one result "
+    "object per receipt, in the same order."
+)
+
+
+@lru_cache(maxsize=16)
+def _structured_list_config(temperature: float, system_instruction: str) -> "types.GenerateContentConfig":
+    """Structured-output config for a JSON array of RECEIPT_OUTPUT_SCHEMA objects."""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        response_mime_type="application/json",
+        response_schema={"type": "array", "items": RECEIPT_OUTPUT_SCHEMA},
+        system_instruction=system_instruction,
+    )
+
+
+async def _generate_receipt_json_group(
+    system_message: str,
+    user_messages: List[str],
+    model: str,
+    temperature: float,
+) -> List[Dict[str, Any]]:
+    """One generate_content call for several receipts; returns one dict per user message."""
+    client = _get_client()
+    contents = f"{_MICRO_BATCH_INSTRUCTION}\n\nReceipts:\n" + orjson.dumps(user_messages).decode("utf-8")
+    logger.info("Gemini API call: model=%s (micro-batch of %d)", model, len(user_messages))
+    try:
+        response = await _generate_content(
+            client,
+            "Gemini micro-batch",
+            model=model,
+            contents=contents,
+            config=_structured_list_config(temperature, _canonical_system(system_message)),
+        )
+    except Exception as api_error:
+        _handle_gemini_api_error(api_error, "Gemini micro-batch")
+        raise
+    parsed = loads_llm_json(extract_json(response.text or ""))
+    if not isinstance(parsed, list) or len(parsed) != len(user_messages):
+        raise ValueError(
+            f"Gemini micro-batch returned {len(parsed) if isinstance(parsed, list) else type(parsed).__name__} "
+            f"results for {len(user_messages)} receipts"
+        )
+    return parsed
+
+
+class GeminiBatcher:
+    """
+    Collects parse_receipt_with_gemini calls arriving within window_s (up to max_batch)
+    and dispatches each group sharing (system_message, model, temperature) as one request.
+    If a batched call fails or returns the wrong number of results, the group is
+    retried one receipt at a time. The dispatcher task ends once its queue is drained and
+    its requests are answered (submit starts a new one), so short-lived per-upload event
+    loops aren't left with a pending task when they close.
+    """
+
+    def __init__(self, max_batch: int = _MICRO_BATCH_MAX, window_s: float = _MICRO_BATCH_WINDOW_S):
+        self.max_batch = max_batch
+        self.window_s = window_s
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(
+        self,
+        system_message: str,
+        user_message: str,
+        model: str,
+        temperature: float,
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        # _queue is None once the dispatcher has drained it and is finishing up;
+        # a task left on a closed loop never finishes, so also start over on a new loop
+        if self._queue is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(self._queue))
+        future = loop.create_future()
+        self._queue.put_nowait(((system_message, model, temperature), user_message, future))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        inflight: set = set()
+        while True:
+            pending = [await queue.get()]
+            deadline = loop.time() + self.window_s
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: Dict[Tuple[str, str, float], List[Tuple[str, asyncio.Future]]] = {}
+            for key, user_message, future in pending:
+                groups.setdefault(key, []).append((user_message, future))
+            for key, group in groups.items():
+                task = asyncio.create_task(self._dispatch(key, group))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+
+            if queue.empty():
+                # Nothing waiting: stop taking work (new submits get a fresh queue/task) and
+                # finish once the dispatched requests are answered
+                if self._queue is queue:
+                    self._queue = None
+                if inflight:
+                    await asyncio.gather(*inflight, return_exceptions=True)
+                return
+
+    async def _dispatch(
+        self,
+        key: Tuple[str, str, float],
+        group: List[Tuple[str, asyncio.Future]],
+    ) -> None:
+        system_message, model, temperature = key
+        user_messages = [user_message for user_message, _ in group]
+        results: List[Any]
+        if len(group) == 1:
+            try:
+                results = [await _generate_receipt_json(system_message, user_messages[0], model, temperature)]
+            except Exception as e:
+                results = [e]
+        else:
+            try:
+                results = await _generate_receipt_json_group(system_message, user_messages, model, temperature)
+            except Exception as e:
+                logger.warning("Gemini micro-batch of %d failed (%s), retrying one by one", len(group), e)
+                results = await asyncio.gather(
+                    *(_generate_receipt_json(system_message, u, model, temperature) for u in user_messages),
+                    return_exceptions=True,
+                )
+        for (_, future), result in zip(group, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# One batcher per event loop (see _clients): its queue and dispatch task live on that loop
+_batchers: Dict[asyncio.AbstractEventLoop, GeminiBatcher] = {}
+
+
+def _get_batcher() -> GeminiBatcher:
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        with _clients_lock:
+            batcher = _batchers.get(loop)
+            if batcher is None:
+                for closed in [l for l in _batchers if l.is_closed()]:
+                    del _batchers[closed]
+                batcher = GeminiBatcher()
+                _batchers[loop] = batcher
+    return batcher
+
+
+# ---------------------------------------------------------------------------
+# Batch API (non-interactive parsing)
+# ---------------------------------------------------------------------------
+# Batch jobs are billed at ~50% of the interactive price and do not count
+# against the per-minute request limit, but complete asynchronously
+# (minutes to hours). Only use for callers that can wait.
+_BATCH_POLL_INTERVAL_S = 30
+_BATCH_TIMEOUT_S = 24 * 3600
+_BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+async def parse_receipts_batch_with_gemini(
+    messages: List[Tuple[str, str]],
+    model: Optional[str] = None,
+    temperature: float = 0,
+    poll_interval_s: float = _BATCH_POLL_INTERVAL_S,
+    timeout_s: float = _BATCH_TIMEOUT_S,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Parse many receipts in one Gemini Batch API job.
+
+    Same prompt/schema as parse_receipt_with_gemini, but the requests are uploaded as
+    one JSONL file and the job is polled until it finishes.
+
+    Args:
+        messages: List of (system_message, user_message) pairs.
+        model: Model name (if None, uses default from config)
+        temperature: Temperature parameter
+        poll_interval_s: Seconds between job status checks
+        timeout_s: Give up (and cancel the job) after this many seconds
+
+    Returns:
+        Parsed JSON per input, in input order. An entry is None if that request failed.
+    """
+    if not messages:
+        return []
+    client = _get_client()
+    from google.genai import types
+    model = model or settings.gemini_model
+
+    lines = []
+    for idx, (system_message, user_message) in enumerate(messages):
+        lines.append(orjson.dumps({
+            "key": str(idx),
+            "request": {
+                "system_instruction": {"parts": [{"text": _canonical_system(system_message)}]},
+                "contents": [{"role": "user", "parts": [{"text": user_message}]}],
+                "generation_config": {
+                    "temperature": temperature,
+                    "response_mime_type": "application/json",
+                    "response_schema": RECEIPT_OUTPUT_SCHEMA,
+                },
+            },
+        }))
+    jsonl = io.BytesIO(b"\n".join(lines))
+
+    try:
+        uploaded = await client.aio.files.upload(
+            file=jsonl,
+            config=types.UploadFileConfig(display_name="ledgerlens-receipt-batch", mime_type="jsonl"),
+        )
+        job = await client.aio.batches.create(
+            model=model,
+            src=uploaded.name,
+            config={"display_name": "ledgerlens-receipt-batch"},
+        )
+    except Exception as api_error:
+        _handle_gemini_api_error(api_error, "Gemini batch")
+        raise
+    logger.info("Gemini batch job created: %s (model=%s, requests=%d)", job.name, model, len(messages))
+
+    deadline = time.monotonic() + timeout_s
+    while job.state.name not in _BATCH_DONE_STATES:
+        if time.monotonic() > deadline:
+            await client.aio.batches.cancel(name=job.name)
+            raise TimeoutError(f"Gemini batch job {job.name} did not finish in {timeout_s}s")
+        await asyncio.sleep(poll_interval_s)
+        job = await client.aio.batches.get(name=job.name)
+
+    if job.state.name != "JOB_STATE_SUCCEEDED":
+        raise RuntimeError(f"Gemini batch job {job.name} ended with {job.state.name}: {job.error}")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+    raw = await client.aio.files.download(file=job.dest.file_name)
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        row = orjson.loads(line)
+        idx = int(row.get("key", -1))
+        if not 0 <= idx < len(messages):
+            continue
+        if row.get("error"):
+            logger.warning("Gemini batch request %d failed: %s", idx, row["error"])
+            continue
+        try:
+            text = row["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            results[idx] = loads_llm_json(extract_json(text))
+        except (KeyError, IndexError, TypeError, orjson.JSONDecodeError) as e:
+            logger.warning("Gemini batch request %d returned unparseable output: %s", idx, e)
+
+    logger.info(
+        "Gemini batch job %s done: %d/%d parsed",
+        job.name,
+        sum(1 for r in results if r is not None),
+        len(messages),
+    )
+    return results
+
+
 async def parse_receipt_with_gemini_vision(
     image_bytes: bytes,
     failure_context: str,
@@ -319,7 +696,8 @@ async def parse_receipt_with_gemini_vision(
     Returns:
         Parsed receipt JSON (same structure as text-based parse).
     """
-    client = await _get_client()
+    client = _get_client()
+    from google.genai import types
     model = model or settings.gemini_model
 
     instruction = f"""You are parsing a receipt. A previous attempt using OCR text failed with the following context:
@@ -342,15 +720,13 @@ Instructions:
         types.Part(text=instruction),
     ]
 
-    config = types.GenerateContentConfig(
-        temperature=temperature,
-        response_mime_type="application/json",
-        response_schema=RECEIPT_OUTPUT_SCHEMA,
-    )
+    config = _structured_config(temperature)
 
-    logger.info(f"Gemini vision retry: model={model} (structured output)")
+    logger.info("Gemini vision retry: model=%s (structured output)", model)
     try:
-        response = client.models.generate_content(
+        response = await _generate_content(
+            client,
+            "Gemini vision",
             model=model,
             contents=parts,
             config=config,
@@ -359,27 +735,13 @@ Instructions:
         _handle_gemini_api_error(api_error, "Gemini vision")
         raise
 
-    if hasattr(response, "text"):
-        content = response.text.strip()
-    elif hasattr(response, "candidates") and response.candidates:
-        c0 = response.candidates[0]
-        if hasattr(c0, "content"):
-            if hasattr(c0.content, "parts") and c0.content.parts:
-                content = c0.content.parts[0].text.strip()
-            elif hasattr(c0.content, "text"):
-                content = c0.content.text.strip()
-            else:
-                raise ValueError("Unexpected Gemini vision response format")
-        else:
-            raise ValueError("Unexpected Gemini vision response format")
-    else:
-        raise ValueError("Unexpected Gemini vision response format")
+    content = _response_text(response, "Gemini vision")
 
-    content = _extract_json_from_response(content)
+    content = extract_json(content)
     try:
-        return json.loads(content)
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from Gemini vision response: {e}")
+        return loads_llm_json(content)
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse JSON from Gemini vision response: %s", e)
         raise ValueError(f"Invalid JSON response from Gemini vision: {e}")
 
 
@@ -413,7 +775,8 @@ async def parse_receipt_with_gemini_vision_escalation(
     to reduce token costs on repeated calls.
     Returns (parsed_json, usage_dict). usage_dict has input_tokens, output_tokens (or None).
     """
-    client = await _get_client()
+    client = _get_client()
+    from google.genai import types
     blob = types.Blob(data=image_bytes, mime_type=mime_type)
 
     # Try context caching: instruction goes into cache, only image is sent per-call
@@ -424,28 +787,21 @@ async def parse_receipt_with_gemini_vision_escalation(
     if cache_name:
         # Cached path: instruction is in the cache, only send the image
         parts = [types.Part(inline_data=blob)]
-        config = types.GenerateContentConfig(
-            temperature=0,
-            response_mime_type="application/json",
-            response_schema=RECEIPT_OUTPUT_SCHEMA,
-            cached_content=cache_name,
-        )
-        logger.info(f"Gemini vision (cached): model={model}")
+        config = _structured_config(0, cache_name)
+        logger.info("Gemini vision (cached): model=%s", model)
     else:
         # Fallback: send instruction inline
         parts = [
             types.Part(inline_data=blob),
             types.Part(text=instruction),
         ]
-        config = types.GenerateContentConfig(
-            temperature=0,
-            response_mime_type="application/json",
-            response_schema=RECEIPT_OUTPUT_SCHEMA,
-        )
-        logger.info(f"Gemini vision (inline): model={model}")
+        config = _structured_config(0)
+        logger.info("Gemini vision (inline): model=%s", model)
 
     try:
-        response = client.models.generate_content(
+        response = await _generate_content(
+            client,
+            "Gemini vision escalation",
             model=model,
             contents=parts,
             config=config,
@@ -454,26 +810,12 @@ async def parse_receipt_with_gemini_vision_escalation(
         _handle_gemini_api_error(api_error, "Gemini vision escalation")
         raise
     usage = _usage_from_gemini_response(response)
-    if hasattr(response, "text"):
-        content = response.text.strip()
-    elif hasattr(response, "candidates") and response.candidates:
-        c0 = response.candidates[0]
-        if hasattr(c0, "content"):
-            if hasattr(c0.content, "parts") and c0.content.parts:
-                content = c0.content.parts[0].text.strip()
-            elif hasattr(c0.content, "text"):
-                content = c0.content.text.strip()
-            else:
-                raise ValueError("Unexpected Gemini vision escalation response format")
-        else:
-            raise ValueError("Unexpected Gemini vision escalation response format")
-    else:
-        raise ValueError("Unexpected Gemini vision escalation response format")
-    content = _extract_json_from_response(content)
+    content = _response_text(response, "Gemini vision escalation")
+    content = extract_json(content)
     try:
-        return json.loads(content), usage
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from Gemini vision escalation: {e}")
+        return loads_llm_json(content), usage
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse JSON from Gemini vision escalation: %s", e)
         raise ValueError(f"Invalid JSON from Gemini vision escalation: {e}")
 
 
@@ -486,50 +828,17 @@ async def is_image_receipt_like(
     Ask Gemini vision whether the image looks like a receipt (for OCR-fail branch).
     Returns True if yes, False if no. On API error, returns True (assume receipt-like and continue).
     """
-    client = await _get_client()
+    client = _get_client()
+    from google.genai import types
     model = model or settings.gemini_model
     blob = types.Blob(data=image_bytes, mime_type=mime_type)
     prompt = "Does this image show a receipt (e.g. a store receipt with items and a total amount)? Answer with exactly one word: yes or no."
     parts = [types.Part(inline_data=blob), types.Part(text=prompt)]
-    config = types.GenerateContentConfig(temperature=0)
+    config = _plain_config(0)
     try:
-        response = client.models.generate_content(model=model, contents=parts, config=config)
-        if hasattr(response, "text"):
-            text = (response.text or "").strip().lower()
-        elif hasattr(response, "candidates") and response.candidates:
-            c0 = response.candidates[0]
-            if hasattr(c0, "content") and hasattr(c0.content, "parts") and c0.content.parts:
-                text = (c0.content.parts[0].text or "").strip().lower()
-            else:
-                text = "yes"
-        else:
-            text = "yes"
+        response = await client.aio.models.generate_content(model=model, contents=parts, config=config)
+        text = (response.text or "").strip().lower()
         return text.startswith("yes")
     except Exception as e:
-        logger.warning(f"Gemini is_image_receipt_like failed: {e}, assuming receipt-like")
+        logger.warning("Gemini is_image_receipt_like failed: %s, assuming receipt-like", e)
         return True
-
-
-def _extract_json_from_response(text: str) -> str:
-    """
-    Extract JSON from response (handles possible markdown code blocks).
-    
-    Gemini sometimes wraps JSON with ```json or ```.
-    """
-    text = text.strip()
-    
-    # Check if wrapped with ```json
-    if text.startswith('```json'):
-        # Find first ```json and last ```
-        start = text.find('```json') + 7
-        end = text.rfind('```')
-        if end > start:
-            text = text[start:end].strip()
-    elif text.startswith('```'):
-        # Check if wrapped with ``` (no language identifier)
-        start = text.find('```') + 3
-        end = text.rfind('```')
-        if end > start:
-            text = text[start:end].strip()
-    
-    return text
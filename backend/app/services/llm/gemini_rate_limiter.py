@@ -2,13 +2,16 @@
 Gemini Rate Limiter: Manage Gemini API free tier limit (15 requests/minute).
 
 Uses UTC time, resets counter every minute.
-Uses asyncio.Lock to ensure thread safety.
+State is a single (minute, counter) tuple; there is no await between reading and
+writing it, so asyncio callers cannot interleave and no lock is needed.
 Also checks that GEMINI_API_KEY is set and not invalid (from previous failure).
+acquire_gemini_slot() waits for the next window instead of returning "unavailable".
 """
 from datetime import datetime, timezone
-from typing import Dict, Tuple
-import logging
+from typing import Dict, Optional, Tuple
 import asyncio
+import logging
+import time
 
 from ...config import settings
 
@@ -17,10 +20,9 @@ logger = logging.getLogger(__name__)
 # Set by gemini_client when a 400 "API key not valid" is received (avoids repeated failing calls)
 _gemini_key_invalid: bool = False
 
-# Thread-safe state management
-_lock = asyncio.Lock()
-_current_minute: str = ""
-_counter: int = 0
+# (current_minute, counter) — replaced as a whole, never mutated in place.
+# Minute is the UTC epoch minute (int(time.time()) // 60); formatted only for display.
+_state: Tuple[int, int] = (0, 0)
 _max_requests_per_minute: int = 15
 
 
@@ -30,82 +32,116 @@ def set_gemini_key_invalid(invalid: bool = True) -> None:
     _gemini_key_invalid = invalid
 
 
+def mark_gemini_rate_limited() -> None:
+    """Google returned 429: treat the current minute as full so we stop submitting locally."""
+    global _state
+    _state = (int(time.time()) // 60, _max_requests_per_minute)
+
+
+def _format_minute(epoch_minute: int) -> str:
+    """Epoch minute -> 'YYYY-MM-DD HH:MM' (UTC)."""
+    return datetime.fromtimestamp(epoch_minute * 60, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def _key_unavailable_reason() -> Optional[str]:
+    """Why the API key can't be used (None if it looks usable)."""
+    if not (settings.gemini_api_key and settings.gemini_api_key.strip()):
+        return "GEMINI_API_KEY is not set in environment"
+    if _gemini_key_invalid:
+        return "Gemini API key was rejected by Google (invalid or disabled). Fix GEMINI_API_KEY and restart the backend."
+    return None
+
+
 async def check_gemini_available() -> Tuple[bool, str]:
     """
     Check if Gemini is available (key set, key not known invalid, not exceeding free tier limit).
     
-    Note: This function is async and uses a lock to ensure thread safety.
-    
     Returns:
         (is_available, reason): 
         - is_available: True if Gemini can be used, False otherwise
         - reason: Reason for unavailability (empty string if available)
     """
-    global _current_minute, _counter
+    global _state
+
+    key_problem = _key_unavailable_reason()
+    if key_problem:
+        return False, key_problem
+
+    current_minute = int(time.time()) // 60
+    minute, counter = _state
+
+    # If minute changed, reset counter
+    if current_minute != minute:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Gemini rate limiter: New minute %s, resetting counter", _format_minute(current_minute))
+        minute, counter = current_minute, 0
+
+    # Check if exceeded limit
+    if counter >= _max_requests_per_minute:
+        reason = (
+            f"Gemini free tier rate limit exceeded: {counter}/{_max_requests_per_minute} "
+            f"requests in the current minute. Request will be queued and retried after the "
+            f"rate limit window resets."
+        )
+        logger.warning(reason)
+        return False, reason
+
+    # Increment counter
+    _state = (minute, counter + 1)
+    logger.debug("Gemini rate limiter: %d/%d requests this minute", counter + 1, _max_requests_per_minute)
+    return True, ""
 
-    if not (settings.gemini_api_key and settings.gemini_api_key.strip()):
-        return False, "GEMINI_API_KEY is not set in environment"
-    if _gemini_key_invalid:
-        return False, "Gemini API key was rejected by Google (invalid or disabled). Fix GEMINI_API_KEY and restart the backend."
-    
-    async with _lock:
-        # Get current UTC time minute (format: YYYY-MM-DD HH:MM)
-        now = datetime.now(timezone.utc)
-        current_minute_str = now.strftime("%Y-%m-%d %H:%M")
-        
-        # If minute changed, reset counter
-        if current_minute_str != _current_minute:
-            logger.info(f"Gemini rate limiter: New minute {current_minute_str}, resetting counter")
-            _current_minute = current_minute_str
-            _counter = 0
-        
-        # Check if exceeded limit
-        if _counter >= _max_requests_per_minute:
-            reason = (
-                f"Gemini free tier rate limit exceeded: {_counter}/{_max_requests_per_minute} "
-                f"requests in the current minute. Request will be queued and retried after the "
-                f"rate limit window resets."
-            )
-            logger.warning(reason)
-            return False, reason
-        
-        # Increment counter
-        _counter += 1
-        logger.debug(f"Gemini rate limiter: {_counter}/{_max_requests_per_minute} requests this minute")
-        return True, ""
+
+async def acquire_gemini_slot(timeout: float = 65.0) -> None:
+    """
+    Take one request slot, sleeping until the next minute window if the current one
+    is full (instead of failing the request). Waits at most `timeout` seconds.
+
+    Raises:
+        RuntimeError: API key missing or rejected (waiting won't help).
+        TimeoutError: No slot freed up within `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        available, reason = await check_gemini_available()
+        if available:
+            return
+        key_problem = _key_unavailable_reason()
+        if key_problem:
+            raise RuntimeError(key_problem)
+        sleep_s = 60 - (time.time() % 60) + 0.1
+        if time.monotonic() + sleep_s > deadline:
+            raise TimeoutError(reason)
+        logger.info("Gemini rate limiter: window full, waiting %.1fs for the next minute", sleep_s)
+        await asyncio.sleep(sleep_s)
 
 
 async def record_gemini_request() -> Dict[str, any]:
     """
     Record Gemini request (for statistics and timeline).
     
-    Note: This function is async and uses a lock to ensure read consistency.
-    
     Returns:
         Dictionary containing request information
     """
-    async with _lock:
-        now = datetime.now(timezone.utc)
-        return {
-            "timestamp": now.isoformat(),
-            "minute": now.strftime("%Y-%m-%d %H:%M"),
-            "count_this_minute": _counter
-        }
+    now = datetime.now(timezone.utc)
+    return {
+        "timestamp": now.isoformat(),
+        "minute": now.strftime("%Y-%m-%d %H:%M"),
+        "count_this_minute": _state[1]
+    }
 
 
 async def get_current_status() -> Dict[str, any]:
     """
     Get current rate limiter status (for debugging).
     
-    Note: This function is async and uses a lock to ensure read consistency.
-    
     Returns:
         Status information dictionary
     """
-    async with _lock:
-        return {
-            "current_minute": _current_minute,
-            "counter": _counter,
-            "max_per_minute": _max_requests_per_minute,
-            "available": _counter < _max_requests_per_minute
-        }
+    minute, counter = _state
+    return {
+        "current_minute": _format_minute(minute) if minute else "",
+        "counter": counter,
+        "max_per_minute": _max_requests_per_minute,
+        "available": counter < _max_requests_per_minute
+    }
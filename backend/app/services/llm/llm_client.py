@@ -5,35 +5,105 @@ Supports text-only and vision (image + prompt) for escalation.
 DEPRECATED (2025-03-21): This module is no longer used. The pipeline is Gemini-only.
 Kept for reference; will be removed in a future cleanup.
 """
-from openai import OpenAI
 from ...config import settings
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Tuple, TYPE_CHECKING
+import asyncio
 import logging
-import json
+import threading
+import orjson
 import base64
 
+from .llm_common import RETRYABLE_STATUS, ResponseCache, call_with_retry, loads_llm_json
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 logger = logging.getLogger(__name__)
 
-# Singleton OpenAI client
-_client: Optional[OpenAI] = None
+# One OpenAI client (keep-alive connection pool) and semaphore per event loop: the httpx pool
+# and the semaphore bind to the loop that first uses them, and per-upload workflows run on
+# their own short-lived loops (see gemini_client._clients). The semaphore caps in-flight
+# requests so bursts don't exhaust the pool (APIConnectionError).
+_clients: Dict[asyncio.AbstractEventLoop, Tuple["AsyncOpenAI", asyncio.Semaphore]] = {}
+_clients_lock = threading.Lock()
+
+_JSON_OBJECT = {"type": "json_object"}
+
+# Parsed parse_receipt_with_llm results (temperature 0 only)
+_response_cache = ResponseCache(maxsize=1024)
+
+
+def _is_retryable_openai_error(error: Exception) -> bool:
+    """Timeouts / connection errors, and 429 / 5xx responses (openai's typed exceptions)."""
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, openai.APIConnectionError)  # includes APITimeoutError
+
+
+async def _create_chat_completion(client: "AsyncOpenAI", **kwargs: Any) -> str:
+    """
+    client.chat.completions.create, retried up to 3 times on transient errors
+    (exponential backoff + jitter; the SDK's own retries are off, see _get_client).
+    Returns the first choice's message content.
+    """
+    semaphore = _clients[asyncio.get_running_loop()][1]
+
+    async def _create() -> Any:
+        async with semaphore:
+            return await client.chat.completions.create(**kwargs)
+
+    response = await call_with_retry(_create, _is_retryable_openai_error, "OpenAI")
+    return response.choices[0].message.content
+
+
+@lru_cache(maxsize=64)
+def _canonical_system(system_message: str) -> str:
+    """Byte-stable system prompt so OpenAI's prompt-prefix cache can hit."""
+    return system_message.strip()
 
 
-def _get_client() -> OpenAI:
-    """Get or create OpenAI client."""
-    global _client
-    if _client is None:
+def _get_client() -> "AsyncOpenAI":
+    """
+    Get or create the OpenAI client for the running event loop (lazy import: openai/httpx
+    load on first use). Clients of loops that have since been closed are dropped.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is not None:
+        return entry[0]
+    with _clients_lock:
+        entry = _clients.get(loop)
+        if entry is not None:
+            return entry[0]
+        from openai import AsyncOpenAI
+        import httpx
+
         if not settings.openai_api_key:
             raise ValueError(
                 "OPENAI_API_KEY environment variable must be set"
             )
+        for closed in [l for l in _clients if l.is_closed()]:
+            del _clients[closed]
         
-        _client = OpenAI(api_key=settings.openai_api_key)
+        client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            # Retries go through call_with_retry (same policy as Gemini); don't stack the SDK's on top
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+                timeout=60,
+            ),
+        )
+        _clients[loop] = (client, asyncio.Semaphore(settings.openai_max_concurrency))
         logger.info("OpenAI client initialized")
     
-    return _client
+    return client
 
 
-def parse_receipt_with_llm(
+async def parse_receipt_with_llm(
     system_message: str,
     user_message: str,
     model: str = None,
@@ -49,41 +119,49 @@ def parse_receipt_with_llm(
         temperature: Temperature parameter
         
     Returns:
-        Parsed JSON data
+        Parsed JSON data (temperature 0 results are cached by prompt + model)
     """
     client = _get_client()
     model = model or settings.openai_model
+    cache_key = None
+    if temperature == 0:
+        cache_key = ResponseCache.key(model, temperature, system_message, user_message)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("OpenAI API call: model=%s (cache hit)", model)
+            return cached
     
     try:
-        logger.info(f"OpenAI API call: model={model}")
+        logger.info("OpenAI API call: model=%s", model)
 
-        response = client.chat.completions.create(
+        content = await _create_chat_completion(
+            client,
             model=model,
             messages=[
-                {"role": "system", "content": system_message},
+                {"role": "system", "content": _canonical_system(system_message)},
                 {"role": "user", "content": user_message}
             ],
             temperature=temperature,
-            response_format={"type": "json_object"},  # Force JSON output
+            response_format=_JSON_OBJECT,  # Force JSON output
         )
-        
-        content = response.choices[0].message.content
 
         # Parse JSON
         try:
-            parsed_data = json.loads(content)
-            return parsed_data
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from OpenAI response: {e}")
-            logger.error(f"Response content: {content[:500]}")  # Log first 500 characters
+            parsed_data = loads_llm_json(content)
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON from OpenAI response: %s", e)
+            logger.error("Response content: %s", content[:500])  # Log first 500 characters
             raise ValueError(f"Invalid JSON response from OpenAI: {e}")
+        if cache_key is not None:
+            _response_cache.put(cache_key, parsed_data)
+        return parsed_data
         
     except Exception as e:
-        logger.error(f"OpenAI API call failed: {e}")
+        logger.error("OpenAI API call failed: %s", e)
         raise
 
 
-def parse_receipt_with_openai_vision(
+async def parse_receipt_with_openai_vision(
     image_bytes: bytes,
     instruction: str,
     model: str,
@@ -110,19 +188,19 @@ def parse_receipt_with_openai_vision(
         {"type": "image_url", "image_url": {"url": data_url}},
     ]
     try:
-        logger.info(f"Calling OpenAI vision with model={model}, image size={len(image_bytes)} bytes")
-        response = client.chat.completions.create(
+        logger.info("Calling OpenAI vision with model=%s, image size=%s bytes", model, len(image_bytes))
+        raw = await _create_chat_completion(
+            client,
             model=model,
             messages=[{"role": "user", "content": content}],
             temperature=0,
-            response_format={"type": "json_object"},
+            response_format=_JSON_OBJECT,
         )
-        raw = response.choices[0].message.content
-        out = json.loads(raw)
+        out = loads_llm_json(raw)
         return out
-    except json.JSONDecodeError as e:
-        logger.error(f"OpenAI vision returned invalid JSON: {e}")
+    except orjson.JSONDecodeError as e:
+        logger.error("OpenAI vision returned invalid JSON: %s", e)
         raise ValueError(f"Invalid JSON from OpenAI vision: {e}")
     except Exception as e:
-        logger.error(f"OpenAI vision call failed: {e}")
+        logger.error("OpenAI vision call failed: %s", e)
         raise
@@ -0,0 +1,186 @@
+"""
+Shared helpers for LLM clients (Gemini / OpenAI): extracting, decoding and encoding
+model JSON, retrying transient API errors, caching parsed responses.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+import asyncio
+import copy
+import hashlib
+import logging
+import random
+import re
+import threading
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# ```json ... ``` / ``` ... ``` wrapper models sometimes put around JSON
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*\n?(.*?)\n?```\s*$", re.DOTALL)
+# Dangling tail left by truncation inside an object: `, "key":` / `, "key"` / `,` / `:`
+_DANGLING_OBJECT_TAIL_RE = re.compile(r'(?:,\s*"(?:[^"\\]|\\.)*"\s*:?|[,:])\s*$')
+_DANGLING_ARRAY_TAIL_RE = re.compile(r",\s*$")
+
+
+def extract_json(text: str) -> str:
+    """
+    Extract JSON from response (handles possible markdown code blocks).
+
+    Gemini sometimes wraps JSON with ```json or ```.
+    """
+    m = _FENCE_RE.match(text)
+    return m.group(1).strip() if m else text.strip()
+
+
+def dumps_pretty(obj: Any) -> str:
+    """
+    Indented JSON text for prompts (same layout as json.dumps(indent=2, ensure_ascii=False)),
+    encoded by orjson.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort fix for the ways LLM JSON usually breaks: trailing commas and
+    output truncated mid-object (token limit) — unterminated string, dangling
+    key, missing closing brackets. Returns the input unchanged if nothing to fix.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            # Drop a trailing comma before the closing bracket
+            i = len(out) - 1
+            while i >= 0 and out[i].isspace():
+                i -= 1
+            if i >= 0 and out[i] == ",":
+                del out[i]
+            if stack and stack[-1] == ch:
+                stack.pop()
+        out.append(ch)
+
+    repaired = "".join(out).rstrip()
+    if in_string:
+        if escaped:
+            repaired = repaired[:-1]
+        repaired += '"'
+    while stack:
+        closer = stack.pop()
+        tail_re = _DANGLING_OBJECT_TAIL_RE if closer == "}" else _DANGLING_ARRAY_TAIL_RE
+        repaired = tail_re.sub("", repaired) + closer
+    return repaired
+
+
+def loads_llm_json(content: str) -> Any:
+    """
+    orjson.loads, with one repair_json pass before giving up.
+    Raises the original orjson.JSONDecodeError if the repaired text still doesn't parse.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        repaired = repair_json(content)
+        if repaired == content:
+            raise
+        try:
+            data = orjson.loads(repaired)
+        except orjson.JSONDecodeError:
+            raise e
+        logger.warning("Recovered malformed LLM JSON (%s, %d chars)", e, len(content))
+        return data
+
+
+# HTTP statuses worth retrying: rate limited / transient server errors
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+_T = TypeVar("_T")
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[_T]],
+    is_retryable: Callable[[Exception], bool],
+    context: str,
+    attempts: int = 3,
+    min_wait_s: float = 1.0,
+    max_wait_s: float = 30.0,
+) -> _T:
+    """
+    Await call() up to `attempts` times. Between attempts sleep a random time in
+    [min_wait_s, min(max_wait_s, min_wait_s * 2**attempt)] (exponential backoff + jitter).
+    Non-retryable errors and the last failure are re-raised as-is.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= attempts or not is_retryable(e):
+                raise
+            wait_s = random.uniform(min_wait_s, min(max_wait_s, min_wait_s * 2 ** attempt))
+            logger.warning(
+                "%s call failed (%s), retry %d/%d in %.1fs",
+                context,
+                e,
+                attempt,
+                attempts - 1,
+                wait_s,
+            )
+            await asyncio.sleep(wait_s)
+    raise AssertionError("unreachable")
+
+
+class ResponseCache:
+    """
+    LRU of parsed LLM responses keyed by a blake2b digest of (model, temperature,
+    system, user). Re-parses of the same receipt (upload retries, replays) skip the
+    API call. Values are deep-copied in and out because callers mutate the result.
+    Shared by per-thread event loops (vision workflow) and sync worker threads (Document AI),
+    so the OrderedDict is only touched under a lock; copies are made outside it.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, temperature: float, system_message: str, user_message: str) -> bytes:
+        return hashlib.blake2b(
+            f"{model}|{temperature}|{system_message}|{user_message}".encode("utf-8"),
+            digest_size=16,
+        ).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                return None
+            self._data.move_to_end(key)
+        # Stored values are private copies that are never mutated, so copying unlocked is safe
+        return copy.deepcopy(value)
+
+    def put(self, key: bytes, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -10,20 +10,56 @@ Workflow:
 6. Return final JSON
 """
 from typing import Dict, Any, Optional, List, Tuple
-import json
+import asyncio
 import logging
+import math
 import re
-from ...services.ocr.documentai_client import parse_receipt_documentai
 from ...prompts.prompt_manager import get_merchant_prompt, format_prompt
 from ...prompts.prompt_loader import build_second_round_system_message
-from .gemini_client import parse_receipt_with_gemini, parse_receipt_with_gemini_vision_escalation
-from ...services.database.supabase_client import get_store_chain
+from .gemini_client import (
+    parse_receipt_with_gemini,
+    parse_receipt_with_gemini_vision_escalation,
+    parse_receipts_batch_with_gemini,
+)
+from .gemini_rate_limiter import acquire_gemini_slot
+from .llm_client import parse_receipt_with_llm
+from .llm_common import dumps_pretty
+from ...services.database.supabase_client import get_store_chain, _to_cents as _db_to_cents
+from ...processors.enrichment.address_matcher import build_store_candidate_metadata
 from ...prompts.extraction_rule_manager import get_merchant_extraction_rules, apply_extraction_rules
 from ...services.ocr.ocr_normalizer import normalize_ocr_result, extract_unified_info
 from ...config import settings
 
 logger = logging.getLogger(__name__)
 
+# Price patterns used by _extract_prices_with_regex
+_FP_PRICE_RE = re.compile(r'FP\s+\$(\d+\.\d{2})', re.IGNORECASE)
+_DOLLAR_RE = re.compile(r'\$(\d+\.\d{2})')
+_PLAIN_PRICE_RE = re.compile(r'\b(\d+\.\d{2})\b')
+_HAS_LETTER_RE = re.compile(r'[A-Za-z]')
+# A whole line containing something that could be a price
+_PRICE_LINE_RE = re.compile(r'^[^\n]*\d\.\d\d[^\n]*', re.MULTILINE)
+
+# Lines that never carry an item price: totals, payment, store info, standalone
+# category headers. One anchored alternation, matched case-insensitively.
+_SKIP_RE = re.compile(
+    r'^(?:'
+    r'TOTAL|Subtotal|Tax|Points|Reference|Trans:|Terminal:|CLERK|INVOICE:'
+    r'|AMOUNT|APPROVED|AUTH CODE|APPLICATION'
+    r'|Visa|Mastercard|Credit Card|Customer Copy'
+    r'|STORE:|Ph:|www\.'
+    r'|\d{2}/\d{2}/\d{2}'  # Date
+    r'|\*{3,}'  # Membership number, etc.
+    r'|Not A Member|立即下載|Get Exclusive|Enjoy Online'  # 立即下載: "Download Now"
+    r'|(?:GROCERY|PRODUCE|DELI|FOOD)$'
+    r')',
+    re.IGNORECASE,
+)
+
+# State / province codes for location-based RAG, matched as whole words of an upper-cased address
+_US_STATE_RE = re.compile(r'\b(?:CA|WA|NY|TX|HI|FL|OR|NV|AZ|UT|CO|NM)\b')
+_CA_PROVINCE_RE = re.compile(r'\b(?:BC|ON|QC|AB|MB|SK|NS|NB|NL|PE|YT|NT|NU)\b')
+
 
 async def process_receipt_with_llm_from_ocr(
     ocr_result: Dict[str, Any],
@@ -33,6 +69,7 @@ async def process_receipt_with_llm_from_ocr(
     receipt_id: Optional[str] = None,
     initial_parse_result: Optional[Dict[str, Any]] = None,
     store_in_chain: bool = False,
+    batch_job: Optional["GeminiBatchJob"] = None,
 ) -> Dict[str, Any]:
     """
     Unified LLM processing function that accepts any normalized OCR result.
@@ -48,6 +85,8 @@ async def process_receipt_with_llm_from_ocr(
         receipt_id: Optional receipt ID for database tracking
         initial_parse_result: Optional rule-based extraction result (RBSJ) to guide LLM
         store_in_chain: When True and RBSJ success, feed only RBSJ to LLM (no raw OCR)
+        batch_job: When set, the first LLM pass goes through this Gemini Batch API job
+            (see process_receipts_with_llm_from_ocr_batch) instead of a direct call
         
     Returns:
         Structured receipt data
@@ -85,7 +124,7 @@ async def process_receipt_with_llm_from_ocr(
             merchant_name,
             (store_address[:120] + "..." if store_address and len(store_address) > 120 else store_address),
         )
-        ocr_store_match = get_store_chain(merchant_name, store_address)
+        ocr_store_match = await asyncio.to_thread(get_store_chain, merchant_name, store_address)
         logger.info(
             "[STORE_DEBUG] OCR stage get_store_chain result: matched=%s, chain_id=%s, location_id=%s",
             ocr_store_match.get("matched"),
@@ -117,9 +156,10 @@ async def process_receipt_with_llm_from_ocr(
     logger.info(f"Step 3: Loading prompt for merchant: {merchant_name}")
     # Extract country_code from merchant address if available (for country-specific prompts)
     country_code = None
-    if unified_info.get("merchant_address"):
+    # Upper-cased once for the country heuristic here and the state lookup in Step 4
+    address = (unified_info.get("merchant_address") or "").upper()
+    if address:
         # Try to extract country from address (simple heuristic)
-        address = unified_info.get("merchant_address", "").upper()
         if "CANADA" in address or "BC" in address or "ONTARIO" in address:
             country_code = "CA"
         elif "USA" in address or "US" in address or any(state in address for state in ["CA", "WA", "NY", "TX"]):
@@ -139,29 +179,23 @@ async def process_receipt_with_llm_from_ocr(
     if location_id:
         # Try to get state and country from location_id
         try:
-            from ..database.supabase_client import _get_client
-            supabase = _get_client()
-            location_response = supabase.table("store_locations").select("state, country_code").eq("id", location_id).limit(1).execute()
-            if location_response.data:
-                location_state = location_response.data[0].get("state")
-                location_country = location_response.data[0].get("country_code")
+            from ..database.supabase_client import get_store_location_region
+            location_state, location_country = await asyncio.to_thread(get_store_location_region, location_id)
         except Exception as e:
             logger.warning(f"Failed to get location info for RAG: {e}")
     
     # Also try to extract from unified_info
-    if not location_state and unified_info.get("merchant_address"):
-        address = unified_info.get("merchant_address", "").upper()
-        # Try to extract state from address
-        us_states = ["CA", "WA", "NY", "TX", "HI", "FL", "OR", "NV", "AZ", "UT", "CO", "NM"]
-        ca_provinces = ["BC", "ON", "QC", "AB", "MB", "SK", "NS", "NB", "NL", "PE", "YT", "NT", "NU"]
-        for state in us_states + ca_provinces:
-            if state in address:
-                location_state = state
-                break
-        if any(state in address for state in us_states):
+    if not location_state and address:
+        # Try to extract state from address (US codes take precedence, as before)
+        state_match = _US_STATE_RE.search(address)
+        if state_match:
+            location_state = state_match.group(0)
             location_country = "US"
-        elif any(province in address for province in ca_provinces):
-            location_country = "CA"
+        else:
+            state_match = _CA_PROVINCE_RE.search(address)
+            if state_match:
+                location_state = state_match.group(0)
+                location_country = "CA"
     
     # When store is in chain and we have successful RBSJ, feed only RBSJ to LLM (no raw OCR)
     if store_in_chain and initial_parse_result and initial_parse_result.get("success"):
@@ -175,9 +209,9 @@ async def process_receipt_with_llm_from_ocr(
         user_message = (
             "Convert the following RBSJ into the full receipt schema. Output only valid JSON.\n\n"
             "## RBSJ:\n"
-            + json.dumps(initial_parse_result, ensure_ascii=False, indent=2)
+            + dumps_pretty(initial_parse_result)
             + "\n\n## Output schema (output only JSON):\n"
-            + json.dumps(schema, ensure_ascii=False, indent=2)
+            + dumps_pretty(schema)
         )
         rag_metadata = {"rbsj_only": True}
     else:
@@ -193,38 +227,42 @@ async def process_receipt_with_llm_from_ocr(
             initial_parse_result=initial_parse_result  # Pass initial parse result to prompt
         )
     
-    # Step 5: Call LLM (read corresponding config from environment variables based on llm_provider)
-    model = settings.gemini_model
-    logger.info(f"Calling Gemini LLM: model={model}")
-    llm_result = await parse_receipt_with_gemini(
-        system_message=system_message,
-        user_message=user_message,
-        model=model,
-        temperature=prompt_config.get("temperature", 0.0)
-    )
-    
-    # Step 6: Extract prices from raw_text for validation (not dependent on LLM, not dependent on OCR source)
+    # Step 6 input: extract prices from raw_text for validation (not dependent on LLM, not dependent
+    # on OCR source). Runs in a thread while the LLM call below is in flight.
     line_items = unified_info.get("line_items", [])
-    extracted_line_totals = extract_line_totals_from_raw_text(
-        raw_text=raw_text,
-        unified_line_items=line_items,  # Normalized line_items (from any OCR), use if available; otherwise fallback to regex
-        merchant_name=merchant_name,
-        chain_id=chain_id  # Pass chain_id for tag-based extraction rules
+    extraction_task = asyncio.create_task(
+        asyncio.to_thread(
+            extract_line_totals_from_raw_text,
+            raw_text=raw_text,
+            unified_line_items=line_items,  # Normalized line_items (from any OCR), use if available; otherwise fallback to regex
+            merchant_name=merchant_name,
+            chain_id=chain_id,  # Pass chain_id for tag-based extraction rules
+        )
     )
-    
-    # Step 7: Backend mathematical validation (unified validation logic, not dependent on OCR)
-    logger.info("Step 6: Performing backend mathematical validation...")
-    llm_result = _validate_llm_result(llm_result, extracted_line_totals=extracted_line_totals)
-    _detect_cc_rewards_and_fix_totals(llm_result)
 
-    # Step 8: Try to match store again using LLM-extracted data (second attempt)
-    # LLM may extract more accurate merchant_name and address
-    llm_chain_id = chain_id  # Start with OCR match result
-    llm_location_id = location_id
-    llm_suggested_chain_id = ocr_suggested_chain_id
-    llm_suggested_location_id = ocr_suggested_location_id
-    llm_confidence_score = ocr_confidence_score
-    llm_matched = ocr_matched
+    # Step 5: Call LLM (read corresponding config from environment variables based on llm_provider)
+    model = settings.gemini_model
+    llm_result = None
+    try:
+        if settings.trusted_hints_fast_path_enabled:
+            llm_result = _result_from_trusted_hints(trusted_hints, line_items)
+        if llm_result is not None:
+            logger.info("OCR hints and line items are complete and sum to the total, skipping LLM call")
+            llm_provider = "skipped_trusted_hints"
+        elif batch_job is not None:
+            llm_result = await batch_job.submit(
+                system_message, user_message, model, prompt_config.get("temperature", 0.0)
+            )
+        else:
+            llm_result = await parse_receipt_with_gemini(
+                system_message=system_message,
+                user_message=user_message,
+                model=model,
+                temperature=prompt_config.get("temperature", 0.0)
+            )
+    except BaseException:
+        extraction_task.cancel()
+        raise
     
     # Extract merchant info from LLM result (need address for store match so we don't fall back to wrong location)
     llm_merchant_name = None
@@ -258,15 +296,46 @@ async def process_receipt_with_llm_from_ocr(
                 (llm_merchant_address[:120] + "..." if llm_merchant_address and len(llm_merchant_address) > 120 else llm_merchant_address),
             )
 
-    # If LLM extracted merchant info, try matching again (LLM may be more accurate)
-    # Always retry with LLM data if available, even if OCR matched (LLM might have better info)
-    if llm_merchant_name:
+    # Start the LLM-stage store lookup (Step 8) now: it runs in a thread while Steps 6-7 validate.
+    # Neither step touches receipt.merchant_name / address.
+    llm_store_task = None
+    if llm_merchant_name and ocr_matched and _same_store_query(
+        llm_merchant_name, llm_merchant_address, merchant_name, store_address
+    ):
+        # Same (normalized) query that already matched in the OCR stage: the result would be identical
+        logger.info("[STORE_DEBUG] LLM stage: merchant name/address same as OCR stage match, reusing it")
+    elif llm_merchant_name:
         logger.info(
             "[STORE_DEBUG] LLM stage calling get_store_chain: merchant_name=%r, address=%r",
             llm_merchant_name,
             (llm_merchant_address[:120] + "..." if llm_merchant_address and len(llm_merchant_address) > 120 else llm_merchant_address),
         )
-        llm_store_match = get_store_chain(llm_merchant_name, llm_merchant_address)
+        llm_store_task = asyncio.create_task(
+            asyncio.to_thread(get_store_chain, llm_merchant_name, llm_merchant_address)
+        )
+    
+    # Step 6: prices from raw_text for validation, started before Step 5 (see extraction_task)
+    extracted_line_totals = await extraction_task
+    
+    # Step 7: Backend mathematical validation (unified validation logic, not dependent on OCR)
+    logger.info("Step 6: Performing backend mathematical validation...")
+    llm_result = _validate_llm_result(llm_result, extracted_line_totals=extracted_line_totals)
+    _detect_cc_rewards_and_fix_totals(llm_result)
+
+    # Step 8: Try to match store again using LLM-extracted data (second attempt)
+    # LLM may extract more accurate merchant_name and address
+    llm_chain_id = chain_id  # Start with OCR match result
+    llm_location_id = location_id
+    llm_suggested_chain_id = ocr_suggested_chain_id
+    llm_suggested_location_id = ocr_suggested_location_id
+    llm_confidence_score = ocr_confidence_score
+    llm_matched = ocr_matched
+    
+    # If LLM extracted merchant info, try matching again (LLM may be more accurate), even if OCR
+    # matched. Skipped (llm_store_task is None) when the LLM name/address normalize to the same
+    # query that already matched in the OCR stage (_same_store_query): the OCR match is kept.
+    if llm_store_task is not None:
+        llm_store_match = await llm_store_task
         logger.info(
             "[STORE_DEBUG] LLM stage get_store_chain result: matched=%s, chain_id=%s, location_id=%s",
             llm_store_match.get("matched"),
@@ -335,12 +404,16 @@ async def process_receipt_with_llm_from_ocr(
     )
     if need_store_candidate:
         from ..database.supabase_client import create_store_candidate
+        # Parse address once here and persist with output_payload so later candidate writes reuse it
+        store_candidate_metadata = build_store_candidate_metadata(llm_result.get("receipt", {}))
+        llm_result["_metadata"]["store_candidate_metadata"] = store_candidate_metadata
         try:
-            create_store_candidate(
+            await asyncio.to_thread(
+                create_store_candidate,
                 chain_name=final_merchant_name,
                 receipt_id=receipt_id,
                 source="llm",
-                llm_result=llm_result,
+                metadata=store_candidate_metadata,
                 suggested_chain_id=llm_suggested_chain_id or final_chain_id,
                 suggested_location_id=llm_suggested_location_id,
                 confidence_score=llm_confidence_score
@@ -358,36 +431,248 @@ async def process_receipt_with_llm_from_ocr(
     return llm_result
 
 
-def _extract_trusted_hints(docai_result: Dict[str, Any], confidence_threshold: float = 0.95) -> Dict[str, Any]:
+class GeminiBatchJob:
     """
-    Extract high-confidence fields from Document AI result.
-    
-    Args:
-        docai_result: Result returned by Document AI
-        confidence_threshold: Confidence threshold (default 0.95)
-        
+    Collects the first-pass prompts of a known number of concurrent
+    process_receipt_with_llm_from_ocr calls and sends them as Gemini Batch API jobs
+    (one per (model, temperature)) once every receipt has either submitted or withdrawn.
+    Receipts the batch job could not parse are retried with a direct call.
+    """
+
+    def __init__(self, expected: int):
+        self._expected = expected
+        self._pending: List[Tuple[str, str, str, float, asyncio.Future]] = []
+        self._submitted: set = set()
+        self._inflight: set = set()
+
+    async def submit(
+        self,
+        system_message: str,
+        user_message: str,
+        model: str,
+        temperature: float,
+    ) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._submitted.add(asyncio.current_task())
+        self._pending.append((system_message, user_message, model, temperature, future))
+        self._maybe_dispatch()
+        return await future
+
+    def release(self) -> None:
+        """
+        Called from each receipt's task when its pipeline ends. If it never reached
+        submit() (failed earlier), stop waiting for it so the others can go out.
+        """
+        task = asyncio.current_task()
+        if task in self._submitted:
+            self._submitted.discard(task)
+            return
+        self._expected -= 1
+        self._maybe_dispatch()
+
+    def _maybe_dispatch(self) -> None:
+        if not self._pending or len(self._pending) < self._expected:
+            return
+        pending, self._pending = self._pending, []
+        self._expected -= len(pending)
+        groups: Dict[Tuple[str, float], List[Tuple[str, str, asyncio.Future]]] = {}
+        for system_message, user_message, model, temperature, future in pending:
+            groups.setdefault((model, temperature), []).append((system_message, user_message, future))
+        for key, group in groups.items():
+            task = asyncio.create_task(self._dispatch(key, group))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(
+        self,
+        key: Tuple[str, float],
+        group: List[Tuple[str, str, asyncio.Future]],
+    ) -> None:
+        model, temperature = key
+        try:
+            results = await parse_receipts_batch_with_gemini(
+                [(system_message, user_message) for system_message, user_message, _ in group],
+                model=model,
+                temperature=temperature,
+            )
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (system_message, user_message, future), result in zip(group, results):
+            if result is None:
+                try:
+                    result = await parse_receipt_with_gemini(
+                        system_message=system_message,
+                        user_message=user_message,
+                        model=model,
+                        temperature=temperature,
+                    )
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+            if not future.done():
+                future.set_result(result)
+
+
+async def process_receipts_with_llm_from_ocr_batch(
+    ocr_results: List[Dict[str, Any]],
+    receipt_ids: Optional[List[Optional[str]]] = None,
+    ocr_provider: str = "unknown",
+    llm_provider: str = "gemini",
+) -> List[Any]:
+    """
+    Offline/bulk variant of process_receipt_with_llm_from_ocr: runs the whole pipeline
+    for every OCR result, but the first LLM pass of all receipts is sent as Gemini
+    Batch API jobs (about half the cost, no per-minute quota; results can take
+    minutes to hours). Not for interactive uploads.
+
     Returns:
-        Dictionary of high-confidence fields
+        One entry per input, in input order: the structured receipt data, or the
+        exception raised for that receipt.
     """
-    trusted_hints = {}
-    entities = docai_result.get("entities", {})
-    
-    for entity_type, entity_data in entities.items():
-        confidence = entity_data.get("confidence")
-        value = entity_data.get("value")
-        
-        if confidence is not None and confidence >= confidence_threshold and value is not None:
-            # Map to standard field name
-            mapped_key = _map_entity_to_standard_field(entity_type)
-            if mapped_key:
-                trusted_hints[mapped_key] = {
-                    "value": value,
-                    "confidence": confidence,
-                    "source": "documentai"
-                }
-    
-    logger.info(f"Extracted {len(trusted_hints)} trusted hints (confidence >= {confidence_threshold})")
-    return trusted_hints
+    receipt_ids = receipt_ids or [None] * len(ocr_results)
+    batch_job = GeminiBatchJob(expected=len(ocr_results))
+
+    async def _one(ocr_result: Dict[str, Any], receipt_id: Optional[str]) -> Dict[str, Any]:
+        try:
+            return await process_receipt_with_llm_from_ocr(
+                ocr_result,
+                ocr_provider=ocr_provider,
+                llm_provider=llm_provider,
+                receipt_id=receipt_id,
+                batch_job=batch_job,
+            )
+        finally:
+            batch_job.release()
+
+    return await asyncio.gather(
+        *(_one(ocr_result, receipt_id) for ocr_result, receipt_id in zip(ocr_results, receipt_ids)),
+        return_exceptions=True,
+    )
+
+
+
+async def process_receipts_with_llm_from_ocr_concurrently(
+    ocr_results: List[Dict[str, Any]],
+    receipt_ids: Optional[List[Optional[str]]] = None,
+    ocr_provider: str = "unknown",
+    llm_provider: str = "gemini",
+    concurrency: Optional[int] = None,
+) -> List[Any]:
+    """
+    Run process_receipt_with_llm_from_ocr for many OCR results with up to `concurrency`
+    (default settings.llm_batch_concurrency) receipts in flight. Each receipt takes a
+    Gemini per-minute slot first, as in process_bulk_receipts.
+
+    Returns:
+        One entry per input, in input order: the structured receipt data, or the
+        exception raised for that receipt.
+    """
+    receipt_ids = receipt_ids or [None] * len(ocr_results)
+    semaphore = asyncio.Semaphore(concurrency or settings.llm_batch_concurrency)
+
+    async def _one(ocr_result: Dict[str, Any], receipt_id: Optional[str]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                await acquire_gemini_slot()
+            except (RuntimeError, TimeoutError) as e:
+                logger.warning("Gemini still unavailable after waiting: %s", e)
+            return await process_receipt_with_llm_from_ocr(
+                ocr_result,
+                ocr_provider=ocr_provider,
+                llm_provider=llm_provider,
+                receipt_id=receipt_id,
+            )
+
+    return await asyncio.gather(
+        *(_one(ocr_result, receipt_id) for ocr_result, receipt_id in zip(ocr_results, receipt_ids)),
+        return_exceptions=True,
+    )
+
+
+# Document AI entity_type -> standard receipt field name
+_ENTITY_TO_STANDARD_FIELD: Dict[str, str] = {
+    "supplier_name": "merchant_name",
+    "merchant_name": "merchant_name",
+    "supplier_address": "merchant_address",
+    "supplier_phone": "merchant_phone",
+    "supplier_city": "merchant_city",
+    "receipt_date": "purchase_date",
+    "transaction_date": "purchase_date",
+    "purchase_time": "purchase_time",
+    # net_amount is the pre-tax amount, never the total; it is left out on purpose
+    "total_amount": "total",
+    "subtotal_amount": "subtotal",
+    "tax_amount": "tax",
+    "total_tax_amount": "tax",
+    "payment_type": "payment_method",
+    "card_number": "card_last4",
+    "credit_card_last_four_digits": "card_last4",
+    "currency": "currency",
+}
+
+# receipt fields the trusted-hints fast path must have before it may skip the LLM
+_FAST_PATH_AMOUNT_FIELDS = ("subtotal", "tax", "total")
+_FAST_PATH_REQUIRED_FIELDS = ("merchant_name", "purchase_date") + _FAST_PATH_AMOUNT_FIELDS
+
+
+def _to_cents(value: Any) -> Optional[int]:
+    """
+    Dollar amount (number or "$1,234.56" string) -> integer cents; None if unparseable.
+    Rounds through supabase_client._to_cents so the fast path matches what gets saved.
+    """
+    if isinstance(value, str):
+        value = value.replace("$", "").replace(",", "").strip()
+    return _db_to_cents(value)
+
+
+def _result_from_trusted_hints(
+    trusted_hints: Dict[str, Any],
+    line_items: List[Dict[str, Any]],
+    tolerance: int = 3,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build an LLM-shaped result (amounts in cents) straight from OCR output, or None
+    when the LLM is still needed: a required field (subtotal, tax and total included) is
+    missing from trusted_hints, any line item lacks a line_total, line totals don't sum to
+    the subtotal, or subtotal + tax doesn't match the total (all within tolerance cents).
+    """
+    receipt: Dict[str, Any] = {}
+    for entity_type, hint in trusted_hints.items():
+        field = _ENTITY_TO_STANDARD_FIELD.get(entity_type)
+        if field and field not in receipt:
+            receipt[field] = hint.get("value")
+    for field in _FAST_PATH_AMOUNT_FIELDS:
+        if field in receipt:
+            receipt[field] = _to_cents(receipt[field])
+    if any(receipt.get(field) is None for field in _FAST_PATH_REQUIRED_FIELDS) or not line_items:
+        return None
+
+    items = []
+    for line_item in line_items:
+        line_total = _to_cents(line_item.get("line_total"))
+        if line_total is None:
+            return None
+        unit_price = line_item.get("unit_price")
+        items.append({
+            "raw_text": line_item.get("raw_text", ""),
+            "product_name": line_item.get("product_name"),
+            "quantity": line_item.get("quantity"),
+            "unit": line_item.get("unit"),
+            "unit_price": _to_cents(unit_price) if unit_price is not None else None,
+            "line_total": line_total,
+            "is_on_sale": line_item.get("is_on_sale", False),
+            "category": line_item.get("category"),
+        })
+    if abs(receipt["subtotal"] + receipt["tax"] - receipt["total"]) > tolerance:
+        return None
+    if abs(sum(item["line_total"] for item in items) - receipt["subtotal"]) > tolerance:
+        return None
+
+    return {"receipt": receipt, "items": items, "tbd": {}}
 
 
 def _is_costco_usa_receipt(llm_result: Dict[str, Any]) -> bool:
@@ -506,7 +791,7 @@ async def run_store_second_round(
             instruction = (
                 system_message
                 + "\n\nFIRST PASS RESULT (re-read the receipt image above and correct this JSON as needed):\n"
-                + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+                + dumps_pretty(first_llm_result)
             )
             second_result, _ = await parse_receipt_with_gemini_vision_escalation(
                 image_bytes=image_bytes,
@@ -515,7 +800,7 @@ async def run_store_second_round(
                 mime_type=mime_type,
             )
         elif llm_provider.lower() == "gemini":
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
             second_result = await parse_receipt_with_gemini(
                 system_message=system_message,
                 user_message=user_message,
@@ -523,8 +808,8 @@ async def run_store_second_round(
                 temperature=0.0,
             )
         else:
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
-            second_result = parse_receipt_with_llm(
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
+            second_result = await parse_receipt_with_llm(
                 system_message=system_message,
                 user_message=user_message,
                 model=model,
@@ -577,7 +862,7 @@ async def run_costco_second_round(
             instruction = (
                 system_message
                 + "\n\nFIRST PASS RESULT (re-read the receipt image above and correct this JSON as needed):\n"
-                + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+                + dumps_pretty(first_llm_result)
             )
             second_result, _ = await parse_receipt_with_gemini_vision_escalation(
                 image_bytes=image_bytes,
@@ -586,7 +871,7 @@ async def run_costco_second_round(
                 mime_type=mime_type,
             )
         elif llm_provider.lower() == "gemini":
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
             second_result = await parse_receipt_with_gemini(
                 system_message=system_message,
                 user_message=user_message,
@@ -594,8 +879,8 @@ async def run_costco_second_round(
                 temperature=0.0,
             )
         else:
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
-            second_result = parse_receipt_with_llm(
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
+            second_result = await parse_receipt_with_llm(
                 system_message=system_message,
                 user_message=user_message,
                 model=model,
@@ -649,7 +934,7 @@ async def run_trader_joes_second_round(
             instruction = (
                 system_message
                 + "\n\nFIRST PASS RESULT (re-read the receipt image above and correct this JSON as needed):\n"
-                + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+                + dumps_pretty(first_llm_result)
             )
             second_result, _ = await parse_receipt_with_gemini_vision_escalation(
                 image_bytes=image_bytes,
@@ -658,7 +943,7 @@ async def run_trader_joes_second_round(
                 mime_type=mime_type,
             )
         elif llm_provider.lower() == "gemini":
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
             second_result = await parse_receipt_with_gemini(
                 system_message=system_message,
                 user_message=user_message,
@@ -666,8 +951,8 @@ async def run_trader_joes_second_round(
                 temperature=0.0,
             )
         else:
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
-            second_result = parse_receipt_with_llm(
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
+            second_result = await parse_receipt_with_llm(
                 system_message=system_message,
                 user_message=user_message,
                 model=model,
@@ -718,7 +1003,7 @@ async def run_whole_foods_second_round(
             instruction = (
                 system_message
                 + "\n\nFIRST PASS RESULT (re-read the receipt image above and correct this JSON as needed):\n"
-                + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+                + dumps_pretty(first_llm_result)
             )
             second_result, _ = await parse_receipt_with_gemini_vision_escalation(
                 image_bytes=image_bytes,
@@ -727,7 +1012,7 @@ async def run_whole_foods_second_round(
                 mime_type=mime_type,
             )
         elif llm_provider.lower() == "gemini":
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
             second_result = await parse_receipt_with_gemini(
                 system_message=system_message,
                 user_message=user_message,
@@ -735,8 +1020,8 @@ async def run_whole_foods_second_round(
                 temperature=0.0,
             )
         else:
-            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + json.dumps(first_llm_result, ensure_ascii=False, indent=2)
-            second_result = parse_receipt_with_llm(
+            user_message = SECOND_ROUND_USER_MESSAGE_PREFIX + dumps_pretty(first_llm_result)
+            second_result = await parse_receipt_with_llm(
                 system_message=system_message,
                 user_message=user_message,
                 model=model,
@@ -844,18 +1129,19 @@ def _validate_llm_result(
     # Validation 1: Each item's quantity × unit_price ≈ line_total
     for item in items:
         line_total = item.get("line_total")
-        quantity = item.get("quantity")
-        unit_price = item.get("unit_price")
+        if line_total is None:
+            continue
         
-        # If line_total exists, accumulate to total
-        if line_total is not None:
-            calculated_total += float(line_total)
+        # line_total exists: accumulate to total
+        actual_total = float(line_total)
+        calculated_total += actual_total
         
         # If quantity and unit_price both exist, validate calculation
-        if quantity is not None and unit_price is not None and line_total is not None:
+        quantity = item.get("quantity")
+        unit_price = item.get("unit_price")
+        if quantity is not None and unit_price is not None:
             # All in cents: quantity may be decimal (e.g. 1.5), unit_price and line_total in cents
             expected_total = float(quantity) * float(unit_price)
-            actual_total = float(line_total)
             difference = abs(expected_total - actual_total)
 
             if difference > tolerance:
@@ -879,10 +1165,9 @@ def _validate_llm_result(
                 )
     
     # Update items_with_inconsistent_price (merge LLM detected and backend validated)
-    existing_errors = {err.get("product_name"): err for err in tbd["items_with_inconsistent_price"]}
+    existing_names = {err.get("product_name") for err in tbd["items_with_inconsistent_price"]}
     for error in validation_errors:
-        product_name = error.get("product_name")
-        if product_name not in existing_errors:
+        if error["product_name"] not in existing_names:
             tbd["items_with_inconsistent_price"].append(error)
     
     # Validation 2: Sum validation
@@ -894,7 +1179,7 @@ def _validate_llm_result(
         # If prices extracted from raw_text are provided, also compare
         if extracted_line_totals:
             # extracted_line_totals from raw text are in dollars; documented_total is in cents
-            extracted_total_dollars = sum(extracted_line_totals)
+            extracted_total_dollars = math.fsum(extracted_line_totals)
             extracted_total_cents = round(extracted_total_dollars * 100)
             extracted_diff = abs(extracted_total_cents - documented_total)
 
@@ -1019,6 +1304,22 @@ def extract_line_totals_from_raw_text(
     return line_totals
 
 
+def _same_store_query(
+    name_a: str, address_a: Optional[str], name_b: str, address_b: Optional[str]
+) -> bool:
+    """True if get_store_chain would see the same key for both (lower/strip name, whitespace-collapsed lower address)."""
+    return (
+        name_a.lower().strip() == name_b.lower().strip()
+        and " ".join((address_a or "").lower().split()) == " ".join((address_b or "").lower().split())
+    )
+
+
+def _is_tnt_merchant(merchant_name: Optional[str]) -> bool:
+    """True if merchant_name looks like T&T Supermarket (same patterns as clean_tnt_receipt_items)."""
+    name = (merchant_name or "").lower()
+    return any(pattern in name for pattern in ("t&t", "t & t", "tnt", "t and t"))
+
+
 def _extract_prices_with_regex(raw_text: str, merchant_name: Optional[str] = None) -> List[float]:
     """
     Extract item prices from raw_text using regex.
@@ -1042,91 +1343,46 @@ def _extract_prices_with_regex(raw_text: str, merchant_name: Optional[str] = Non
     We prioritize matching "FP $X.XX" format as it's most reliable.
     """
     # First match all "FP $X.XX" format in entire text (most reliable)
-    fp_prices = []
-    fp_matches = re.finditer(r'FP\s+\$(\d+\.\d{2})', raw_text, re.IGNORECASE)
-    for match in fp_matches:
-        price = float(match.group(1))
-        fp_prices.append(price)
+    fp_prices = [float(price) for price in _FP_PRICE_RE.findall(raw_text)]
     
-    # If found enough FP prices (at least 3), use directly
-    if len(fp_prices) >= 3:
+    # If found enough FP prices (at least 3), use directly. T&T prints every item
+    # total as "FP $X.XX", so for a known T&T receipt any FP price is enough.
+    if len(fp_prices) >= 3 or (fp_prices and _is_tnt_merchant(merchant_name)):
         logger.info(f"Found {len(fp_prices)} FP prices, using them directly")
         return fp_prices
     
-    # Otherwise, analyze line by line (fallback)
-    lines = raw_text.split('\n')
-    prices = []
+    # Otherwise, analyze line by line (fallback). Every price format below contains
+    # "d.dd", so only lines with one are visited; the rest are skipped inside the regex scan.
+    # Prices are deduplicated as they are found, FP prices first, keyed on integer cents
+    # (every price comes from "d.dd" text, so c / 100 round-trips exactly).
+    unique_cents = dict.fromkeys(int(price * 100 + 0.5) for price in fp_prices)
+    other_count = 0
     
-    # Define patterns to skip
-    skip_patterns = [
-        r'^TOTAL',
-        r'^Subtotal',
-        r'^Tax',
-        r'^Points',
-        r'^Reference',
-        r'^Trans:',
-        r'^Terminal:',
-        r'^CLERK',
-        r'^INVOICE:',
-        r'^REFERENCE:',
-        r'^AMOUNT',
-        r'^APPROVED',
-        r'^AUTH CODE',
-        r'^APPLICATION',
-        r'^Visa',
-        r'^VISA',
-        r'^Mastercard',
-        r'^Credit Card',
-        r'^CREDIT CARD',
-        r'^Customer Copy',
-        r'^STORE:',
-        r'^Ph:',
-        r'^www\.',
-        r'^\d{2}/\d{2}/\d{2}',  # Date
-        r'^\*{3,}',  # Membership number, etc.
-        r'^Not A Member',
-        r'^立即下載',  # Chinese text: "Download Now"
-        r'^Get Exclusive',
-        r'^Enjoy Online',
-        r'^GROCERY$',  # Standalone category identifier line
-        r'^PRODUCE$',
-        r'^DELI$',
-        r'^FOOD$',
-    ]
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+    for line_match in _PRICE_LINE_RE.finditer(raw_text):
+        line = line_match.group(0).strip()
         
         # Skip obvious non-item lines
-        should_skip = False
-        for pattern in skip_patterns:
-            if re.match(pattern, line, re.IGNORECASE):
-                should_skip = True
-                break
-        
-        if should_skip:
+        if _SKIP_RE.match(line):
             continue
         
         # Try to match price
         line_price = None
         
         # Prioritize matching FP format (T&T)
-        fp_match = re.search(r'FP\s+\$(\d+\.\d{2})', line, re.IGNORECASE)
+        fp_match = _FP_PRICE_RE.search(line)
         if fp_match:
             line_price = float(fp_match.group(1))
         else:
             # Match generic $X.XX format
-            dollar_matches = list(re.finditer(r'\$(\d+\.\d{2})', line))
+            dollar_matches = list(_DOLLAR_RE.finditer(line))
             if dollar_matches:
                 # If multiple prices, take the last one (usually line total)
                 line_price = float(dollar_matches[-1].group(1))
             else:
                 # Try to match unsigned price (but needs more context judgment)
                 # Only match lines that look like item lines (contain letters and numbers)
-                if re.search(r'[A-Za-z]', line):  # Contains letters, might be item name
-                    plain_matches = list(re.finditer(r'\b(\d+\.\d{2})\b', line))
+                if _HAS_LETTER_RE.search(line):  # Contains letters, might be item name
+                    plain_matches = list(_PLAIN_PRICE_RE.finditer(line))
                     if plain_matches:
                         # Take the last one, but need to validate range (item prices usually 0.01 - 999.99)
                         candidate = float(plain_matches[-1].group(1))
@@ -1134,45 +1390,11 @@ def _extract_prices_with_regex(raw_text: str, merchant_name: Optional[str] = Non
                             line_price = candidate
         
         if line_price is not None:
-            prices.append(line_price)
+            other_count += 1
+            unique_cents.setdefault(int(line_price * 100 + 0.5))
     
-    # Merge FP prices and other prices, deduplicate
-    all_prices = fp_prices + prices
-    unique_prices = []
-    seen = set()
-    for price in all_prices:
-        # Use rounding to cents for deduplication
-        rounded = round(price, 2)
-        if rounded not in seen:
-            seen.add(rounded)
-            unique_prices.append(price)
+    unique_prices = [c / 100 for c in unique_cents]
     
-    logger.info(f"Extracted {len(unique_prices)} prices from raw_text using regex (FP: {len(fp_prices)}, other: {len(prices)})")
+    logger.info(f"Extracted {len(unique_prices)} prices from raw_text using regex (FP: {len(fp_prices)}, other: {other_count})")
     return unique_prices
 
-
-def _map_entity_to_standard_field(entity_type: str) -> Optional[str]:
-    """
-    Map Document AI's entity_type to standard field names.
-    """
-    mapping = {
-        "supplier_name": "merchant_name",
-        "merchant_name": "merchant_name",
-        "supplier_address": "merchant_address",
-        "supplier_phone": "merchant_phone",
-        "supplier_city": "merchant_city",
-        "receipt_date": "purchase_date",
-        "transaction_date": "purchase_date",
-        "purchase_time": "purchase_time",
-        "total_amount": "total",
-        "net_amount": "total",
-        "subtotal_amount": "subtotal",
-        "tax_amount": "tax",
-        "total_tax_amount": "tax",
-        "payment_type": "payment_method",
-        "card_number": "card_last4",
-        "credit_card_last_four_digits": "card_last4",
-        "currency": "currency",
-    }
-    
-    return mapping.get(entity_type)
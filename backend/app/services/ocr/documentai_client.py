@@ -4,40 +4,140 @@ Google Cloud Document AI client for parsing receipts.
 Uses Expense Parser processor to extract structured receipt information.
 """
 from ...config import settings
+from ..llm.llm_common import ResponseCache, call_with_retry
 from .gcp_credentials import get_gcp_credentials
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List, TYPE_CHECKING
+import math
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, Any, Optional, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from google.cloud import documentai
 
 logger = logging.getLogger(__name__)
 
+# projects/<n>/locations/<loc>/processors/<id> inside a DOCUMENTAI_ENDPOINT URL
+_PROCESSOR_NAME_RE = re.compile(r'projects/(\d+)/locations/([^/]+)/processors/([^/:]+)')
+# Everything but digits and '.', stripped from amount strings ("$1,234.56" -> "1234.56")
+_AMOUNT_CLEAN_RE = re.compile(r'[^\d.]')
+
+# Line patterns for _reconstruct_line_items_from_text
+# The product name group ends on a non-space character so it can't trade a run of spaces back
+# and forth with the \s+ after it (quadratic backtracking on long lines). The lazy name never
+# ended on a space anyway, so matches are unchanged.
+# Pattern 1: Product name + "FP $price"
+_FP_ITEM_RE = re.compile(r'^([^$]*?[^$\s])\s+FP\s+\$?(\d+\.\d{2})$', re.IGNORECASE)
+# Pattern 2: Product name + "quantity unit @ $unit_price/unit" + "FP $total_price"
+_QTY_FP_ITEM_RE = re.compile(
+    r'^([^0-9$]*?[^0-9$\s])\s+(\d+\.?\d*)\s*(lb|kg|oz|g|ea|pcs?|ct)\s*@\s+\$?(\d+\.\d{2})/(?:lb|kg|oz|g|ea|pcs?|ct)\s+FP\s+\$?(\d+\.\d{2})$',
+    re.IGNORECASE
+)
+# Pattern 3: "(SALE) product name" + price information
+_SALE_RE = re.compile(r'^\(SALE\)\s*(.+)$', re.IGNORECASE)
+# "quantity unit @ $unit_price/" on the line after a pattern-1 match
+_QTY_UNIT_RE = re.compile(r'(\d+\.?\d*)\s*(lb|kg|oz|g|ea|pcs?|ct)\s*@\s+\$?(\d+\.\d{2})/', re.IGNORECASE)
+_PRICE_RE = re.compile(r'\$?(\d+\.\d{2})')
+
 # Document AI client instance
 _client = None
+# The sync client can be first requested from several worker threads at once
+_client_lock = threading.Lock()
+# Async client for request handlers (awaits the RPC instead of blocking the event loop)
+_async_client = None
+# Caps in-flight async calls so concurrent uploads stay within the processor's QPS quota
+_semaphore: Optional[asyncio.Semaphore] = None
 _processor_name: Optional[str] = None
 
+# Document fields _extract_receipt_data / _extract_coordinate_data read. Everything else
+# (pages.image echoes the uploaded image back, symbols, visual elements, tables, ...) is left
+# out of the response to save transfer and protobuf decoding.
+_RESPONSE_FIELDS = (
+    "text",
+    "entities",
+    "pages.dimension",
+    "pages.lines",
+    "pages.tokens",
+    "pages.paragraphs",
+    "pages.blocks",
+)
+
+# Parsed results keyed by a digest of (processor, mime type, image bytes): re-uploads of the
+# same receipt (client retries, duplicate submissions) skip the RPC and all post-processing.
+# Kept small: each entry carries the full coordinate_data (often MBs) and is deep-copied on
+# every get/put; duplicate uploads arrive close together, so a short window is enough.
+_parse_cache = ResponseCache(maxsize=16)
+
+
+def _parse_cache_key(image_bytes: bytes, mime_type: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{_get_processor_name()}|{mime_type}|".encode("utf-8"))
+    h.update(image_bytes)
+    return h.digest()
+
+
+def _import_documentai():
+    """Lazy import to avoid import errors at startup."""
+    try:
+        from google.cloud import documentai
+    except ImportError as e:
+        raise ImportError(
+            "google-cloud-documentai package is not installed. "
+            "Please install it with: pip install google-cloud-documentai"
+        ) from e
+    return documentai
+
 
 def _get_client():
     """Get or create Document AI client (lazy import)."""
     global _client
-    if _client is None:
-        # Lazy import to avoid import errors at startup
-        try:
-            from google.cloud import documentai
-        except ImportError as e:
-            raise ImportError(
-                "google-cloud-documentai package is not installed. "
-                "Please install it with: pip install google-cloud-documentai"
-            ) from e
-        
-        credentials = get_gcp_credentials()
-        _client = documentai.DocumentProcessorServiceClient(credentials=credentials)
-        logger.info("Google Cloud Document AI client initialized")
+    if _client is not None:
+        return _client
+    
+    with _client_lock:
+        # Double-check after acquiring lock
+        if _client is None:
+            documentai = _import_documentai()
+            credentials = get_gcp_credentials()
+            _client = documentai.DocumentProcessorServiceClient(
+                credentials=credentials, client_options=_client_options()
+            )
+            logger.info("Google Cloud Document AI client initialized")
     
     return _client
 
 
+def _get_async_client():
+    """Get or create the async Document AI client and its concurrency semaphore (lazy import)."""
+    global _async_client, _semaphore
+    if _async_client is None:
+        documentai = _import_documentai()
+        credentials = get_gcp_credentials()
+        _async_client = documentai.DocumentProcessorServiceAsyncClient(
+            credentials=credentials, client_options=_client_options()
+        )
+        _semaphore = asyncio.Semaphore(settings.documentai_max_concurrency)
+        logger.info("Google Cloud Document AI async client initialized")
+    
+    return _async_client
+
+
+def _client_options() -> Dict[str, Any]:
+    """
+    Point the client at the processor's regional endpoint (<location>-documentai.googleapis.com).
+    The global endpoint only serves "us" processors; for "us" the regional host also skips the
+    front-end routing hop on every call.
+    """
+    match = _PROCESSOR_NAME_RE.search(_get_processor_name())
+    if not match:
+        return {}
+    return {"api_endpoint": f"{match.group(2)}-documentai.googleapis.com"}
+
+
 def _get_processor_name() -> str:
     """Get processor name."""
     global _processor_name
@@ -46,8 +146,7 @@ def _get_processor_name() -> str:
             # Extract processor name from endpoint URL
             # Example: https://us-documentai.googleapis.com/v1/projects/891554344619/locations/us/processors/8f8a3fc3da6da7cc:process
             # Extract: projects/891554344619/locations/us/processors/8f8a3fc3da6da7cc
-            import re
-            match = re.search(r'projects/(\d+)/locations/([^/]+)/processors/([^/:]+)', settings.documentai_endpoint)
+            match = _PROCESSOR_NAME_RE.search(settings.documentai_endpoint)
             if match:
                 _processor_name = f"projects/{match.group(1)}/locations/{match.group(2)}/processors/{match.group(3)}"
             else:
@@ -62,9 +161,133 @@ def _get_processor_name() -> str:
     return _processor_name
 
 
+# Phone photos (8-12 MP) are re-encoded before upload. They are scaled down to a pixel budget
+# (same long edge as the vision path's IMAGE_TARGET_LONG_EDGE on a square photo) but the short
+# edge is never taken below _DOWNSAMPLE_MIN_SHORT_EDGE: long, narrow grocery receipts keep the
+# width their 40-column lines need for OCR. PDFs and multi-frame formats (TIFF/GIF) are sent as-is.
+_DOWNSAMPLE_MIN_BYTES = 512 * 1024
+_DOWNSAMPLE_MAX_PIXELS = 2000 * 2000
+_DOWNSAMPLE_MIN_SHORT_EDGE = 1000
+_DOWNSAMPLE_JPEG_QUALITY = 85
+_DOWNSAMPLE_MIME_TYPES = frozenset({"image/jpeg", "image/jpg", "image/png", "image/webp"})
+
+
+def _downsample_size(width: int, height: int) -> Optional[Tuple[int, int]]:
+    """Target (width, height) within _DOWNSAMPLE_MAX_PIXELS, or None if the image stays as is."""
+    scale = math.sqrt(_DOWNSAMPLE_MAX_PIXELS / (width * height))
+    scale = max(scale, _DOWNSAMPLE_MIN_SHORT_EDGE / min(width, height))
+    if scale >= 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _downsample_image(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """
+    Shrink large photos (see _downsample_size) and re-encode as JPEG before the RPC.
+    Returns (possibly smaller bytes, possibly updated mime_type); falls back to the original
+    on any Pillow error or if re-encoding doesn't save bytes.
+    """
+    if len(image_bytes) <= _DOWNSAMPLE_MIN_BYTES or mime_type.lower() not in _DOWNSAMPLE_MIME_TYPES:
+        return image_bytes, mime_type
+
+    try:
+        from PIL import Image, ImageOps
+        import io
+
+        img = Image.open(io.BytesIO(image_bytes))
+        # Re-encoding drops EXIF, so bake the camera orientation into the pixels first
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        size = _downsample_size(*img.size)
+        if size is not None:
+            img = img.resize(size, Image.LANCZOS)
+
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=_DOWNSAMPLE_JPEG_QUALITY, optimize=True)
+        downsampled = buf.getvalue()
+    except Exception as e:
+        logger.warning("Document AI image downsampling failed: %s — sending original", e)
+        return image_bytes, mime_type
+
+    if len(downsampled) >= len(image_bytes):
+        return image_bytes, mime_type
+    logger.info("Document AI image downsampled: %s -> %s bytes", len(image_bytes), len(downsampled))
+    return downsampled, "image/jpeg"
+
+
+def _build_process_request(image_bytes: bytes, mime_type: str):
+    """ProcessRequest for the configured processor, limited to _RESPONSE_FIELDS."""
+    # Lazy import documentai
+    from google.cloud import documentai
+    from google.protobuf import field_mask_pb2
+    
+    raw_document = documentai.RawDocument(
+        content=image_bytes,
+        mime_type=mime_type,
+    )
+    return documentai.ProcessRequest(
+        name=_get_processor_name(),
+        raw_document=raw_document,
+        field_mask=field_mask_pb2.FieldMask(paths=list(_RESPONSE_FIELDS)),
+    )
+
+
+def _parse_document(document) -> Dict[str, Any]:
+    """Structured receipt data plus coordinate data from a processed Document."""
+    # Extract structured data
+    parsed_data = _extract_receipt_data(document)
+    
+    # Extract coordinate data for advanced sum checking
+    parsed_data["coordinate_data"] = _extract_coordinate_data(document)
+    
+    return parsed_data
+
+
+# Per-attempt RPC timeout; transient failures are retried with exponential backoff + jitter
+_PROCESS_TIMEOUT_S = 60.0
+
+
+def _is_retryable_documentai_error(error: Exception) -> bool:
+    """True for quota (429) and transient availability errors worth retrying."""
+    from google.api_core import exceptions as gexc
+    return isinstance(
+        error, (gexc.ResourceExhausted, gexc.ServiceUnavailable, gexc.DeadlineExceeded)
+    )
+
+
+def _make_sync_retry(processor_name: str):
+    """google.api_core Retry for one sync call (1s doubling to 32s with jitter, 120s deadline)."""
+    from google.api_core import retry
+
+    attempt = 0
+
+    def _on_error(error: Exception) -> None:
+        nonlocal attempt
+        attempt += 1
+        logger.warning("Document AI call to %s failed (%s), retry %d", processor_name, error, attempt)
+
+    return retry.Retry(
+        predicate=_is_retryable_documentai_error,
+        initial=1.0,
+        maximum=32.0,
+        multiplier=2.0,
+        deadline=120.0,
+        on_error=_on_error,
+    )
+
+
+def _parse_and_cache(document, cache_key: bytes) -> Dict[str, Any]:
+    """_parse_document plus the cache put (a deep copy); the async path runs it in a worker thread."""
+    parsed_data = _parse_document(document)
+    _parse_cache.put(cache_key, parsed_data)
+    return parsed_data
+
+
 def parse_receipt_documentai(image_bytes: bytes, mime_type: str = "image/jpeg") -> Dict[str, Any]:
     """
     Parse receipt image using Google Document AI Expense Parser.
+    Blocking; request handlers should use parse_receipt_documentai_async.
     
     Args:
         image_bytes: Image file bytes
@@ -72,44 +295,72 @@ def parse_receipt_documentai(image_bytes: bytes, mime_type: str = "image/jpeg")
     Returns:
         Parsed receipt data dictionary
     """
-    # Lazy import documentai
-    from google.cloud import documentai
+    cache_key = _parse_cache_key(image_bytes, mime_type)
+    cached = _parse_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Document AI result served from cache")
+        return cached
     
     client = _get_client()
-    processor_name = _get_processor_name()
-    
-    # Prepare request
-    raw_document = documentai.RawDocument(
-        content=image_bytes,
-        mime_type=mime_type,
-    )
-    
-    request = documentai.ProcessRequest(
-        name=processor_name,
-        raw_document=raw_document,
-    )
+    # Cache key stays on the uploaded bytes; only the RPC payload is downsampled
+    request = _build_process_request(*_downsample_image(image_bytes, mime_type))
     
     try:
         # Call API
-        logger.info(f"Processing document with Document AI processor: {processor_name}")
-        result = client.process_document(request=request)
-        document = result.document
-        
-        # Extract structured data
-        parsed_data = _extract_receipt_data(document)
-        
-        # Extract coordinate data for advanced sum checking
-        parsed_data["coordinate_data"] = _extract_coordinate_data(document)
-        
-        logger.info(f"Document AI parsing completed successfully")
+        logger.info("Processing document with Document AI processor: %s", request.name)
+        result = client.process_document(
+            request=request, retry=_make_sync_retry(request.name), timeout=_PROCESS_TIMEOUT_S
+        )
+        parsed_data = _parse_and_cache(result.document, cache_key)
+        logger.info("Document AI parsing completed successfully")
+        return parsed_data
         
+    except Exception as e:
+        logger.error("Document AI processing failed: %s", e)
+        raise
+
+
+async def parse_receipt_documentai_async(image_bytes: bytes, mime_type: str = "image/jpeg") -> Dict[str, Any]:
+    """
+    Async parse_receipt_documentai: the RPC is awaited on DocumentProcessorServiceAsyncClient,
+    so several receipts can be fanned out with asyncio.gather. At most
+    DOCUMENTAI_MAX_CONCURRENCY calls are in flight per worker. Shares the result cache;
+    cache copies and post-processing run in a worker thread, off the event loop.
+    """
+    cache_key = _parse_cache_key(image_bytes, mime_type)
+    cached = await asyncio.to_thread(_parse_cache.get, cache_key)
+    if cached is not None:
+        logger.info("Document AI result served from cache")
+        return cached
+    
+    client = _get_async_client()
+    # Pillow decode/resize is CPU-bound; keep it off the event loop
+    payload = await asyncio.to_thread(_downsample_image, image_bytes, mime_type)
+    request = _build_process_request(*payload)
+    
+    try:
+        logger.info("Processing document with Document AI processor: %s", request.name)
+
+        async def _process():
+            # Hold a concurrency slot per attempt, not across the backoff sleep
+            async with _semaphore:
+                return await client.process_document(request=request, timeout=_PROCESS_TIMEOUT_S)
+
+        result = await call_with_retry(
+            _process, _is_retryable_documentai_error, f"Document AI ({request.name})"
+        )
+        parsed_data = await asyncio.to_thread(_parse_and_cache, result.document, cache_key)
+        logger.info("Document AI parsing completed successfully")
         return parsed_data
         
     except Exception as e:
-        logger.error(f"Document AI processing failed: {e}")
+        logger.error("Document AI processing failed: %s", e)
         raise
 
 
+_LINE_ITEM_ENTITY_TYPES = frozenset({"line_item", "expense_line_item"})
+
+
 def _extract_receipt_data(document) -> Dict[str, Any]:
     """
     Extract receipt data from Document object returned by Document AI.
@@ -120,7 +371,7 @@ def _extract_receipt_data(document) -> Dict[str, Any]:
     - text (complete text)
     """
     data: Dict[str, Any] = {
-        "raw_text": document.text if hasattr(document, 'text') else "",
+        "raw_text": getattr(document, 'text', ""),
         "entities": {},
         "properties": {},
         "line_items": [],
@@ -135,68 +386,60 @@ def _extract_receipt_data(document) -> Dict[str, Any]:
         "item_count": 0,
     }
     
-    # Extract entities
-    if hasattr(document, 'entities') and document.entities:
-        for entity in document.entities:
-            entity_type = entity.type_ if hasattr(entity, 'type_') else None
-            entity_value = _get_entity_value(entity)
-            confidence = entity.confidence if hasattr(entity, 'confidence') else None
+    # One pass over the entities: fields, top-level line items, and nested line-item
+    # properties (the fallback when there are no top-level line items)
+    line_items = []
+    nested_line_item_props = []
+    for entity in getattr(document, 'entities', None) or ():
+        entity_type = getattr(entity, 'type_', None)
+        entity_value = _get_entity_value(entity)
+        confidence = getattr(entity, 'confidence', None)
+        
+        if entity_type:
+            data["entities"][entity_type] = {
+                "value": entity_value,
+                "confidence": confidence
+            }
             
-            if entity_type:
-                data["entities"][entity_type] = {
-                    "value": entity_value,
-                    "confidence": confidence
-                }
-                
-                # Map common fields
-                if entity_type == "supplier_name" or entity_type == "merchant_name":
-                    data["merchant_name"] = entity_value
-                elif entity_type == "receipt_date" or entity_type == "transaction_date":
-                    data["purchase_time"] = entity_value
-                elif entity_type == "total_amount" or entity_type == "net_amount":
-                    data["total"] = _parse_amount(entity_value)
-                elif entity_type == "tax_amount" or entity_type == "total_tax_amount":
-                    # If confidence is low, judge based on merchant type (grocery usually tax-free)
-                    if confidence and confidence < 0.6:
-                        # Don't set for now, let validation function handle
-                        pass
-                    else:
-                        data["tax"] = _parse_amount(entity_value)
-                elif entity_type == "subtotal_amount":
-                    data["subtotal"] = _parse_amount(entity_value)
-                elif entity_type == "payment_type":
-                    data["payment_method"] = entity_value
-                elif entity_type == "card_number" or entity_type == "credit_card_last_four_digits":
-                    if entity_value and len(str(entity_value)) >= 4:
-                        data["card_last4"] = str(entity_value)[-4:]
-    
-    # Extract properties (line items, etc.)
-    if hasattr(document, 'entities') and document.entities:
-        line_items = []
-        for entity in document.entities:
-            if hasattr(entity, 'type_') and entity.type_ in ["line_item", "expense_line_item"]:
-                line_item = _extract_line_item(entity)
-                if line_item:
-                    line_items.append(line_item)
+            # Map common fields
+            if entity_type == "supplier_name" or entity_type == "merchant_name":
+                data["merchant_name"] = entity_value
+            elif entity_type == "receipt_date" or entity_type == "transaction_date":
+                data["purchase_time"] = entity_value
+            elif entity_type == "total_amount" or entity_type == "net_amount":
+                data["total"] = _parse_amount(entity_value)
+            elif entity_type == "tax_amount" or entity_type == "total_tax_amount":
+                # If confidence is low, judge based on merchant type (grocery usually tax-free)
+                if confidence and confidence < 0.6:
+                    # Don't set for now, let validation function handle
+                    pass
+                else:
+                    data["tax"] = _parse_amount(entity_value)
+            elif entity_type == "subtotal_amount":
+                data["subtotal"] = _parse_amount(entity_value)
+            elif entity_type == "payment_type":
+                data["payment_method"] = entity_value
+            elif entity_type == "card_number" or entity_type == "credit_card_last_four_digits":
+                if entity_value and len(str(entity_value)) >= 4:
+                    data["card_last4"] = str(entity_value)[-4:]
         
-        if line_items:
-            data["line_items"] = line_items
-            data["item_count"] = len(line_items)
+        if entity_type in _LINE_ITEM_ENTITY_TYPES:
+            line_item = _extract_line_item(entity)
+            if line_item:
+                line_items.append(line_item)
+        if not line_items:
+            # Try to find line_item related nested entities
+            for prop in getattr(entity, 'properties', None) or ():
+                prop_type = getattr(prop, 'type_', None)
+                if prop_type and "line_item" in prop_type.lower():
+                    nested_line_item_props.append(prop)
     
     # If line_items not found, try to extract from properties
-    if not data["line_items"] and hasattr(document, 'entities'):
-        # Try to find line_item related nested entities
-        for entity in document.entities:
-            if hasattr(entity, 'properties') and entity.properties:
-                for prop in entity.properties:
-                    prop_type = prop.type_ if hasattr(prop, 'type_') else None
-                    if prop_type and "line_item" in prop_type.lower():
-                        line_item = _extract_line_item(prop)
-                        if line_item:
-                            data["line_items"].append(line_item)
-        
-        if data["line_items"]:
-            data["item_count"] = len(data["line_items"])
+    if not line_items:
+        line_items = [item for item in map(_extract_line_item, nested_line_item_props) if item]
+    if line_items:
+        data["line_items"] = line_items
+        data["item_count"] = len(line_items)
     
     # If no subtotal, calculate from total and tax
     if not data["subtotal"] and data["total"]:
@@ -211,15 +454,16 @@ def _extract_receipt_data(document) -> Dict[str, Any]:
         data["tax"] = 0.0
 
     # Validate and correct data
-    data = _validate_and_correct_receipt_data(data, document.text if hasattr(document, 'text') else data.get("raw_text", ""))
+    data = _validate_and_correct_receipt_data(data, getattr(document, 'text', data.get("raw_text", "")))
     
     return data
 
 
 def _get_entity_value(entity) -> Any:
     """Extract entity value."""
-    if hasattr(entity, 'mention_text') and entity.mention_text:
-        return entity.mention_text
+    mention_text = getattr(entity, 'mention_text', None)
+    if mention_text:
+        return mention_text
     elif hasattr(entity, 'normalized_value'):
         norm_value = entity.normalized_value
         if hasattr(norm_value, 'text'):
@@ -228,7 +472,7 @@ def _get_entity_value(entity) -> Any:
             money = norm_value.money_value
             if hasattr(money, 'currency_code') and hasattr(money, 'units'):
                 return float(money.units) + (money.nanos / 1e9 if hasattr(money, 'nanos') else 0)
-    elif hasattr(entity, 'text_anchor') and entity.text_anchor:
+    elif getattr(entity, 'text_anchor', None):
         # Try to extract from text_anchor
         return None  # Need original document text
     
@@ -244,10 +488,9 @@ def _parse_amount(value: Any) -> Optional[float]:
         return float(value)
     
     # Try to extract number from string
-    import re
     if isinstance(value, str):
         # Remove currency symbols and commas
-        cleaned = re.sub(r'[^\d.]', '', value)
+        cleaned = _AMOUNT_CLEAN_RE.sub('', value)
         try:
             return float(cleaned)
         except ValueError:
@@ -326,6 +569,19 @@ def _validate_and_correct_receipt_data(data: Dict[str, Any], raw_text: str) -> D
     return data
 
 
+def _qty_times_price_matches(quantity: str, unit_price: str, line_total: str) -> bool:
+    """
+    quantity × unit_price == line_total within $0.01, in exact integer arithmetic.
+    quantity is "d+[.d*]" text; prices are "d+.dd" text (integer cents once the dot is dropped).
+    """
+    whole, _, frac = quantity.partition(".")
+    scale = 10 ** len(frac)  # quantity = qty_units / scale
+    qty_units = int(whole + frac)
+    unit_cents = int(unit_price.replace(".", ""))
+    total_cents = int(line_total.replace(".", ""))
+    return abs(qty_units * unit_cents - total_cents * scale) <= scale
+
+
 def _reconstruct_line_items_from_text(raw_text: str, existing_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Reconstruct line_items from raw_text by pairing through validation of quantity × unit_price = line_total.
@@ -336,25 +592,10 @@ def _reconstruct_line_items_from_text(raw_text: str, existing_items: List[Dict[s
     3. If calculation is correct (error ±0.01), mark as high confidence
     4. Pair product names and prices
     """
-    import re
-    from decimal import Decimal
-    
     lines = raw_text.split('\n')
     reconstructed = []
     used_indices = set()
     
-    # Pattern 1: Product name + "FP $price"
-    pattern1 = re.compile(r'^([^$]+?)\s+FP\s+\$?(\d+\.\d{2})$', re.IGNORECASE)
-    
-    # Pattern 2: Product name + "quantity unit @ $unit_price/unit" + "FP $total_price"
-    pattern2 = re.compile(
-        r'^([^0-9$]+?)\s+(\d+\.?\d*)\s*(lb|kg|oz|g|ea|pcs?|ct)\s*@\s+\$?(\d+\.\d{2})/(?:lb|kg|oz|g|ea|pcs?|ct)\s+FP\s+\$?(\d+\.\d{2})$',
-        re.IGNORECASE
-    )
-    
-    # Pattern 3: "(SALE) product name" + price information
-    pattern3 = re.compile(r'^\(SALE\)\s*(.+)$', re.IGNORECASE)
-    
     i = 0
     while i < len(lines):
         line = lines[i].strip()
@@ -375,23 +616,22 @@ def _reconstruct_line_items_from_text(raw_text: str, existing_items: List[Dict[s
         }
         
         # Check if promotional item
-        sale_match = pattern3.match(line)
+        sale_match = _SALE_RE.match(line)
         if sale_match:
             item["is_on_sale"] = True
             line = sale_match.group(1).strip()
         
         # Try pattern 2: line containing quantity and unit price
-        match2 = pattern2.match(line)
+        match2 = _QTY_FP_ITEM_RE.match(line)
         if match2:
             product_name = match2.group(1).strip()
-            quantity = Decimal(match2.group(2))
+            quantity = match2.group(2)
             unit = match2.group(3).lower()
-            unit_price = Decimal(match2.group(4))
-            line_total = Decimal(match2.group(5))
+            unit_price = match2.group(4)
+            line_total = match2.group(5)
             
             # Validate: quantity × unit_price should equal line_total (allow ±0.01 error)
-            expected_total = quantity * unit_price
-            if abs(expected_total - line_total) <= Decimal('0.01'):
+            if _qty_times_price_matches(quantity, unit_price, line_total):
                 item["product_name"] = product_name
                 item["quantity"] = float(quantity)
                 item["unit"] = unit
@@ -403,23 +643,22 @@ def _reconstruct_line_items_from_text(raw_text: str, existing_items: List[Dict[s
                 continue
         
         # Try pattern 1: simple product name + FP price
-        match1 = pattern1.match(line)
+        match1 = _FP_ITEM_RE.match(line)
         if match1:
             product_name = match1.group(1).strip()
-            line_total = Decimal(match1.group(2))
+            line_total = match1.group(2)
             
             # Check if next line has quantity and unit price information
             if i + 1 < len(lines):
                 next_line = lines[i + 1].strip()
-                qty_match = re.search(r'(\d+\.?\d*)\s*(lb|kg|oz|g|ea|pcs?|ct)\s*@\s+\$?(\d+\.\d{2})/', next_line, re.IGNORECASE)
+                qty_match = _QTY_UNIT_RE.search(next_line)
                 if qty_match:
-                    quantity = Decimal(qty_match.group(1))
+                    quantity = qty_match.group(1)
                     unit = qty_match.group(2).lower()
-                    unit_price = Decimal(qty_match.group(3))
+                    unit_price = qty_match.group(3)
                     
                     # Validate calculation
-                    expected_total = quantity * unit_price
-                    if abs(expected_total - line_total) <= Decimal('0.01'):
+                    if _qty_times_price_matches(quantity, unit_price, line_total):
                         item["product_name"] = product_name
                         item["quantity"] = float(quantity)
                         item["unit"] = unit
@@ -451,31 +690,47 @@ def _reconstruct_line_items_from_text(raw_text: str, existing_items: List[Dict[s
             if item.get("product_name"):
                 product_names.append(item["product_name"])
         
+        # Lower-case the text once; each name then jumps straight to the lines containing it
+        # with str.find instead of lower-casing and scanning every line per name
+        lines_lower = [line.lower() for line in lines]
+        text_lower = "\n".join(lines_lower)
+        line_starts = list(accumulate((len(line) + 1 for line in lines_lower), initial=0))
+        # First "$d.dd" price per line, searched at most once per line across all names
+        line_prices: Dict[int, Optional[float]] = {}
+        
         # Try to find product name and price pairs in raw_text
         for name in product_names:
             # Find price near this product name in raw_text
             name_lower = name.lower()
-            for i, line in enumerate(lines):
-                if name_lower in line.lower():
-                    # Find price on same line or nearby lines
-                    for j in range(max(0, i-1), min(len(lines), i+3)):
-                        price_match = re.search(r'\$?(\d+\.\d{2})', lines[j])
-                        if price_match:
-                            price = float(price_match.group(1))
-                            if price in prices:
-                                reconstructed.append({
-                                    "raw_text": f"{lines[i]}\n{lines[j]}",
-                                    "product_name": name,
-                                    "line_total": price,
-                                    "confidence": "medium",
-                                    "quantity": None,
-                                    "unit": None,
-                                    "unit_price": None,
-                                    "is_on_sale": False,
-                                    "category": None,
-                                })
-                                prices.remove(price)
-                                break
+            if "\n" in name_lower:
+                continue  # Can't be inside a single line
+            pos = text_lower.find(name_lower)
+            while pos != -1:
+                i = bisect_right(line_starts, pos) - 1
+                # Next search starts on the following line (one hit per line, as before)
+                pos = text_lower.find(name_lower, line_starts[i + 1])
+                # Find price on same line or nearby lines
+                for j in range(max(0, i-1), min(len(lines), i+3)):
+                    if j in line_prices:
+                        price = line_prices[j]
+                    else:
+                        price_match = _PRICE_RE.search(lines[j])
+                        price = line_prices[j] = float(price_match.group(1)) if price_match else None
+                    if price is not None:
+                        if price in prices:
+                            reconstructed.append({
+                                "raw_text": f"{lines[i]}\n{lines[j]}",
+                                "product_name": name,
+                                "line_total": price,
+                                "confidence": "medium",
+                                "quantity": None,
+                                "unit": None,
+                                "unit_price": None,
+                                "is_on_sale": False,
+                                "category": None,
+                            })
+                            prices.remove(price)
+                            break
     
     return reconstructed
 
@@ -498,9 +753,9 @@ def _extract_line_item(entity) -> Optional[Dict[str, Any]]:
         line_item["raw_text"] = entity.mention_text
     
     # Extract detailed information from properties
-    if hasattr(entity, 'properties') and entity.properties:
+    if getattr(entity, 'properties', None):
         for prop in entity.properties:
-            prop_type = prop.type_ if hasattr(prop, 'type_') else ""
+            prop_type = getattr(prop, 'type_', "")
             prop_value = _get_entity_value(prop)
             
             if "item_description" in prop_type.lower() or "description" in prop_type.lower():
@@ -531,12 +786,12 @@ def _extract_coordinate_data(document) -> Dict[str, Any]:
     coordinate_data = {
         "text_blocks": [],
         "pages": [],
-        "document_text": document.text if hasattr(document, 'text') else ""
+        "document_text": getattr(document, 'text', "")
     }
     
     try:
         # Extract from pages
-        if hasattr(document, 'pages') and document.pages:
+        if getattr(document, 'pages', None):
             for page_idx, page in enumerate(document.pages):
                 page_data = {
                     "page_number": page_idx + 1,
@@ -550,17 +805,18 @@ def _extract_coordinate_data(document) -> Dict[str, Any]:
                 
                 # Extract lines first (better for item extraction)
                 document_text = coordinate_data.get("document_text", "")
-                if hasattr(page, 'lines') and page.lines:
+                if getattr(page, 'lines', None):
                     for line in page.lines:
-                        if hasattr(line, 'layout') and line.layout:
-                            bbox = _extract_bounding_box(line.layout)
+                        layout = getattr(line, 'layout', None)
+                        if layout:
+                            bbox = _extract_bounding_box(layout)
                             if bbox:
-                                line_text = _get_text_from_layout(line.layout, document_text)
+                                line_text = _get_text_from_layout(layout, document_text)
                                 if line_text.strip():  # Only add if text is not empty
                                     line_data = {
                                         "text": line_text.strip(),
                                         "bounding_box": bbox,
-                                        "confidence": line.layout.confidence if hasattr(line.layout, 'confidence') else None,
+                                        "confidence": getattr(layout, 'confidence', None),
                                         "page_number": page_idx + 1,
                                         "type": "line"
                                     }
@@ -568,17 +824,20 @@ def _extract_coordinate_data(document) -> Dict[str, Any]:
                                     coordinate_data["text_blocks"].append(line_data)
                 
                 # Extract tokens (most granular) - as fallback for lines that didn't extract text
-                if hasattr(page, 'tokens') and page.tokens:
+                if getattr(page, 'tokens', None):
+                    # Sorted line top edges, so the "same row" check below is a bisect, not a scan of every line
+                    line_ys = sorted(line["bounding_box"].get("y", 0) for line in page_data["lines"])
                     for token in page.tokens:
-                        if hasattr(token, 'layout') and token.layout:
-                            bbox = _extract_bounding_box(token.layout)
+                        layout = getattr(token, 'layout', None)
+                        if layout:
+                            bbox = _extract_bounding_box(layout)
                             if bbox:
-                                token_text = _get_text_from_layout(token.layout, document_text)
+                                token_text = _get_text_from_layout(layout, document_text)
                                 if token_text.strip():  # Only add if text is not empty
                                     token_data = {
                                         "text": token_text.strip(),
                                         "bounding_box": bbox,
-                                        "confidence": token.layout.confidence if hasattr(token.layout, 'confidence') else None,
+                                        "confidence": getattr(layout, 'confidence', None),
                                         "page_number": page_idx + 1,
                                         "type": "token"
                                     }
@@ -586,59 +845,54 @@ def _extract_coordinate_data(document) -> Dict[str, Any]:
                                     # Add token if it's not already covered by a line
                                     # Simple check: if no line overlaps with this token's position
                                     token_y = bbox.get("y", 0)
-                                    token_x = bbox.get("x", 0)
-                                    is_covered = False
-                                    for existing_line in page_data["lines"]:
-                                        line_y = existing_line.get("bounding_box", {}).get("y", 0)
-                                        if abs(token_y - line_y) < 0.01:  # Same row
-                                            is_covered = True
-                                            break
-                                    if not is_covered:
+                                    if not _has_row_within(line_ys, token_y, 0.01):  # Same row
                                         coordinate_data["text_blocks"].append(token_data)
                 
                 # Extract paragraphs
-                if hasattr(page, 'paragraphs') and page.paragraphs:
+                if getattr(page, 'paragraphs', None):
                     for para in page.paragraphs:
-                        if hasattr(para, 'layout') and para.layout:
-                            bbox = _extract_bounding_box(para.layout)
+                        layout = getattr(para, 'layout', None)
+                        if layout:
+                            bbox = _extract_bounding_box(layout)
                             if bbox:
-                                para_text = _get_text_from_layout(para.layout, document_text)
+                                para_text = _get_text_from_layout(layout, document_text)
                                 if para_text.strip():
                                     para_data = {
                                         "text": para_text.strip(),
                                         "bounding_box": bbox,
-                                        "confidence": para.layout.confidence if hasattr(para.layout, 'confidence') else None
+                                        "confidence": getattr(layout, 'confidence', None)
                                     }
                                     page_data["paragraphs"].append(para_data)
                 
                 # Extract blocks
-                if hasattr(page, 'blocks') and page.blocks:
+                if getattr(page, 'blocks', None):
                     for block in page.blocks:
-                        if hasattr(block, 'layout') and block.layout:
-                            bbox = _extract_bounding_box(block.layout)
+                        layout = getattr(block, 'layout', None)
+                        if layout:
+                            bbox = _extract_bounding_box(layout)
                             if bbox:
-                                block_text = _get_text_from_layout(block.layout, document_text)
+                                block_text = _get_text_from_layout(layout, document_text)
                                 if block_text.strip():
                                     block_data = {
                                         "text": block_text.strip(),
                                         "bounding_box": bbox,
-                                        "confidence": block.layout.confidence if hasattr(block.layout, 'confidence') else None
+                                        "confidence": getattr(layout, 'confidence', None)
                                     }
                                     page_data["blocks"].append(block_data)
                 
                 coordinate_data["pages"].append(page_data)
         
         # Extract entity coordinates
-        if hasattr(document, 'entities') and document.entities:
+        if getattr(document, 'entities', None):
             coordinate_data["entities"] = []
             for entity in document.entities:
                 entity_coords = _extract_entity_coordinates(entity)
                 if entity_coords:
                     coordinate_data["entities"].append({
-                        "type": entity.type_ if hasattr(entity, 'type_') else None,
+                        "type": getattr(entity, 'type_', None),
                         "value": _get_entity_value(entity),
                         "bounding_box": entity_coords,
-                        "confidence": entity.confidence if hasattr(entity, 'confidence') else None
+                        "confidence": getattr(entity, 'confidence', None)
                     })
         
         logger.debug(f"Extracted {len(coordinate_data['text_blocks'])} text blocks with coordinates")
@@ -651,48 +905,21 @@ def _extract_coordinate_data(document) -> Dict[str, Any]:
     return coordinate_data
 
 
+def _has_row_within(sorted_ys: List[float], y: float, tolerance: float) -> bool:
+    """True if some value in sorted_ys is within tolerance of y (only the two neighbours of y can be)."""
+    k = bisect_left(sorted_ys, y)
+    if k < len(sorted_ys) and abs(y - sorted_ys[k]) < tolerance:
+        return True
+    return k > 0 and abs(y - sorted_ys[k - 1]) < tolerance
+
+
 def _extract_bounding_box(layout) -> Optional[Dict[str, Any]]:
     """Extract bounding box from layout object."""
-    if not hasattr(layout, 'bounding_poly') or not layout.bounding_poly:
+    bounding_poly = getattr(layout, 'bounding_poly', None)
+    if not bounding_poly:
         return None
     
-    bbox = layout.bounding_poly
-    
-    # Try normalized_vertices first (preferred)
-    if hasattr(bbox, 'normalized_vertices') and bbox.normalized_vertices:
-        vertices = bbox.normalized_vertices
-        x_coords = [v.x for v in vertices]
-        y_coords = [v.y for v in vertices]
-        
-        return {
-            "normalized_vertices": [{"x": v.x, "y": v.y} for v in vertices],
-            "x": min(x_coords),
-            "y": min(y_coords),
-            "width": max(x_coords) - min(x_coords),
-            "height": max(y_coords) - min(y_coords),
-            "center_x": sum(x_coords) / len(x_coords),
-            "center_y": sum(y_coords) / len(y_coords),
-            "is_normalized": True
-        }
-    
-    # Fallback to vertices (pixel coordinates)
-    elif hasattr(bbox, 'vertices') and bbox.vertices:
-        vertices = bbox.vertices
-        x_coords = [v.x for v in vertices]
-        y_coords = [v.y for v in vertices]
-        
-        return {
-            "vertices": [{"x": v.x, "y": v.y} for v in vertices],
-            "x": min(x_coords),
-            "y": min(y_coords),
-            "width": max(x_coords) - min(x_coords),
-            "height": max(y_coords) - min(y_coords),
-            "center_x": sum(x_coords) / len(x_coords),
-            "center_y": sum(y_coords) / len(y_coords),
-            "is_normalized": False
-        }
-    
-    return None
+    return _extract_bounding_box_from_poly(bounding_poly)
 
 
 def _get_text_from_layout(layout, document_text: str = "") -> str:
@@ -708,15 +935,18 @@ def _get_text_from_layout(layout, document_text: str = "") -> str:
         layout: Layout object from Document AI
         document_text: Full document text (for text_segments extraction)
     """
-    if hasattr(layout, 'text_anchor') and layout.text_anchor:
+    text_anchor = getattr(layout, 'text_anchor', None)
+    if text_anchor:
         # Method 1: Direct content
-        if hasattr(layout.text_anchor, 'content') and layout.text_anchor.content:
-            return layout.text_anchor.content
+        content = getattr(text_anchor, 'content', None)
+        if content:
+            return content
         
         # Method 2: Text segments (extract from document text)
-        if hasattr(layout.text_anchor, 'text_segments') and layout.text_anchor.text_segments and document_text:
+        text_segments = getattr(text_anchor, 'text_segments', None)
+        if text_segments and document_text:
             text_parts = []
-            for segment in layout.text_anchor.text_segments:
+            for segment in text_segments:
                 if hasattr(segment, 'start_index') and hasattr(segment, 'end_index'):
                     try:
                         start_idx = int(segment.start_index) if hasattr(segment.start_index, '__int__') else 0
@@ -734,14 +964,14 @@ def _get_text_from_layout(layout, document_text: str = "") -> str:
 def _extract_entity_coordinates(entity) -> Optional[Dict[str, Any]]:
     """Extract coordinates from entity (page_anchor or text_anchor)."""
     # Try page_anchor first
-    if hasattr(entity, 'page_anchor') and entity.page_anchor:
-        if hasattr(entity.page_anchor, 'page_refs') and entity.page_anchor.page_refs:
+    if getattr(entity, 'page_anchor', None):
+        if getattr(entity.page_anchor, 'page_refs', None):
             page_ref = entity.page_anchor.page_refs[0]  # Take first reference
-            if hasattr(page_ref, 'bounding_poly') and page_ref.bounding_poly:
+            if getattr(page_ref, 'bounding_poly', None):
                 return _extract_bounding_box_from_poly(page_ref.bounding_poly)
     
     # Fallback to text_anchor (less precise)
-    if hasattr(entity, 'text_anchor') and entity.text_anchor:
+    if getattr(entity, 'text_anchor', None):
         # Text anchor doesn't have direct coordinates, but we can use it to find text position
         # For now, return None and we'll use text matching instead
         return None
@@ -751,38 +981,34 @@ def _extract_entity_coordinates(entity) -> Optional[Dict[str, Any]]:
 
 def _extract_bounding_box_from_poly(bounding_poly) -> Optional[Dict[str, Any]]:
     """Extract bounding box from bounding_poly object."""
-    # Try normalized_vertices first
-    if hasattr(bounding_poly, 'normalized_vertices') and bounding_poly.normalized_vertices:
-        vertices = bounding_poly.normalized_vertices
-        x_coords = [v.x for v in vertices]
-        y_coords = [v.y for v in vertices]
-        
-        return {
-            "normalized_vertices": [{"x": v.x, "y": v.y} for v in vertices],
-            "x": min(x_coords),
-            "y": min(y_coords),
-            "width": max(x_coords) - min(x_coords),
-            "height": max(y_coords) - min(y_coords),
-            "center_x": sum(x_coords) / len(x_coords),
-            "center_y": sum(y_coords) / len(y_coords),
-            "is_normalized": True
-        }
+    # Try normalized_vertices first (preferred)
+    normalized_vertices = getattr(bounding_poly, 'normalized_vertices', None)
+    if normalized_vertices:
+        return _bbox_from_vertices(normalized_vertices, "normalized_vertices", True)
     
-    # Fallback to vertices
-    elif hasattr(bounding_poly, 'vertices') and bounding_poly.vertices:
-        vertices = bounding_poly.vertices
-        x_coords = [v.x for v in vertices]
-        y_coords = [v.y for v in vertices]
-        
-        return {
-            "vertices": [{"x": v.x, "y": v.y} for v in vertices],
-            "x": min(x_coords),
-            "y": min(y_coords),
-            "width": max(x_coords) - min(x_coords),
-            "height": max(y_coords) - min(y_coords),
-            "center_x": sum(x_coords) / len(x_coords),
-            "center_y": sum(y_coords) / len(y_coords),
-            "is_normalized": False
-        }
+    # Fallback to vertices (pixel coordinates)
+    vertices = getattr(bounding_poly, 'vertices', None)
+    if vertices:
+        return _bbox_from_vertices(vertices, "vertices", False)
     
     return None
+
+
+def _bbox_from_vertices(vertices, key: str, is_normalized: bool) -> Dict[str, Any]:
+    """Box dict for a polygon; each proto vertex attribute is read once, min/max taken once per axis."""
+    points = [(v.x, v.y) for v in vertices]
+    x_coords = [x for x, _ in points]
+    y_coords = [y for _, y in points]
+    x_min = min(x_coords)
+    y_min = min(y_coords)
+    
+    return {
+        key: [{"x": x, "y": y} for x, y in points],
+        "x": x_min,
+        "y": y_min,
+        "width": max(x_coords) - x_min,
+        "height": max(y_coords) - y_min,
+        "center_x": sum(x_coords) / len(x_coords),
+        "center_y": sum(y_coords) / len(y_coords),
+        "is_normalized": is_normalized
+    }
@@ -8,10 +8,14 @@ Loading priority:
 import json
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
 _credentials = None
+# Vision / Document AI clients may be created from several threads on the first requests;
+# parse the service-account key (RSA) only once
+_credentials_lock = threading.Lock()
 
 
 def get_gcp_credentials():
@@ -23,6 +27,15 @@ def get_gcp_credentials():
     if _credentials is not None:
         return _credentials
 
+    with _credentials_lock:
+        # Double-check after acquiring lock
+        if _credentials is None:
+            _credentials = _load_gcp_credentials()
+    return _credentials
+
+
+def _load_gcp_credentials():
+    """Build credentials from the environment (see module docstring for the order)."""
     from google.oauth2 import service_account
 
     # Priority 1: JSON string (Cloud Run / Secret Manager)
@@ -30,18 +43,18 @@ def get_gcp_credentials():
     if sa_json:
         try:
             sa_dict = json.loads(sa_json)
-            _credentials = service_account.Credentials.from_service_account_info(sa_dict)
+            credentials = service_account.Credentials.from_service_account_info(sa_dict)
             logger.info("GCP credentials loaded from GOOGLE_APPLICATION_CREDENTIALS_JSON")
-            return _credentials
+            return credentials
         except Exception as e:
             raise ValueError(f"Failed to parse GOOGLE_APPLICATION_CREDENTIALS_JSON: {e}")
 
     # Priority 2: file path (local dev)
     cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "").strip()
     if cred_path and os.path.isfile(cred_path):
-        _credentials = service_account.Credentials.from_service_account_file(cred_path)
+        credentials = service_account.Credentials.from_service_account_file(cred_path)
         logger.info("GCP credentials loaded from file: %s", cred_path)
-        return _credentials
+        return credentials
 
     raise ValueError(
         "GCP credentials not found. "
@@ -61,8 +61,8 @@ def normalize_ocr_result(ocr_result: Dict[str, Any], provider: str = "unknown")
         if "entities" in ocr_result and "line_items" in ocr_result:
             # Might be Document AI format
             return _normalize_google_documentai(ocr_result)
-        elif "ExpenseDocuments" in str(ocr_result) or "Blocks" in ocr_result:
-            # Might be Textract raw format
+        elif "ExpenseDocuments" in ocr_result or "Blocks" in ocr_result:
+            # Might be Textract raw format (top-level keys of an AnalyzeExpense/AnalyzeDocument response)
             return _normalize_aws_textract(ocr_result)
         else:
             # Assume already partially normalized format, supplement missing fields
@@ -0,0 +1,97 @@
+-- ============================================
+-- Migration 076: Hot-path insert RPCs
+--
+-- save_processing_run / save_receipt_items run once (or more) per receipt.
+-- Going through PostgREST's table insert means a fresh INSERT is parsed and
+-- planned on every request; PL/pgSQL caches the plan per connection after the
+-- first calls. fn_save_receipt_items also returns only the new ids (in
+-- item_index order) instead of echoing every row back.
+--
+-- Called from backend/app/services/database/supabase_client.py via supabase.rpc().
+-- Deploy order: the backend works with or without this migration. Until the functions exist
+-- PostgREST answers PGRST202 and save_processing_run / save_receipt_items fall back to plain
+-- table inserts, so the migration can be applied before or after the backend rollout.
+--
+-- Both functions run as SECURITY INVOKER (RLS on the tables still applies) and are executable
+-- only by service_role, the key the backend uses.
+--
+-- PREREQUISITES: 001 (receipt_processing_runs), 012 (record_items), 051 (record_items columns)
+-- ============================================
+
+BEGIN;
+
+-- ============================================
+-- 1. fn_save_processing_run
+-- ============================================
+CREATE OR REPLACE FUNCTION fn_save_processing_run(p_run jsonb)
+RETURNS uuid
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_id uuid;
+BEGIN
+  INSERT INTO receipt_processing_runs (
+    receipt_id, stage, model_provider, model_name, model_version,
+    input_payload, output_payload, output_schema_version,
+    status, error_message, validation_status
+  )
+  SELECT
+    r.receipt_id, r.stage, r.model_provider, r.model_name, r.model_version,
+    p_run->'input_payload', p_run->'output_payload', r.output_schema_version,
+    r.status, r.error_message, r.validation_status
+  FROM jsonb_populate_record(NULL::receipt_processing_runs, p_run) r
+  RETURNING id INTO v_id;
+  RETURN v_id;
+END;
+$$;
+
+COMMENT ON FUNCTION fn_save_processing_run IS 'Insert one receipt_processing_runs row from a jsonb object (same keys as the table). Returns the new id.';
+
+-- ============================================
+-- 2. fn_save_receipt_items
+-- ============================================
+CREATE OR REPLACE FUNCTION fn_save_receipt_items(p_items jsonb)
+RETURNS uuid[]
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_ids uuid[];
+BEGIN
+  WITH ins AS (
+    INSERT INTO record_items (
+      receipt_id, user_id, product_name, product_name_clean,
+      quantity, unit, unit_price, line_total,
+      on_sale, original_price, discount_amount, category_id, item_index
+    )
+    SELECT
+      r.receipt_id, r.user_id, r.product_name, r.product_name_clean,
+      r.quantity, r.unit, r.unit_price, r.line_total,
+      COALESCE(r.on_sale, false), r.original_price, r.discount_amount, r.category_id, r.item_index
+    FROM jsonb_populate_recordset(NULL::record_items, p_items) r
+    RETURNING id, item_index
+  )
+  SELECT array_agg(id ORDER BY item_index) INTO v_ids FROM ins;
+  RETURN COALESCE(v_ids, ARRAY[]::uuid[]);
+END;
+$$;
+
+COMMENT ON FUNCTION fn_save_receipt_items IS 'Batch insert record_items from a jsonb array (same keys as the table). Returns new ids ordered by item_index.';
+
+-- ============================================
+-- 3. Privileges: backend (service_role) only
+-- ============================================
+REVOKE EXECUTE ON FUNCTION fn_save_processing_run(jsonb) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION fn_save_receipt_items(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION fn_save_processing_run(jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION fn_save_receipt_items(jsonb) TO service_role;
+
+COMMIT;
+
+DO $$
+BEGIN
+  RAISE NOTICE 'Migration 076 completed: fn_save_processing_run + fn_save_receipt_items';
+END $$;
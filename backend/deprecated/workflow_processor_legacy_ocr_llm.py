@@ -68,7 +68,7 @@ from app.services.database.supabase_client import (
     count_strikes_in_last_hour,
     apply_user_lock,
 )
-from app.processors.enrichment.address_matcher import match_store, fix_ocr_address, correct_address
+from app.processors.enrichment.address_matcher import match_store, fix_ocr_address, correct_address, build_store_candidate_metadata
 from app.services.ocr.ocr_normalizer import normalize_ocr_result, extract_unified_info
 from app.exporters.csv_exporter import convert_receipt_to_csv_rows, append_to_daily_csv, get_csv_headers
 from app.processors.stores.chain_cleaners import apply_chain_cleaner
@@ -954,7 +954,7 @@ async def _llm_debug_cascade(
                 temperature=0,
             )
         else:
-            debug_ocr_result = parse_receipt_with_llm(
+            debug_ocr_result = await parse_receipt_with_llm(
                 system_message=debug_ocr_system,
                 user_message=debug_ocr_user,
                 model=settings.openai_model,
@@ -1132,12 +1132,8 @@ async def _escalation_to_strongest_models(
             )
         )
         openai_task = asyncio.create_task(
-            asyncio.to_thread(
-                parse_receipt_with_openai_vision,
-                image_bytes,
-                ESCALATION_VISION_PROMPT,
-                openai_model,
-                "image/jpeg",
+            parse_receipt_with_openai_vision(
+                image_bytes, ESCALATION_VISION_PROMPT, openai_model, "image/jpeg"
             )
         )
         gemini_raw, openai_result = await asyncio.gather(gemini_task, openai_task)
@@ -1591,18 +1587,12 @@ async def _gpt_backup_processing(
     prompt_config = get_default_prompt()
     system_message = prompt_config.get("system_message", "")
     
-    # Call GPT-4o-mini (synchronous call, since already in async function)
-    # Note: Use run_in_executor here to avoid blocking the event loop
-    import asyncio
-    loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(
-        None,
-        lambda: parse_receipt_with_llm(
-            system_message=system_message,
-            user_message=prompt,
-            model=settings.openai_model,
-            temperature=0.0
-        )
+    # Call GPT-4o-mini
+    result = await parse_receipt_with_llm(
+        system_message=system_message,
+        user_message=prompt,
+        model=settings.openai_model,
+        temperature=0.0
     )
     
     return result
@@ -2057,7 +2047,7 @@ async def _process_receipt_vision_ocr_rbsj(
                 chain_name=merchant_name_v,
                 receipt_id=db_receipt_id,
                 source="llm",
-                llm_result=vision_result,
+                metadata=build_store_candidate_metadata(vision_result.get("receipt")),
                 suggested_chain_id=store_match.get("suggested_chain_id"),
                 suggested_location_id=store_match.get("suggested_location_id"),
                 confidence_score=store_match.get("confidence_score"),
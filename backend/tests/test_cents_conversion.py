@@ -0,0 +1,48 @@
+"""Test dollars/quantity -> integer x100 conversion used when saving receipts (supabase_client)."""
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.database.supabase_client import _to_cents, _to_quantity_x100, _to_x100
+
+
+def test_to_x100_rounds_half_up_without_float_error():
+    """Decimal(str(val)) keeps 1.005 as written, so it rounds up (float * 100 would give 100)."""
+    assert _to_x100(1.005) == 101
+    assert _to_x100(0.125) == 13
+    assert _to_x100(2.675) == 268
+    assert _to_x100(-1.005) == -101  # ROUND_HALF_UP rounds away from zero
+    assert _to_x100(0.004) == 0
+    print("[OK] _to_x100 half-up rounding")
+
+
+def test_to_x100_input_types():
+    assert _to_x100(3) == 300
+    assert _to_x100("12.34") == 1234
+    assert _to_x100(" 5 ") == 500
+    assert _to_x100(Decimal("9.999")) == 1000
+    assert _to_x100(1e-7) == 0
+    print("[OK] _to_x100 input types")
+
+
+def test_to_x100_invalid_values():
+    for val in (None, "", "abc", "$1.00", float("nan"), float("inf"), [1]):
+        assert _to_x100(val) is None, val
+    print("[OK] _to_x100 invalid values -> None")
+
+
+def test_cents_and_quantity_share_rounding():
+    for val in (1.005, "0.5", 7, None, "x"):
+        assert _to_cents(val) == _to_x100(val)
+        assert _to_quantity_x100(val) == _to_x100(val)
+    print("[OK] _to_cents / _to_quantity_x100")
+
+
+if __name__ == "__main__":
+    test_to_x100_rounds_half_up_without_float_error()
+    test_to_x100_input_types()
+    test_to_x100_invalid_values()
+    test_cents_and_quantity_share_rounding()
+    print("\nAll tests passed.")
@@ -0,0 +1,41 @@
+"""Test the pre-upload downsampling size rule in app/services/ocr/documentai_client.py."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ocr.documentai_client import (
+    _DOWNSAMPLE_MAX_PIXELS,
+    _DOWNSAMPLE_MIN_SHORT_EDGE,
+    _downsample_size,
+)
+
+
+def test_small_or_narrow_images_are_kept():
+    assert _downsample_size(1000, 800) is None
+    assert _downsample_size(2000, 2000) is None
+    # Tall grocery receipt: 4 MP, within budget, keeps its full 1000 px width
+    assert _downsample_size(1000, 4000) is None
+    print("[OK] Small / narrow images kept")
+
+
+def test_phone_photo_scaled_to_pixel_budget():
+    width, height = _downsample_size(3000, 4000)
+    assert width * height <= _DOWNSAMPLE_MAX_PIXELS * 1.01
+    assert abs(width / height - 0.75) < 0.01
+    assert min(width, height) >= _DOWNSAMPLE_MIN_SHORT_EDGE
+    print("[OK] 12 MP photo scaled to the pixel budget")
+
+
+def test_short_edge_never_below_minimum():
+    """A very long receipt is scaled by its width floor, not the pixel budget."""
+    assert _downsample_size(1200, 9000) == (1000, 7500)
+    assert _downsample_size(9000, 1200) == (7500, 1000)
+    print("[OK] Short edge floor")
+
+
+if __name__ == "__main__":
+    test_small_or_narrow_images_are_kept()
+    test_phone_photo_scaled_to_pixel_budget()
+    test_short_edge_never_below_minimum()
+    print("\nAll tests passed.")
@@ -0,0 +1,77 @@
+"""Test skip-pattern handling in app/prompts/extraction_rule_manager.py."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.prompts.extraction_rule_manager import (
+    _CompiledRules,
+    apply_extraction_rules,
+    get_default_extraction_rules,
+)
+
+
+def _fast_skip(compiled: _CompiledRules, line: str) -> bool:
+    """Skip decision as apply_extraction_rules makes it (startswith fast path for ASCII)."""
+    if line.isascii():
+        return line.lower().startswith(compiled.skip_prefixes) or bool(
+            compiled.skip_rest_re is not None and compiled.skip_rest_re.match(line)
+        )
+    return bool(compiled.skip_re.match(line))
+
+
+def test_literal_prefixes_split_from_regexes():
+    compiled = _CompiledRules(get_default_extraction_rules())
+    assert "total" in compiled.skip_prefixes
+    assert "www." in compiled.skip_prefixes  # ^www\. unescaped
+    assert "auth code" in compiled.skip_prefixes
+    assert len(compiled.skip_prefixes) == len(set(compiled.skip_prefixes))  # ^Visa / ^VISA deduped
+    for regex in (r"^\d{2}/\d{2}/\d{2}", r"^\*{3,}"):
+        assert regex in compiled.skip_rest_re.pattern
+        assert regex[1:].lower() not in compiled.skip_prefixes
+    print("[OK] Literal prefixes vs regex patterns")
+
+
+def test_fast_path_matches_full_alternation():
+    """For every line, the fast path must agree with the single IGNORECASE alternation."""
+    rules = {
+        "price_patterns": [],
+        "skip_patterns": get_default_extraction_rules()["skip_patterns"] + [
+            r"^Trans\:",      # escaped punctuation is still a literal
+            r"^A|^B",         # alternation is a regex
+            r"^Sub.total",    # '.' is a regex wildcard
+        ],
+    }
+    compiled = _CompiledRules(rules)
+    lines = [
+        "TOTAL 12.99", "total 12.99", "Total: 12.99", "SUBTOTAL 10.00", "Subtotals 1.00",
+        "tax 0.50", "TAXES 1.00", "MILK 3.99", "www.store.com 1.00", "wwwXstore 1.00",
+        "01/02/24 12:00", "1/02/24 12:00", "*** 5.00", "** 5.00", "visa 1234 5.00",
+        "Auth Code 123", "Trans: 55", "Trans 55", "Apple 1.99", "Banana 0.99",
+        "Sub-total 9.99", "立即下載 APP 1.00", "牛奶 3.99", "Émile 2.00", "TOTAL 牛奶 1.00",
+    ]
+    for line in lines:
+        assert _fast_skip(compiled, line) == bool(compiled.skip_re.match(line)), line
+    print("[OK] Fast path agrees with skip_re")
+
+
+def test_apply_extraction_rules_skips_lines():
+    raw_text = "\n".join([
+        "MILK 2% $3.99",
+        "BREAD 2.49",
+        "SUBTOTAL $6.48",
+        "Tax $0.52",
+        "TOTAL $7.00",
+        "01/02/24 12:00 9.99",
+        "VISA 1234 $7.00",
+        "牛奶 $4.50",
+    ])
+    assert apply_extraction_rules(raw_text, get_default_extraction_rules()) == [3.99, 2.49, 4.50]
+    print("[OK] apply_extraction_rules skips summary/payment lines")
+
+
+if __name__ == "__main__":
+    test_literal_prefixes_split_from_regexes()
+    test_fast_path_matches_full_alternation()
+    test_apply_extraction_rules_skips_lines()
+    print("\nAll tests passed.")
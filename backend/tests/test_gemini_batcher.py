@@ -0,0 +1,112 @@
+"""Test GeminiBatcher (GEMINI_BATCH_ENABLED micro-batching) without calling Gemini."""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.llm import gemini_client
+from app.services.llm.gemini_client import GeminiBatcher
+
+
+async def _fake_single(system_message, user_message, model, temperature):
+    return {"receipt": user_message}
+
+
+async def _fake_group(system_message, user_messages, model, temperature):
+    return [{"receipt": u, "batched": True} for u in user_messages]
+
+
+async def _submit_all(batcher, user_messages):
+    return await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit("sys", u, "model", 0) for u in user_messages)),
+        timeout=5,
+    )
+
+
+def test_batcher_groups_concurrent_calls():
+    """Concurrent submits are answered by one group call, in submit order."""
+    batcher = GeminiBatcher(window_s=0.01)
+    with patch.object(gemini_client, "_generate_receipt_json", _fake_single), \
+            patch.object(gemini_client, "_generate_receipt_json_group", _fake_group):
+        results = asyncio.run(_submit_all(batcher, ["a", "b", "c"]))
+    assert [r["receipt"] for r in results] == ["a", "b", "c"]
+    assert all(r.get("batched") for r in results)
+    print("[OK] Concurrent calls batched")
+
+
+def _run_on_own_loop(coro):
+    """Fresh loop closed without cancelling leftover tasks; the batcher must not leave any pending."""
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(coro)
+        loop.run_until_complete(asyncio.sleep(0.05))
+        pending = [t for t in asyncio.all_tasks(loop) if not t.done()]
+        assert not pending, pending
+        return result
+    finally:
+        loop.close()
+
+
+def test_batcher_survives_closed_loop():
+    """Each per-upload loop gets a working dispatcher, and none is left pending when a loop closes."""
+    batcher = GeminiBatcher(window_s=0.01)
+    with patch.object(gemini_client, "_generate_receipt_json", _fake_single), \
+            patch.object(gemini_client, "_generate_receipt_json_group", _fake_group):
+        first = _run_on_own_loop(_submit_all(batcher, ["a", "b"]))
+        second = _run_on_own_loop(_submit_all(batcher, ["c"]))
+        third = asyncio.run(_submit_all(batcher, ["d"]))
+    assert [r["receipt"] for r in first] == ["a", "b"]
+    assert [r["receipt"] for r in second] == ["c"]
+    assert [r["receipt"] for r in third] == ["d"]
+    print("[OK] Batcher restarts on a new event loop")
+
+
+def test_batcher_restarts_after_draining():
+    """Sequential calls on one loop: each finds the previous dispatcher finished and starts a new one."""
+    async def sequential(batcher):
+        first = await _submit_all(batcher, ["a"])
+        second = await _submit_all(batcher, ["b", "c"])
+        return first + second
+
+    batcher = GeminiBatcher(window_s=0.01)
+    with patch.object(gemini_client, "_generate_receipt_json", _fake_single), \
+            patch.object(gemini_client, "_generate_receipt_json_group", _fake_group):
+        results = asyncio.run(sequential(batcher))
+    assert [r["receipt"] for r in results] == ["a", "b", "c"]
+    print("[OK] Batcher restarts after draining")
+
+
+def test_batcher_falls_back_to_single_calls():
+    """A failed group call is retried one receipt at a time."""
+    async def failing_group(system_message, user_messages, model, temperature):
+        raise ValueError("wrong result count")
+
+    batcher = GeminiBatcher(window_s=0.01)
+    with patch.object(gemini_client, "_generate_receipt_json", _fake_single), \
+            patch.object(gemini_client, "_generate_receipt_json_group", failing_group):
+        results = asyncio.run(_submit_all(batcher, ["a", "b"]))
+    assert results == [{"receipt": "a"}, {"receipt": "b"}]
+    print("[OK] Group failure falls back to single calls")
+
+
+def test_get_batcher_is_per_loop():
+    """_get_batcher hands each event loop its own batcher."""
+    async def get():
+        return gemini_client._get_batcher(), gemini_client._get_batcher()
+
+    a1, a2 = asyncio.run(get())
+    b1, _ = asyncio.run(get())
+    assert a1 is a2
+    assert a1 is not b1
+    print("[OK] One batcher per event loop")
+
+
+if __name__ == "__main__":
+    test_batcher_groups_concurrent_calls()
+    test_batcher_survives_closed_loop()
+    test_batcher_restarts_after_draining()
+    test_batcher_falls_back_to_single_calls()
+    test_get_batcher_is_per_loop()
+    print("\nAll tests passed.")
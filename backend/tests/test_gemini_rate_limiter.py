@@ -0,0 +1,87 @@
+"""Test acquire_gemini_slot (app/services/llm/gemini_rate_limiter.py) with a fake clock."""
+import asyncio
+import sys
+import types
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.llm import gemini_rate_limiter as rl
+
+
+class FakeClock:
+    """Stands in for the time module; sleep() advances it instead of waiting."""
+
+    def __init__(self, now: float):
+        self.now = now
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _run(clock, coro, state=(0, 0), key_invalid=False):
+    with patch.object(rl, "time", clock), \
+            patch.object(rl, "asyncio", types.SimpleNamespace(sleep=clock.sleep)), \
+            patch.object(rl.settings, "gemini_api_key", "test-key"), \
+            patch.object(rl, "_state", state), \
+            patch.object(rl, "_gemini_key_invalid", key_invalid):
+        result = asyncio.run(coro)
+        return result, rl._state
+
+
+def test_slot_available_counts_request():
+    clock = FakeClock(now=600 * 60 + 5)
+    _, state = _run(clock, rl.acquire_gemini_slot(), state=(600, 3))
+    assert state == (600, 4)
+    assert clock.slept == []
+    print("[OK] Free slot taken without waiting")
+
+
+def test_full_window_waits_for_next_minute():
+    clock = FakeClock(now=600 * 60 + 50)
+    _, state = _run(clock, rl.acquire_gemini_slot(), state=(600, rl._max_requests_per_minute))
+    assert len(clock.slept) == 1
+    assert 10 < clock.slept[0] < 11  # 10s to the minute boundary + 0.1s margin
+    assert state == (601, 1)
+    print("[OK] Full window waits for the next minute")
+
+
+def test_full_window_times_out():
+    clock = FakeClock(now=600 * 60 + 1)
+    try:
+        _run(clock, rl.acquire_gemini_slot(timeout=5), state=(600, rl._max_requests_per_minute))
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("expected TimeoutError")
+    assert clock.slept == []
+    print("[OK] Gives up when the window won't reset within timeout")
+
+
+def test_invalid_key_raises_immediately():
+    clock = FakeClock(now=600 * 60)
+    try:
+        _run(clock, rl.acquire_gemini_slot(), key_invalid=True)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert clock.slept == []
+    print("[OK] Rejected key raises instead of waiting")
+
+
+if __name__ == "__main__":
+    test_slot_available_counts_request()
+    test_full_window_waits_for_next_minute()
+    test_full_window_times_out()
+    test_invalid_key_raises_immediately()
+    print("\nAll tests passed.")
@@ -0,0 +1,104 @@
+"""Test shared LLM helpers (app/services/llm/llm_common.py)."""
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import orjson
+
+from app.services.llm.llm_common import ResponseCache, loads_llm_json, repair_json
+
+
+def test_repair_json_leaves_valid_json_alone():
+    """Valid JSON (including brackets/commas inside strings) comes back unchanged."""
+    for text in ('{"a": 1, "b": [1, 2]}', '{"s": "x, ]}", "t": "a\\"b"}', "[]"):
+        assert repair_json(text) == text
+    print("[OK] repair_json no-op on valid JSON")
+
+
+def test_repair_json_trailing_commas():
+    assert orjson.loads(repair_json('{"a": [1, 2, ], "b": 3, }')) == {"a": [1, 2], "b": 3}
+    print("[OK] repair_json trailing commas")
+
+
+def test_repair_json_truncation():
+    """Output cut off by the token limit: close strings/brackets, drop dangling keys."""
+    cases = {
+        '{"items": [{"name": "MILK", "price": 399}, {"name": "EG': {
+            "items": [{"name": "MILK", "price": 399}, {"name": "EG"}]
+        },
+        '{"total": 1299, "items": [1, 2,': {"total": 1299, "items": [1, 2]},
+        '{"total": 1299, "tax": ': {"total": 1299},
+        '{"total": 1299, "tax"': {"total": 1299},
+        '{"total": 1299, "na': {"total": 1299},
+        '{"s": "ends with escape \\': {"s": "ends with escape "},
+    }
+    for text, expected in cases.items():
+        assert orjson.loads(repair_json(text)) == expected, text
+    print("[OK] repair_json truncation")
+
+
+def test_loads_llm_json():
+    """Valid JSON parses directly, repairable JSON is recovered, garbage raises JSONDecodeError."""
+    assert loads_llm_json('{"a": 1}') == {"a": 1}
+    assert loads_llm_json('{"a": [1, 2,]}') == {"a": [1, 2]}
+    for bad in ("not json", '{"a": tru'):
+        try:
+            loads_llm_json(bad)
+        except orjson.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError(f"expected JSONDecodeError for {bad!r}")
+    print("[OK] loads_llm_json")
+
+
+def test_response_cache_lru_and_copies():
+    """Oldest entry is evicted, get refreshes recency, values are copied in and out."""
+    cache = ResponseCache(maxsize=2)
+    a, b, c = (ResponseCache.key("m", 0, "sys", u) for u in ("a", "b", "c"))
+    value = {"items": [1]}
+    cache.put(a, value)
+    value["items"].append(2)
+    cache.put(b, {"items": []})
+    assert cache.get(a) == {"items": [1]}
+    cache.get(a)["items"].append(3)
+    assert cache.get(a) == {"items": [1]}
+    cache.put(c, {"items": []})
+    assert cache.get(b) is None
+    assert cache.get(a) is not None and cache.get(c) is not None
+    print("[OK] ResponseCache LRU + copies")
+
+
+def test_response_cache_threads():
+    """Concurrent get/put with constant eviction must not raise."""
+    cache = ResponseCache(maxsize=8)
+    keys = [ResponseCache.key("m", 0, "sys", str(i)) for i in range(32)]
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                key = keys[(i + offset) % len(keys)]
+                cache.put(key, {"i": i})
+                cache.get(keys[(i * 7 + offset) % len(keys)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+    print("[OK] ResponseCache thread safety")
+
+
+if __name__ == "__main__":
+    test_repair_json_leaves_valid_json_alone()
+    test_repair_json_trailing_commas()
+    test_repair_json_truncation()
+    test_loads_llm_json()
+    test_response_cache_lru_and_copies()
+    test_response_cache_threads()
+    print("\nAll tests passed.")
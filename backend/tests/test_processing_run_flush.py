@@ -0,0 +1,58 @@
+"""Test batched receipt_processing_runs inserts (app/services/database/supabase_client.py) without Supabase."""
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.database import supabase_client
+
+
+class FakeTable:
+    """Records inserted rows; any batch containing a row with stage "bad" fails as a whole."""
+
+    def __init__(self):
+        self.inserted = []
+        self.calls = 0
+        self._pending = None
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows, returning=None):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        self.calls += 1
+        if any(r["stage"] == "bad" for r in self._pending):
+            raise RuntimeError("invalid row")
+        self.inserted.extend(self._pending)
+
+
+def _flush(rows):
+    fake = FakeTable()
+    with patch.object(supabase_client, "_get_client", lambda: fake):
+        supabase_client._insert_processing_runs(rows)
+    return fake
+
+
+def test_good_batch_is_one_insert():
+    rows = [{"receipt_id": str(i), "stage": "ocr"} for i in range(10)]
+    fake = _flush(rows)
+    assert fake.inserted == rows
+    assert fake.calls == 1
+    print("[OK] Healthy batch inserted in one call")
+
+
+def test_bad_row_loses_only_itself():
+    rows = [{"receipt_id": str(i), "stage": "bad" if i == 6 else "ocr"} for i in range(10)]
+    fake = _flush(rows)
+    assert fake.inserted == [r for r in rows if r["stage"] != "bad"]
+    print("[OK] Failed batch retried in halves, only the bad row dropped")
+
+
+if __name__ == "__main__":
+    test_good_batch_is_one_insert()
+    test_bad_row_loses_only_itself()
+    print("\nAll tests passed.")
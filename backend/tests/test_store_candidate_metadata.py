@@ -0,0 +1,75 @@
+"""Test build_store_candidate_metadata (store_candidates.metadata built in the LLM stage)."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.processors.enrichment.address_matcher import build_store_candidate_metadata
+
+
+def test_empty_receipt():
+    assert build_store_candidate_metadata(None) == {}
+    assert build_store_candidate_metadata({}) == {}
+    print("[OK] Empty receipt -> {}")
+
+
+def test_structured_fields_write_all_aliases():
+    receipt = {
+        "merchant_address": "19630 Hwy 99, Lynnwood, WA 98036",
+        "address_line1": "19630 Hwy 99",
+        "address2": "Suite 100",
+        "city": "Lynnwood",
+        "state": "WA",
+        "zip_code": "98036",
+        "country": "US",
+        "merchant_phone": "425-555-0100",
+        "currency": "USD",
+        "purchase_date": "2026-03-01",
+        "purchase_time": "14:05",
+    }
+    assert build_store_candidate_metadata(receipt) == {
+        "address": {
+            "full_address": "19630 Hwy 99, Lynnwood, WA 98036",
+            "address_line1": "19630 Hwy 99",
+            "address1": "19630 Hwy 99",
+            "address_line2": "Suite 100",
+            "address2": "Suite 100",
+            "city": "Lynnwood",
+            "state": "WA",
+            "country": "US",
+            "zip_code": "98036",
+            "zipcode": "98036",
+        },
+        "phone": "425-555-0100",
+        "currency": "USD",
+        "purchase_date": "2026-03-01",
+        "purchase_time": "14:05",
+    }
+    print("[OK] Structured fields + aliases")
+
+
+def test_full_address_fills_missing_fields():
+    """Missing address1/city are parsed from merchant_address; given fields are not overwritten."""
+    receipt = {"merchant_address": "#101-4151 Hazelbridge Way, Richmond, BC V6X 4J7", "state": "BC"}
+    address = build_store_candidate_metadata(receipt)["address"]
+    assert address["address1"] == address["address_line1"] == "4151 Hazelbridge Way"
+    assert address["address2"] == address["address_line2"] == "101"
+    assert address["city"] == "Richmond"
+    assert address["state"] == "BC"
+    assert address["zipcode"] == address["zip_code"] == "V6X 4J7"
+    assert address["country"] == "CA"
+    print("[OK] Parsed from full address")
+
+
+def test_empty_values_are_skipped():
+    receipt = {"merchant_address": "", "city": "", "merchant_phone": None, "currency": "CAD"}
+    assert build_store_candidate_metadata(receipt) == {"currency": "CAD"}
+    print("[OK] Empty values skipped")
+
+
+if __name__ == "__main__":
+    test_empty_receipt()
+    test_structured_fields_write_all_aliases()
+    test_full_address_fills_missing_fields()
+    test_empty_values_are_skipped()
+    print("\nAll tests passed.")
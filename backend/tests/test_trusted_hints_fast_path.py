@@ -0,0 +1,102 @@
+"""Test the trusted-hints fast path that skips the LLM (receipt_llm_processor._result_from_trusted_hints)."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.llm.receipt_llm_processor import _result_from_trusted_hints, _to_cents
+
+
+def _hints(**values):
+    return {entity_type: {"value": value, "confidence": 0.99} for entity_type, value in values.items()}
+
+
+HINTS = _hints(
+    supplier_name="TRADER JOE'S",
+    receipt_date="2026-03-01",
+    subtotal_amount="6.48",
+    tax_amount="0.52",
+    total_amount="$7.00",
+    currency="USD",
+)
+LINE_ITEMS = [
+    {"raw_text": "MILK 3.99", "product_name": "MILK", "line_total": 3.99, "unit_price": 3.99, "quantity": 1},
+    {"raw_text": "BREAD 2.49", "product_name": "BREAD", "line_total": "2.49"},
+]
+
+
+def test_to_cents_strips_currency_formatting():
+    assert _to_cents("$1,234.56") == 123456
+    assert _to_cents(" 1.005 ") == 101  # half-up, same as supabase_client._to_cents
+    assert _to_cents(2.675) == 268
+    assert _to_cents("n/a") is None
+    assert _to_cents(None) is None
+    print("[OK] _to_cents")
+
+
+def test_fast_path_builds_llm_shaped_result():
+    result = _result_from_trusted_hints(HINTS, LINE_ITEMS)
+    receipt = result["receipt"]
+    assert receipt["merchant_name"] == "TRADER JOE'S"
+    assert receipt["purchase_date"] == "2026-03-01"
+    assert receipt["subtotal"] == 648
+    assert receipt["tax"] == 52
+    assert receipt["total"] == 700
+    assert receipt["currency"] == "USD"
+    assert [item["line_total"] for item in result["items"]] == [399, 249]
+    assert result["items"][0]["unit_price"] == 399
+    assert result["items"][1]["unit_price"] is None
+    assert result["tbd"] == {}
+    print("[OK] Fast path result")
+
+
+def test_fast_path_never_uses_net_amount_as_total():
+    """net_amount is pre-tax: seen before total_amount it must not become the total."""
+    hints = _hints(
+        supplier_name="STORE",
+        receipt_date="2026-03-01",
+        net_amount="10.00",
+        subtotal_amount="10.00",
+        total_tax_amount="0.50",
+        total_amount="10.50",
+    )
+    items = [{"raw_text": "ITEM 10.00", "product_name": "ITEM", "line_total": "10.00"}]
+    result = _result_from_trusted_hints(hints, items)
+    assert result["receipt"]["total"] == 1050
+    assert result["receipt"]["tax"] == 50
+    # Without subtotal_amount there is no trustworthy pre-tax amount: leave it to the LLM
+    no_subtotal = {k: v for k, v in hints.items() if k != "subtotal_amount"}
+    assert _result_from_trusted_hints(no_subtotal, items) is None
+    print("[OK] net_amount never used as total")
+
+
+def test_fast_path_falls_back_to_llm():
+    """None whenever the OCR output can't be trusted on its own."""
+    for missing in ("receipt_date", "subtotal_amount", "tax_amount", "total_amount"):
+        hints = {k: v for k, v in HINTS.items() if k != missing}
+        assert _result_from_trusted_hints(hints, LINE_ITEMS) is None, missing
+    bad_total = dict(HINTS, **_hints(total_amount="abc"))
+    assert _result_from_trusted_hints(bad_total, LINE_ITEMS) is None
+    assert _result_from_trusted_hints(HINTS, []) is None
+    no_line_total = LINE_ITEMS + [{"raw_text": "EGGS", "product_name": "EGGS"}]
+    assert _result_from_trusted_hints(HINTS, no_line_total) is None
+    print("[OK] Falls back to the LLM")
+
+
+def test_fast_path_tolerances():
+    """Items must sum to the subtotal and subtotal + tax must match the total, within 3 cents."""
+    assert _result_from_trusted_hints(dict(HINTS, **_hints(total_amount="7.03")), LINE_ITEMS) is not None
+    assert _result_from_trusted_hints(dict(HINTS, **_hints(total_amount="7.04")), LINE_ITEMS) is None
+    # subtotal + tax == total, but the items don't add up to the subtotal
+    off_items = dict(HINTS, **_hints(subtotal_amount="6.58", total_amount="7.10"))
+    assert _result_from_trusted_hints(off_items, LINE_ITEMS) is None
+    print("[OK] Subtotal / total tolerances")
+
+
+if __name__ == "__main__":
+    test_to_cents_strips_currency_formatting()
+    test_fast_path_builds_llm_shaped_result()
+    test_fast_path_never_uses_net_amount_as_total()
+    test_fast_path_falls_back_to_llm()
+    test_fast_path_tolerances()
+    print("\nAll tests passed.")